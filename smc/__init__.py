@@ -6,5 +6,13 @@ for k, v in _module.__dict__.items():
     if not k.startswith('__'):
         globals()[k] = v
 # expose submodules
+sys.modules[__name__ + '.rolling'] = import_module('smc_bot.smc.rolling')
 sys.modules[__name__ + '.detectors'] = import_module('smc_bot.smc.detectors')
+sys.modules[__name__ + '.resample'] = import_module('smc_bot.smc.resample')
+sys.modules[__name__ + '.vectorized'] = import_module('smc_bot.smc.vectorized')
+sys.modules[__name__ + '.tracker'] = import_module('smc_bot.smc.tracker')
+sys.modules[__name__ + '.instrument'] = import_module('smc_bot.smc.instrument')
+sys.modules[__name__ + '.sessions'] = import_module('smc_bot.smc.sessions')
+sys.modules[__name__ + '.scanner'] = import_module('smc_bot.smc.scanner')
+sys.modules[__name__ + '.labels'] = import_module('smc_bot.smc.labels')
 sys.modules[__name__ + '.SMCStrategyCore'] = import_module('smc_bot.smc.SMCStrategyCore')
@@ -0,0 +1,76 @@
+"""
+Per-bar cost of building the candle windows in SMCBacktraderWrapper.
+
+Compares the old rebuild (three fresh 50-tuple lists per bar) with the
+rolling windows the wrapper keeps now.  Only window construction is timed;
+the strategy core is not called.  XAUUSD uses the 30m/15m/15m files since
+no 5m file is bundled.
+
+    cd smc_bot && python -m benchmarks.bench_candle_windows --bars 20000
+"""
+
+import argparse
+import time
+
+import backtrader as bt
+
+from bridges.bt_feeds import csv_feed
+from bridges.bt_wrapper import SMCBacktraderWrapper
+
+FEEDS = {
+    "EURUSD": [("data/EURUSD_H1_bt.csv", 60), ("data/EURUSD_M30_bt.csv", 30), ("data/EURUSD_M15_bt.csv", 15)],
+    "XAUUSD": [("data/XAUUSD_30m_bt.csv", 30), ("data/XAUUSD_15m_bt.csv", 15), ("data/XAUUSD_15m_bt.csv", 15)],
+}
+
+
+class WindowTiming(SMCBacktraderWrapper):
+    params = (("max_bars", 0),)
+
+    def __init__(self):
+        super().__init__()
+        self.elapsed = 0.0
+        self.bars = 0
+
+    def next(self):
+        t0 = time.perf_counter()
+        self._candles(0, self.data_htf)
+        self._candles(1, self.data_mtf)
+        self._candles(2, self.data_ltf)
+        self.elapsed += time.perf_counter() - t0
+        self.bars += 1
+        if self.p.max_bars and self.bars >= self.p.max_bars:
+            self.env.runstop()
+
+
+class LegacyWindowTiming(WindowTiming):
+    def _candles(self, slot, data, length=50):
+        return [
+            (data.datetime.datetime(-i), float(data.open[-i]), float(data.high[-i]), float(data.low[-i]), float(data.close[-i]))
+            for i in reversed(range(length))
+        ]
+
+
+def time_windows(strategy, feeds, max_bars):
+    cerebro = bt.Cerebro(stdstats=False)
+    for path, compression in feeds:
+        cerebro.adddata(csv_feed(path, compression))
+    cerebro.addstrategy(strategy, max_bars=max_bars, print_signals=False)
+    strat = cerebro.run()[0]
+    return strat.elapsed / max(strat.bars, 1), strat.bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bars", type=int, default=0, help="stop after this many strategy bars (0 = all)")
+    parser.add_argument("--symbols", nargs="*", default=list(FEEDS))
+    args = parser.parse_args()
+
+    for name in args.symbols:
+        before, bars = time_windows(LegacyWindowTiming, FEEDS[name], args.bars)
+        after, _ = time_windows(WindowTiming, FEEDS[name], args.bars)
+        print(f"{name}: {bars} bars | rebuild {before * 1e6:8.1f} us/bar | "
+              f"rolling {after * 1e6:8.1f} us/bar | {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
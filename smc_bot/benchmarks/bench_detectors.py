@@ -0,0 +1,173 @@
+"""
+Per-call latency of each detector and of SMCStrategyCore.on_new_candles.
+
+Every case walks a slice of the bundled history bar by bar, hands the
+callable the trailing ``window`` candles (built outside the timed region)
+and times each call.  Results are written as JSON, one record per
+(symbol, case, window, look_back), sorted so two runs diff cleanly;
+``--baseline`` prints the p50 change against an earlier file.  XAUUSD uses
+the 30m/15m/15m files since no 5m file is bundled.
+
+    cd smc_bot && python -m benchmarks.bench_detectors --bars 2000 --out bench_detectors.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from fast_backtest import bt_atr
+from feeds import load_cached
+from smc.detectors import (
+    detect_bos, detect_choch, detect_fvg, detect_orderblock, liquidity_sweep, premium_discount_zone,
+    session_high_low, swing_points,
+)
+from smc.SMCStrategyCore import SMCStrategyCore
+
+FEEDS = {
+    "EURUSD": ("data/EURUSD_H1_bt.csv", "data/EURUSD_M30_bt.csv", "data/EURUSD_M15_bt.csv"),
+    "XAUUSD": ("data/XAUUSD_30m_bt.csv", "data/XAUUSD_15m_bt.csv", "data/XAUUSD_15m_bt.csv"),
+}
+
+# name -> (takes look_back, builder(look_back) -> fn(htf, mtf, ltf, atr, hour))
+CASES = {
+    "swing_points": (True, lambda lb: lambda h, m, l, a, hr: swing_points(l, lb)),
+    "detect_bos": (True, lambda lb: lambda h, m, l, a, hr: detect_bos(l, lb)),
+    "detect_choch": (True, lambda lb: lambda h, m, l, a, hr: detect_choch(l, lb)),
+    "detect_orderblock_bull": (False, lambda lb: lambda h, m, l, a, hr: detect_orderblock(l, "bull")),
+    "detect_orderblock_bear": (False, lambda lb: lambda h, m, l, a, hr: detect_orderblock(l, "bear")),
+    "detect_fvg": (False, lambda lb: lambda h, m, l, a, hr: detect_fvg(l)),
+    "liquidity_sweep": (False, lambda lb: lambda h, m, l, a, hr: liquidity_sweep(l, "bull")),
+    "session_high_low": (False, lambda lb: lambda h, m, l, a, hr: session_high_low(l, "asia")),
+    "premium_discount_zone": (False, lambda lb: lambda h, m, l, a, hr: premium_discount_zone(l)),
+    "on_new_candles": (True, lambda lb: _on_new_candles(lb)),
+}
+
+
+def _on_new_candles(look_back):
+    core = SMCStrategyCore(look_back=look_back, atr_thresh=0.0)
+
+    def call(htf, mtf, ltf, atr, hour):
+        return core.on_new_candles(htf, mtf, ltf, atr_value=atr, atr_thresh=0.0,
+                                   look_back=look_back, hour=hour)
+    return call
+
+
+def _candles(ohlc):
+    return list(zip(ohlc.datetimes(), ohlc.open.tolist(), ohlc.high.tolist(),
+                    ohlc.low.tolist(), ohlc.close.tolist()))
+
+
+def load_slice(files, start, bars, window):
+    """Candles of the three feeds plus, per timed LTF bar, the HTF/MTF bar counts."""
+    htf, mtf, ltf = (load_cached(p) for p in files)
+    lo = max(start, window)
+    ltf_rows = _candles(ltf)[lo - window + 1:lo + bars]
+    times = ltf.time[lo:lo + bars]
+    counts = [np.searchsorted(f.time, times, "right").tolist() for f in (htf, mtf)]
+    atr = bt_atr(ltf.high, ltf.low, ltf.close)[lo:lo + bars]
+    return _candles(htf), _candles(mtf), ltf_rows, counts, np.nan_to_num(atr).tolist()
+
+
+def time_case(fn, data, window):
+    htf, mtf, ltf, (nh, nm), atr = data
+    samples = []
+    clock = time.perf_counter_ns
+    for k in range(len(atr)):
+        h = htf[max(0, nh[k] - window):nh[k]]
+        m = mtf[max(0, nm[k] - window):nm[k]]
+        l = ltf[k:k + window]
+        hour = l[-1][0].hour
+        t0 = clock()
+        fn(h, m, l, atr[k], hour)
+        samples.append(clock() - t0)
+    ns = np.array(samples, dtype=np.float64)
+    total = ns.sum()
+    return {
+        "calls": len(samples),
+        "mean_us": round(ns.mean() / 1e3, 3),
+        "p50_us": round(np.percentile(ns, 50) / 1e3, 3),
+        "p90_us": round(np.percentile(ns, 90) / 1e3, 3),
+        "p99_us": round(np.percentile(ns, 99) / 1e3, 3),
+        "bars_per_s": round(len(samples) / (total / 1e9), 1) if total else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(symbols=None, cases=None, windows=(50, 100, 200), look_backs=(1, 2, 3), bars=2000,
+              start=0, feeds=None, verbose=True):
+    """Run the cases; returns the JSON-ready ``{"meta": ..., "results": [...]}``."""
+    feeds = feeds or FEEDS
+    results = []
+    for symbol in symbols or list(feeds):
+        for window in windows:
+            data = load_slice(feeds[symbol], start, bars, window)
+            for name in cases or list(CASES):
+                takes_lb, build = CASES[name]
+                for lb in (look_backs if takes_lb else (None,)):
+                    rec = {"symbol": symbol, "case": name, "window": window, "look_back": lb,
+                           **time_case(build(lb), data, window)}
+                    results.append(rec)
+                    if verbose:
+                        print(f"{symbol:7s} {name:24s} w={window:<4d} lb={lb if lb is not None else '-':<2} "
+                              f"p50 {rec['p50_us']:9.2f} us | p99 {rec['p99_us']:9.2f} us | "
+                              f"{rec['bars_per_s']:>10} bars/s")
+    results.sort(key=lambda r: (r["symbol"], r["case"], r["window"], r["look_back"] or 0))
+    meta = {
+        "commit": _git_commit(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "bars": bars,
+        "start": start,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(report, baseline):
+    """Print the p50 change of every record also present in ``baseline``."""
+    def key(r):
+        return r["symbol"], r["case"], r["window"], r["look_back"]
+    old = {key(r): r for r in baseline["results"]}
+    for r in report["results"]:
+        b = old.get(key(r))
+        if b and b["p50_us"]:
+            print(f"{r['symbol']:7s} {r['case']:24s} w={r['window']:<4d} lb={r['look_back'] if r['look_back'] is not None else '-':<2} "
+                  f"p50 {b['p50_us']:9.2f} -> {r['p50_us']:9.2f} us ({(r['p50_us'] / b['p50_us'] - 1) * 100:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bars", type=int, default=2000, help="timed LTF bars per case")
+    parser.add_argument("--start", type=int, default=0, help="first LTF bar of the slice")
+    parser.add_argument("--windows", type=int, nargs="*", default=[50, 100, 200])
+    parser.add_argument("--look-backs", type=int, nargs="*", default=[1, 2, 3])
+    parser.add_argument("--symbols", nargs="*", default=list(FEEDS))
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--out", default="bench_detectors.json")
+    parser.add_argument("--baseline", default=None, help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    report = run_suite(args.symbols, args.cases, args.windows, args.look_backs, args.bars, args.start)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Wall-clock of the native engine against cerebro + SMCBacktraderWrapper.
+
+Both run the same parameters over the bundled files (XAUUSD on the
+30m/15m/15m files, no 5m file is bundled) and the trade logs are compared.
+
+    cd smc_bot && python -m benchmarks.bench_fast_backtest [--todate 2023-07-01]
+"""
+
+import argparse
+import datetime
+import time
+
+import backtrader as bt
+
+from bridges.bt_feeds import csv_feed
+from bridges.bt_wrapper import SMCBacktraderWrapper
+from fast_backtest import run_files
+
+CASES = {
+    "EURUSD": ([("data/EURUSD_H1_bt.csv", 60), ("data/EURUSD_M30_bt.csv", 30), ("data/EURUSD_M15_bt.csv", 15)],
+               dict(look_back=2, atr_thresh=0.0005)),
+    "XAUUSD": ([("data/XAUUSD_30m_bt.csv", 30), ("data/XAUUSD_15m_bt.csv", 15), ("data/XAUUSD_15m_bt.csv", 15)],
+               dict(look_back=2, atr_thresh=0.3)),
+}
+
+
+def run_backtrader(files, todate, **params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.set_cash(10000)
+    for path, compression in files:
+        cerebro.adddata(csv_feed(path, compression, todate=todate))
+    cerebro.addstrategy(SMCBacktraderWrapper, print_signals=False, **params)
+    return cerebro.run()[0].trades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--todate", type=datetime.datetime.fromisoformat, default=None)
+    parser.add_argument("--symbols", nargs="*", default=list(CASES))
+    args = parser.parse_args()
+
+    for name in args.symbols:
+        files, params = CASES[name]
+        t0 = time.perf_counter()
+        ref = run_backtrader(files, args.todate, **params)
+        t1 = time.perf_counter()
+        res = run_files(*[path for path, _ in files], todate=args.todate, **params)
+        t2 = time.perf_counter()
+        parity = "identical" if res["trades"] == ref else "MISMATCH"
+        print(f"{name}: {res['steps']} bars, {len(ref)} fills ({parity}) | backtrader {t1 - t0:7.2f}s | "
+              f"fast {t2 - t1:6.3f}s | {(t1 - t0) / (t2 - t1):6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
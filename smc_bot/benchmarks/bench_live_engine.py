@@ -0,0 +1,54 @@
+"""
+Live decision latency with many symbols in one process.
+
+The watchlist is ``--symbols`` copies of the bundled EURUSD and XAUUSD
+feeds served by one ReplayMT5 (the MetaTrader5 stand-in) on its discrete
+clock.  One LiveEngine trading them all - batched fetches per bar close,
+HTF fetched only when due, one executor - is timed against one LiveRunner
+task per symbol on the same executor, which is what separate bots sharing
+a terminal would do.  Latency is per symbol per bar, from the fetch that
+found the bar to the end of that symbol's decision.  The engine decides a
+wake-up's symbols one after another, so its latency includes the symbols
+ahead in the batch; a separate runner's covers only its own decision but
+each one fetches, syncs the clock and sleeps on its own, which is what
+the bars/s and rate-request columns show.
+
+    cd smc_bot && python -m benchmarks.bench_live_engine --symbols 50 --todate 2023-01-06
+"""
+
+import argparse
+import datetime
+
+import numpy as np
+
+from mt5_replay import FEEDS, run_watchlist
+
+
+def watchlist(n):
+    names = sorted(FEEDS)
+    return [(f"SYM{k:03d}", FEEDS[names[k % len(names)]]) for k in range(n)]
+
+
+def report(label, res):
+    lat = np.concatenate([np.asarray(v) for v in res["latencies"].values()]) * 1e3
+    bars = sum(res["bars"].values())
+    print(f"{label:9s} {bars:7d} bars {res['wall_s']:7.2f}s {bars / res['wall_s']:8.0f} bars/s  "
+          f"{res['rate_calls']:7d} rate requests  latency ms p50 {np.percentile(lat, 50):6.2f} "
+          f"p90 {np.percentile(lat, 90):6.2f} p99 {np.percentile(lat, 99):6.2f} max {lat.max():7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--fromdate", type=datetime.datetime.fromisoformat, default=datetime.datetime(2023, 1, 4, 6))
+    parser.add_argument("--todate", type=datetime.datetime.fromisoformat, default=datetime.datetime(2023, 1, 6))
+    args = parser.parse_args()
+
+    syms = watchlist(args.symbols)
+    print(f"{args.symbols} symbols, {args.fromdate} to {args.todate}")
+    report("engine", run_watchlist(syms, args.fromdate, args.todate, engine=True))
+    report("separate", run_watchlist(syms, args.fromdate, args.todate, engine=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Portfolio backtest throughput against running each symbol on its own.
+
+The watchlist is ``--symbols`` copies of the bundled EURUSD and XAUUSD
+feeds (XAUUSD uses the 30m/15m/15m files since no 5m file is bundled).
+Both sides get ample cash, so every symbol's fills are the same in the
+portfolio as alone and only the stepping differs: one heap-merged clock
+with shared cash versus one engine loop per symbol.
+
+    cd smc_bot && python -m benchmarks.bench_portfolio --symbols 50 --todate 2023-06-01
+"""
+
+import argparse
+import datetime
+import time
+
+from fast_backtest import run_files
+from portfolio import run_portfolio
+
+FEEDS = [
+    ("data/EURUSD_H1_bt.csv", "data/EURUSD_M30_bt.csv", "data/EURUSD_M15_bt.csv", 0.0005),
+    ("data/XAUUSD_30m_bt.csv", "data/XAUUSD_15m_bt.csv", "data/XAUUSD_15m_bt.csv", 0.3),
+]
+PARAMS = dict(look_back=2, max_retests=8, trailing_atr_mult=1.0)
+CASH = 1e9
+
+
+def watchlist(n):
+    syms = []
+    for k in range(n):
+        htf, mtf, ltf, atr_thresh = FEEDS[k % len(FEEDS)]
+        syms.append({"name": f"SYM{k:03d}", "htf": htf, "mtf": mtf, "ltf": ltf,
+                     "params": {"atr_thresh": atr_thresh}})
+    return syms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--todate", type=datetime.datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    syms = watchlist(args.symbols)
+    t0 = time.perf_counter()
+    alone = [run_files(s["htf"], s["mtf"], s["ltf"], todate=args.todate, cash=CASH, **PARAMS, **s["params"])
+             for s in syms]
+    t1 = time.perf_counter()
+    res = run_portfolio(syms, PARAMS, cash=CASH, todate=args.todate)
+    t2 = time.perf_counter()
+
+    steps = sum(r["steps"] for r in alone)
+    pnl = sum(r["final_value"] - CASH for r in alone)
+    parity = "identical" if abs(res["final_value"] - CASH - pnl) < 1e-6 * max(1.0, abs(pnl)) else "MISMATCH"
+    print(f"{args.symbols} symbols, {steps} bars, pnl {pnl:.2f} ({parity})")
+    print(f"one by one {t1 - t0:7.2f}s  {steps / (t1 - t0):10.0f} bars/s")
+    print(f"portfolio  {t2 - t1:7.2f}s  {res['steps'] / (t2 - t1):10.0f} bars/s  "
+          f"max drawdown {res['max_drawdown']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import math
+
+import backtrader as bt
+
+from feeds import load_cached
+
+_EPOCH_ORDINAL = 719163  # datetime.date(1970, 1, 1).toordinal()
+
+
+def csv_feed(path, compression, **kwargs):
+    """GenericCSVData for the DATE,TIME,OPEN,HIGH,LOW,CLOSE files in data/."""
+    return bt.feeds.GenericCSVData(
+        dataname=path,
+        timeframe=bt.TimeFrame.Minutes,
+        compression=compression,
+        dtformat="%Y.%m.%d",
+        tmformat="%H:%M:%S",
+        datetime=0,
+        time=1,
+        open=2,
+        high=3,
+        low=4,
+        close=5,
+        volume=-1,
+        openinterest=-1,
+        separator=',',
+        **kwargs
+    )
+
+
+def epoch2num(times):
+    """bt.date2num for int epoch seconds, bit for bit (same fsum of parts)."""
+    out = []
+    for t in times:
+        days, secs = divmod(int(t), 86400)
+        hh, rem = divmod(secs, 3600)
+        mm, ss = divmod(rem, 60)
+        out.append(math.fsum((float(days + _EPOCH_ORDINAL), hh / 24.0, mm / 1440.0, ss / 86400.0, 0.0)))
+    return out
+
+
+class ArrayFeed(bt.feed.DataBase):
+    """Backtrader feed over a ``feeds.OHLC`` (``dataname``); no text parsing."""
+
+    def start(self):
+        super().start()
+        ohlc = self.p.dataname
+        self._rows = list(zip(epoch2num(ohlc.time), ohlc.open.tolist(), ohlc.high.tolist(),
+                              ohlc.low.tolist(), ohlc.close.tolist()))
+        self._idx = 0
+
+    def _load(self):
+        if self._idx >= len(self._rows):
+            return False
+        dt, o, h, l, c = self._rows[self._idx]
+        self._idx += 1
+        lines = self.lines
+        lines.datetime[0] = dt
+        lines.open[0] = o
+        lines.high[0] = h
+        lines.low[0] = l
+        lines.close[0] = c
+        lines.volume[0] = 0.0
+        lines.openinterest[0] = 0.0
+        return True
+
+
+def cached_feed(path, compression, **kwargs):
+    """Drop-in for ``csv_feed`` that reads through the binary feed cache."""
+    return ArrayFeed(dataname=load_cached(path), timeframe=bt.TimeFrame.Minutes,
+                     compression=compression, **kwargs)
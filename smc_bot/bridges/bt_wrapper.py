@@ -1,4 +1,8 @@
 import backtrader as bt
+from journal import MemoryJournal, TradeJournal
+from smc.detectors import CandleBuffer
+from smc.instrument import DetectorStats
+from smc.resample import Resampler
 from smc.SMCStrategyCore import SMCStrategyCore
 
 class SMCBacktraderWrapper(bt.Strategy):
@@ -11,6 +15,10 @@ class SMCBacktraderWrapper(bt.Strategy):
         ("trailing_atr_mult", 1.0),
         ("trade_start_hour", 0),
         ("trade_end_hour", 24),
+        ("window", 50),
+        ("detector_stats", False),   # time/count each detector, printed in stop()
+        ("journal", None),           # fills: None keeps them in self.trades; a path or journal streams them
+        ("resample", None),          # (htf, mtf) minutes: build both from a single LTF feed
     )
 
     def __init__(self):
@@ -20,47 +28,83 @@ class SMCBacktraderWrapper(bt.Strategy):
             max_retests=self.p.max_retests,
             atr_thresh=self.p.atr_thresh,
             session_only=False,    # set True to restrict to main session
+            stats=DetectorStats() if self.p.detector_stats else None,
         )
-        self.data_htf = self.datas[0]
-        self.data_mtf = self.datas[1]
-        self.data_ltf = self.datas[2]
+        self._resampler = None
+        if self.p.resample:
+            # one feed; HTF/MTF bars appear once the LTF bar closing them does
+            self.data_htf = self.data_mtf = None
+            self.data_ltf = self.datas[0]
+            self._resampler = Resampler(self.data_ltf.p.compression * 60, [m * 60 for m in self.p.resample],
+                                        self.p.window)
+            self._fed = 0
+        else:
+            self.data_htf = self.datas[0]
+            self.data_mtf = self.datas[1]
+            self.data_ltf = self.datas[2]
         self.atr = bt.indicators.ATR(self.data_ltf, period=14)
 
+        # Rolling candle windows per feed, kept in typed arrays and handed to
+        # the core as-is
+        self._windows = [CandleBuffer(self.p.window) for _ in range(3)]
+        self._seen = [0, 0, 0]
+
         self.order = None
         self.entry_price = None
         self.sl = None
         self.target = None
         self.zone_type = None
-        self.trades = []
+        journal = self.p.journal
+        self._own_journal = isinstance(journal, str)
+        if journal is None:
+            journal = MemoryJournal()
+        elif self._own_journal:
+            journal = TradeJournal(journal)
+        self.journal = journal
+        self.trades = getattr(journal, "trades", [])   # stays empty when fills go to a file
 
     def notify_order(self, order):
         if order.status in [order.Completed]:
             trade_type = "buy" if order.isbuy() else "sell"
-            self.trades.append({
-                "datetime": self.data_ltf.datetime.datetime(0),
-                "type": trade_type,
-                "price": order.executed.price,
-                "size": order.executed.size
-            })
+            self.journal.record(self.data_ltf.datetime.datetime(0), trade_type,
+                                order.executed.price, order.executed.size)
             self.entry_price = order.executed.price
 
+    @staticmethod
+    def _bar(data, ago):
+        # backtrader keeps days since 0001-01-01 as floats; 719163 is 1970-01-01
+        epoch = round((data.datetime[ago] - 719163) * 86400)
+        return epoch, data.open[ago], data.high[ago], data.low[ago], data.close[ago]
+
+    def _candles(self, slot, data):
+        # Append only the bars the feed closed since the last call (0 or 1
+        # normally, up to the minperiod on the first call)
+        buf = self._windows[slot]
+        fresh = min(len(data) - self._seen[slot], buf.capacity)
+        for ago in range(1 - fresh, 1):
+            buf.append_bar(*self._bar(data, ago))
+        self._seen[slot] = len(data)
+        return buf
+
+    def _resampled(self):
+        # Every LTF bar since the last call goes through the resampler, so
+        # buckets that straddle the minperiod are complete
+        data = self.data_ltf
+        for ago in range(1 - (len(data) - self._fed), 1):
+            self._resampler.update_bar(*self._bar(data, ago))
+        self._fed = len(data)
+        return self._resampler.windows
+
     def next(self):
-        dt = self.data_ltf.datetime.datetime(0)
+        if self._resampler is None:
+            candles_htf = self._candles(0, self.data_htf)
+            candles_mtf = self._candles(1, self.data_mtf)
+        else:
+            candles_htf, candles_mtf = self._resampled()
+        candles_ltf = self._candles(2, self.data_ltf)
+        dt = candles_ltf[-1][0]
         hour = dt.hour
-        # You can override hour detection if your data is missing it
-
-        def get_candles(data, length=50):
-            # (open, high, low, close) as floats
-            return [
-               (data.datetime.datetime(-i), float(data.open[-i]), float(data.high[-i]), float(data.low[-i]), float(data.close[-i]))
-        for i in reversed(range(length))
-        ]
-            
-            
 
-        candles_htf = get_candles(self.data_htf)
-        candles_mtf = get_candles(self.data_mtf)
-        candles_ltf = get_candles(self.data_ltf)
         atr_val = self.atr[0]
 
         signal = self.core.on_new_candles(
@@ -102,3 +146,13 @@ class SMCBacktraderWrapper(bt.Strategy):
                     self.sl = new_stop
                 if self.data_ltf.close[0] > self.sl:
                     self.close()
+
+    def stop(self):
+        if self._own_journal:
+            self.journal.close()
+        else:
+            self.journal.flush()
+        if self.core.stats is not None:
+            print(self.core.stats.report())
+            info = self.core.htf_cache_info()
+            print(f"htf bias cache: {info['hits']} hits, {info['misses']} misses ({info['hit_rate'] * 100:.1f}% hit)")
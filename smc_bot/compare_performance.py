@@ -1,6 +1,27 @@
+"""
+Backtest every symbol in the watchlist and tabulate the results.
+
+Each symbol runs its own cerebro in a worker process; workers send back the
+table row and the trade log only (not the strategy), and the parent writes
+the per-symbol logs and performance_comparison.csv in watchlist order.
+With ``--journal-dir`` the workers stream fills to one journal partition
+per symbol instead (see journal.py) and the parent exports the CSV logs
+from those; ``journal.merge_partitions(dir, out)`` combines them later.
+With ``--resample`` only each symbol's LTF file is loaded and the HTF/MTF
+candles are built from it in memory (see smc/resample.py).
+
+    cd smc_bot && python compare_performance.py --jobs 8 [--symbols EURUSD ...]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import backtrader as bt
 import pandas as pd
+from bridges.bt_feeds import cached_feed
 from bridges.bt_wrapper import SMCBacktraderWrapper
+from journal import SUFFIX, export_csv, partition, read_journal
 
 symbols = [
     {
@@ -21,81 +42,47 @@ symbols = [
     },
 ]
 
-results = []
-
-for sym in symbols:
-    print(f"\nRunning backtest for {sym['name']} ...")
-    cerebro = bt.Cerebro()
-    cerebro.broker.set_cash(10000)
-    cerebro.broker.setcommission(commission=0.0)
-
-    data_htf = bt.feeds.GenericCSVData(
-        dataname=sym["htf"],
-        timeframe=bt.TimeFrame.Minutes,
-        compression=sym["htf_compr"],
-        dtformat="%Y.%m.%d",
-        tmformat="%H:%M:%S",
-        datetime=0,
-        time=1,
-        open=2,
-        high=3,
-        low=4,
-        close=5,
-        volume=-1,
-        openinterest=-1,
-        separator=','
-    )
-    data_mtf = bt.feeds.GenericCSVData(
-        dataname=sym["mtf"],
-        timeframe=bt.TimeFrame.Minutes,
-        compression=sym["mtf_compr"],
-        dtformat="%Y.%m.%d",
-        tmformat="%H:%M:%S",
-        datetime=0,
-        time=1,
-        open=2,
-        high=3,
-        low=4,
-        close=5,
-        volume=-1,
-        openinterest=-1,
-        separator=','
-    )
-    data_ltf = bt.feeds.GenericCSVData(
-        dataname=sym["ltf"],
-        timeframe=bt.TimeFrame.Minutes,
-        compression=sym["ltf_compr"],
-        dtformat="%Y.%m.%d",
-        tmformat="%H:%M:%S",
-        datetime=0,
-        time=1,
-        open=2,
-        high=3,
-        low=4,
-        close=5,
-        volume=-1,
-        openinterest=-1,
-        separator=','
-    )
-
-    cerebro.adddata(data_htf)
-    cerebro.adddata(data_mtf)
-    cerebro.adddata(data_ltf)
-
-    # Loosen the filters for more signals, especially for EURUSD
-    cerebro.addstrategy(
-    SMCBacktraderWrapper,
+# Loosen the filters for more signals, especially for EURUSD
+STRATEGY_PARAMS = dict(
     lot_size=0.02,
     look_back=2,
     max_retests=8,
     trailing_atr_mult=1.0,
     atr_thresh=0.3,
-    print_signals=True
+    print_signals=False,
 )
+
+
+def run_symbol(sym, params=None, journal_dir=None, tag=0, resample=False, **feed_kwargs):
+    """
+    One symbol's backtest; returns (table row, trade log).  With
+    ``journal_dir`` the fills go to its ``<name>.fills`` partition
+    (rewritten, stamped with ``tag``) and the returned log is empty.
+    ``resample`` loads the LTF file only and resamples the other two.
+    """
+    cerebro = bt.Cerebro()
+    cerebro.broker.set_cash(10000)
+    cerebro.broker.setcommission(commission=0.0)
+
+    params = {**STRATEGY_PARAMS, **(params or {})}
+    if resample:
+        cerebro.adddata(cached_feed(sym["ltf"], sym["ltf_compr"], **feed_kwargs))
+        params["resample"] = (sym["htf_compr"], sym["mtf_compr"])
+    else:
+        for tf in ("htf", "mtf", "ltf"):
+            cerebro.adddata(cached_feed(sym[tf], sym[f"{tf}_compr"], **feed_kwargs))
+
+    journal = None
+    if journal_dir:
+        journal = params["journal"] = partition(journal_dir, sym["name"], mode="w", tag=tag)
+    cerebro.addstrategy(SMCBacktraderWrapper, **params)
     cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
 
-    results_list = cerebro.run()
-    strat = results_list[0]
+    try:
+        strat = cerebro.run()[0]
+    finally:
+        if journal is not None:
+            journal.close()
     analyzer = strat.analyzers.trades.get_analysis()
 
     # Defensive get (works with all bt versions)
@@ -103,29 +90,79 @@ for sym in symbols:
     won = analyzer.get('won', {}).get('total', 0) if hasattr(analyzer, 'get') else getattr(analyzer.won, 'total', 0)
     lost = analyzer.get('lost', {}).get('total', 0) if hasattr(analyzer, 'get') else getattr(analyzer.lost, 'total', 0)
     win_rate = (won / total_closed) * 100 if total_closed else 0
-    final_equity = cerebro.broker.getvalue()
-
-    print(f"{sym['name']} - Final Portfolio Value: {final_equity:.2f}")
-    print(f"{sym['name']} - Total trades: {total_closed}, Win rate: {win_rate:.2f} %")
 
-    # Export trade log for each symbol
-    trades = getattr(strat, 'trades', [])
-    if trades:
-        pd.DataFrame(trades).to_csv(sym["log"], index=False)
-        print(f"Trade log exported as {sym['log']}")
-
-    results.append({
+    row = {
         "Symbol": sym["name"],
-        "Final Equity": final_equity,
+        "Final Equity": cerebro.broker.getvalue(),
         "Total Trades": total_closed,
         "Won": won,
         "Lost": lost,
         "Win Rate (%)": f"{win_rate:.2f}"
-    })
-
-# --- Output comparison table ---
-print("\n=== PERFORMANCE COMPARISON ===")
-df_results = pd.DataFrame(results)
-print(df_results.to_string(index=False))
-df_results.to_csv("performance_comparison.csv", index=False)
-print("Comparison table exported as performance_comparison.csv")
+    }
+    return row, list(getattr(strat, 'trades', []))
+
+
+def compare(watchlist=None, jobs=None, params=None, out="performance_comparison.csv", journal_dir=None,
+            resample=False, **feed_kwargs):
+    """
+    Backtest ``watchlist`` (default: ``symbols``) with up to ``jobs`` worker
+    processes (1 runs in-process).  Symbols that fail are reported and left
+    out of the table.  ``journal_dir`` streams fills to per-symbol journal
+    partitions, tagged with the symbol's watchlist position; ``resample``
+    builds the HTF/MTF candles from the LTF file.  Returns the comparison
+    DataFrame.
+    """
+    watchlist = symbols if watchlist is None else watchlist
+    if jobs == 1:
+        outcomes = []
+        for k, sym in enumerate(watchlist):
+            try:
+                outcomes.append(run_symbol(sym, params, journal_dir, k, resample, **feed_kwargs))
+            except Exception as e:
+                outcomes.append(e)
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = [pool.submit(run_symbol, sym, params, journal_dir, k, resample, **feed_kwargs)
+                       for k, sym in enumerate(watchlist)]
+            outcomes = [fut.exception() or fut.result() for fut in futures]
+
+    results = []
+    for sym, outcome in zip(watchlist, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"{sym['name']} - failed: {outcome!r}")
+            continue
+        row, trades = outcome
+        print(f"{sym['name']} - Final Portfolio Value: {row['Final Equity']:.2f}")
+        print(f"{sym['name']} - Total trades: {row['Total Trades']}, Win rate: {row['Win Rate (%)']} %")
+        fills = os.path.join(journal_dir, sym["name"] + SUFFIX) if journal_dir else None
+        if fills and len(read_journal(fills)):
+            export_csv(fills, sym["log"])
+            print(f"Trade log exported as {sym['log']}")
+        elif trades:
+            pd.DataFrame(trades).to_csv(sym["log"], index=False)
+            print(f"Trade log exported as {sym['log']}")
+        results.append(row)
+
+    df_results = pd.DataFrame(results)
+    if out:
+        df_results.to_csv(out, index=False)
+    return df_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--symbols", nargs="*", default=None, help="names from the watchlist (default: all)")
+    parser.add_argument("--print-signals", action="store_true")
+    parser.add_argument("--journal-dir", default=None, help="stream fills to per-symbol journals here")
+    parser.add_argument("--resample", action="store_true", help="load the LTF file only, resample HTF/MTF")
+    args = parser.parse_args()
+
+    watchlist = [s for s in symbols if args.symbols is None or s["name"] in args.symbols]
+    df_results = compare(watchlist, jobs=args.jobs, params={"print_signals": args.print_signals},
+                         journal_dir=args.journal_dir, resample=args.resample)
+
+    # --- Output comparison table ---
+    print("\n=== PERFORMANCE COMPARISON ===")
+    print(df_results.to_string(index=False))
+    print("Comparison table exported as performance_comparison.csv")
@@ -0,0 +1,411 @@
+"""
+Array-based backtest engine for SMCStrategyCore.
+
+Replays what SMCBacktraderWrapper does under cerebro - same three feeds,
+same entries, same ATR trailing stop - without backtrader's per-bar line
+machinery.  Signals come from ``SMCStrategyCore.signals_batch`` in one
+vectorized pass (or from ``on_new_candles`` per bar with ``batch=False``)
+and the broker mirrors BackBroker's defaults: market orders go to the first
+(HTF) feed and fill at its next open, cash is checked on submission and on
+execution, and positions can stack or flip exactly as they do there.
+
+With ``intrabar`` (a finer feed than the LTF) exits stop being decided on
+the LTF close: the stop - trailed as before - and the signal's target rest
+as orders and fill inside the bar that reaches them, at the price and time
+the finer bars give (see intrabar.py).  backtrader cannot fill at a past
+intrabar price, so this mode has no cerebro counterpart.
+
+    cd smc_bot && python fast_backtest.py
+"""
+
+import datetime
+import math
+from collections import deque
+
+import numpy as np
+
+from feeds import load_cached
+from intrabar import SubBarIndex
+from smc.SMCStrategyCore import SMCStrategyCore
+
+ATR_PERIOD = 14
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def bt_atr(high, low, close, period=ATR_PERIOD):
+    """backtrader's ATR: Wilder smoothing of the true range, SMA seeded."""
+    n = len(close)
+    atr = np.full(n, np.nan)
+    if n <= period:
+        return atr
+    h, l, c = high.tolist(), low.tolist(), close.tolist()
+    tr = [math.nan] + [max(h[i], c[i - 1]) - min(l[i], c[i - 1]) for i in range(1, n)]
+    alpha = 1.0 / period
+    alpha1 = 1.0 - alpha
+    prev = math.fsum(tr[1:period + 1]) / period
+    atr[period] = prev
+    for i in range(period + 1, n):
+        atr[i] = prev = prev * alpha1 + tr[i] * alpha
+    return atr
+
+
+class _Position:
+    __slots__ = ("size", "price")
+
+    def __init__(self, size=0, price=0.0):
+        self.size = size
+        self.price = price
+
+    def update(self, size, price):
+        # backtrader.Position.update: returns the opened and closed parts of size
+        oldsize = self.size
+        self.size += size
+        if not self.size:
+            opened, closed = 0, size
+            self.price = 0.0
+        elif not oldsize:
+            opened, closed = size, 0
+            self.price = price
+        elif (oldsize > 0) == (size > 0):
+            opened, closed = size, 0
+            self.price = (self.price * oldsize + size * price) / self.size
+        elif (self.size > 0) == (oldsize > 0):
+            opened, closed = 0, size
+        else:
+            opened, closed = self.size, -oldsize
+            self.price = price
+        return opened, closed
+
+
+class _Order:
+    __slots__ = ("size", "created_dt", "created_price")
+
+    def __init__(self, size, created_dt, created_price):
+        self.size = size
+        self.created_dt = created_dt
+        self.created_price = created_price
+
+
+class FastBroker:
+    """Cash/position bookkeeping of BackBroker for one instrument, no commission."""
+
+    def __init__(self, cash=10000.0):
+        self.cash = cash
+        self.position = _Position()
+        self.submitted = []
+        self.pending = deque()
+        self._trade = None          # [size, price, pnl, long] of the open trade
+        self.trades_opened = 0
+        self.closed_trades = []     # (pnl, long)
+
+    def submit(self, size, dt, price):
+        self.submitted.append(_Order(size, dt, price))
+
+    def close(self, dt, price):
+        if self.position.size:
+            self.submit(-self.position.size, dt, price)
+
+    def fill(self, size, dt, price):
+        """Execute ``size`` at ``price`` now (a resting stop or limit that traded); returns the filled size."""
+        return self._execute(_Order(size, dt, price), price)
+
+    def _check_submitted(self):
+        # pseudo-execute at the creation price; reject what would overdraw cash
+        cash = self.cash
+        pos = _Position(self.position.size, self.position.price)
+        for order in self.submitted:
+            price = order.created_price
+            opened, closed = pos.update(order.size, price)
+            if closed:
+                cash += -closed * price
+            if opened:
+                cash -= opened * price
+            if cash >= 0.0:
+                self.pending.append(order)
+        self.submitted = []
+
+    def _update_trade(self, size, price):
+        if not size:
+            return
+        trade = self._trade
+        if trade is None:
+            trade = self._trade = [0, 0.0, 0.0, size > 0]
+            self.trades_opened += 1
+        oldsize = trade[0]
+        trade[0] += size
+        if abs(trade[0]) > abs(oldsize):
+            trade[1] = (oldsize * trade[1] + size * price) / trade[0]
+        else:
+            trade[2] += -size * (price - trade[1])
+        if not trade[0]:
+            self.closed_trades.append((trade[2], trade[3]))
+            self._trade = None
+
+    def _execute(self, order, price):
+        pos = self.position
+        pprice_orig = pos.price
+        opened, closed = _Position(pos.size, pos.price).update(order.size, price)
+        cash = self.cash
+        if closed:
+            cash += -closed * pprice_orig + -closed * (price - pprice_orig)
+            self.cash = cash
+        popened = opened
+        if opened:
+            cash -= opened * price
+            if cash < 0.0:
+                opened = 0
+            else:
+                self.cash = cash
+        if closed + opened:
+            pos.update(closed + opened, price)
+            self._update_trade(closed, price)
+            self._update_trade(opened, price)
+        # only complete fills reach notify_order as Completed
+        if not (popened and not opened):
+            return closed + opened
+        return None
+
+    def next(self, dt, open_price):
+        """One broker step once the first feed shows bar ``dt``; returns the fills."""
+        self._check_submitted()
+        fills = []
+        for _ in range(len(self.pending)):
+            order = self.pending.popleft()
+            if dt <= order.created_dt:
+                self.pending.append(order)
+                continue
+            size = self._execute(order, open_price)
+            if size:
+                # Order.executed averages its bits: (size * price) / size
+                fills.append((size, (size * open_price) / size))
+        return fills
+
+    def value(self, price):
+        return self.cash + self.position.size * price
+
+    def analysis(self):
+        """TradeAnalyzer-style summary of the closed trades."""
+        won = [p for p, _ in self.closed_trades if p >= 0.0]
+        lost = [p for p, _ in self.closed_trades if p < 0.0]
+        total_pnl = math.fsum(p for p, _ in self.closed_trades)
+        side = {}
+        for name, is_long in (("long", True), ("short", False)):
+            pnls = [p for p, lg in self.closed_trades if lg == is_long]
+            side[name] = {
+                "total": len(pnls),
+                "won": sum(1 for p in pnls if p >= 0.0),
+                "lost": sum(1 for p in pnls if p < 0.0),
+                "pnl": {"total": math.fsum(pnls)},
+            }
+        return {
+            "total": {
+                "total": self.trades_opened,
+                "open": self.trades_opened - len(self.closed_trades),
+                "closed": len(self.closed_trades),
+            },
+            "won": {"total": len(won), "pnl": {"total": math.fsum(won), "max": max(won, default=0.0)}},
+            "lost": {"total": len(lost), "pnl": {"total": math.fsum(lost), "max": min(lost, default=0.0)}},
+            "pnl": {"gross": {"total": total_pnl}, "net": {"total": total_pnl}},
+            **side,
+        }
+
+
+class SymbolRun:
+    """
+    The bar loop of ``run_fast_backtest`` for one instrument, one timestamp
+    at a time: ``step(dt)`` advances every feed with a bar at ``dt``, lets
+    ``broker`` fill what is pending, then acts on the LTF signal.  ``dt``
+    runs through ``bar_times()`` in order; several runs can be interleaved
+    on one clock (portfolio.py) as long as each sees its own in order.
+    Fills go to ``record(dt, kind, price, size)``.  ``intrabar`` (an OHLC
+    finer than the LTF) switches exits to resting stop/target orders
+    resolved on it.
+    """
+
+    def __init__(self, htf, mtf, ltf, broker, record, lot_size=0.02, look_back=1, max_retests=999,
+                 atr_thresh=0.01, trailing_atr_mult=1.0, trade_start_hour=0, trade_end_hour=24, window=50,
+                 core=None, batch=True, atr=None, triggers=None, intrabar=None):
+        if core is None:
+            core = SMCStrategyCore(lot_size=lot_size, look_back=look_back, max_retests=max_retests,
+                                   atr_thresh=atr_thresh, session_only=False)
+        if atr is None:
+            atr = bt_atr(ltf.high, ltf.low, ltf.close)
+        self.core = core
+        self.broker = broker
+        self.record = record
+        self.feeds = (htf, mtf, ltf)
+        self.hours = (ltf.time // 3600) % 24
+        self.ltf_dts = ltf.datetimes()
+        self.batch = batch
+        self.params = dict(atr_thresh=atr_thresh, valid_hours=(trade_start_hour, trade_end_hour),
+                           look_back=look_back)
+        if batch:
+            sig = core.signals_batch(ltf.open, ltf.high, ltf.low, ltf.close, atr, hours=self.hours,
+                                     atr_thresh=atr_thresh, valid_hours=(trade_start_hour, trade_end_hour),
+                                     window=window, triggers=triggers)
+            self.sig_dir, self.sig_stop = sig["signal"].tolist(), sig["stop"].tolist()
+            self.sig_target = sig["target"].tolist()
+        else:
+            self.feeds_dts = [htf.datetimes(), mtf.datetimes(), self.ltf_dts]
+            self.windows = [deque(maxlen=window) for _ in range(3)]
+        self.times = [f.time.tolist() for f in self.feeds]
+        self.sizes = [len(t) for t in self.times]
+        self.htf_open, self.htf_close = htf.open.tolist(), htf.close.tolist()
+        self.ltf_close, self.atr = ltf.close.tolist(), atr.tolist()
+        self.mult = trailing_atr_mult
+        self.subbars = None if intrabar is None else SubBarIndex(ltf, intrabar)
+        self.ptr = [0, 0, 0]
+        self.sl = None
+        self.tp = None
+        self._walked = -1           # last LTF bar resolved on the sub-bars
+        self.steps = 0
+
+    def bar_times(self):
+        """Every timestamp at which one of the feeds has a bar, ascending."""
+        return np.union1d(np.union1d(self.feeds[0].time, self.feeds[1].time), self.feeds[2].time)
+
+    def step(self, dt0):
+        times, ptr, sizes, batch = self.times, self.ptr, self.sizes, self.batch
+        for i in range(3):
+            if ptr[i] < sizes[i] and times[i][ptr[i]] <= dt0:
+                ptr[i] += 1
+                if not batch:
+                    j = ptr[i] - 1
+                    f = self.feeds[i]
+                    self.windows[i].append((self.feeds_dts[i][j], f.open[j], f.high[j], f.low[j], f.close[j]))
+        h = ptr[0] - 1
+        j = ptr[2] - 1
+        broker = self.broker
+
+        entered = None
+        if h >= 0:
+            for size, price in broker.next(times[0][h], self.htf_open[h]):
+                self.record(self.ltf_dts[j] if j >= 0 else None, "buy" if size > 0 else "sell", price, size)
+                entered = times[0][h]
+
+        if self.subbars is not None and j > self._walked:
+            self._walked = j
+            size = broker.position.size
+            if size:
+                hit = self.subbars.first_exit(j, size, self.sl, self.tp, after=entered)
+                if hit is not None:
+                    t, price, _ = hit
+                    filled = broker.fill(-size, t, price)
+                    if filled:
+                        self.record(_EPOCH + datetime.timedelta(seconds=t), "buy" if filled > 0 else "sell",
+                                    price, filled)
+
+        if ptr[2] <= ATR_PERIOD or not ptr[0] or not ptr[1]:
+            return
+        self.steps += 1
+
+        if batch:
+            direction, stop, target = self.sig_dir[j], self.sig_stop[j], self.sig_target[j]
+        else:
+            signal = self.core.on_new_candles(
+                list(self.windows[0]), list(self.windows[1]), list(self.windows[2]), atr_value=self.atr[j],
+                htf_source="htf", hour=int(self.hours[j]), **self.params
+            )
+            direction = {"long": 1, "short": -1}.get(signal["signal"], 0)
+            stop, target = signal.get("stop"), signal.get("target")
+
+        size = broker.position.size
+        if not size:
+            if direction:
+                broker.submit(direction, times[0][h], self.htf_close[h])
+                self.sl = stop
+                self.tp = target
+        elif self.subbars is not None:
+            # trail the resting stop; the sub-bars of the coming bars decide the exit
+            trail = self.atr[j] * self.mult
+            if size > 0:
+                self.sl = max(self.sl, self.ltf_close[j] - trail)
+            else:
+                self.sl = min(self.sl, self.ltf_close[j] + trail)
+        else:
+            close = self.ltf_close[j]
+            sl = self.sl
+            if size > 0:
+                new_stop = max(sl, close - self.atr[j] * self.mult)
+                if new_stop > sl:
+                    self.sl = sl = new_stop
+                if close < sl:
+                    broker.close(times[0][h], self.htf_close[h])
+            else:
+                new_stop = min(sl, close + self.atr[j] * self.mult)
+                if new_stop < sl:
+                    self.sl = sl = new_stop
+                if close > sl:
+                    broker.close(times[0][h], self.htf_close[h])
+
+    def mark(self):
+        """Latest HTF close (the broker's valuation price), None before the first bar."""
+        return self.htf_close[self.ptr[0] - 1] if self.ptr[0] else None
+
+
+def run_fast_backtest(htf, mtf, ltf, lot_size=0.02, look_back=1, max_retests=999, atr_thresh=0.01,
+                      trailing_atr_mult=1.0, trade_start_hour=0, trade_end_hour=24, window=50,
+                      cash=10000.0, core=None, batch=True, atr=None, triggers=None, journal=None,
+                      intrabar=None):
+    """
+    Backtest over ``feeds.OHLC`` columns for the HTF, MTF and LTF feeds.
+    Parameters match SMCBacktraderWrapper's.  ``atr`` and ``triggers``
+    (``SMCStrategyCore.triggers_batch``) may be passed in precomputed, one
+    value per LTF bar, e.g. sliced from a longer history; ``intrabar`` is a
+    finer OHLC feed to resolve stop/target exits on.  Returns a dict
+    with the wrapper-style ``trades`` fill log (empty when a ``journal``
+    takes the fills instead), a TradeAnalyzer-style ``analysis``,
+    ``final_value`` and the number of strategy ``steps``.
+    """
+    broker = FastBroker(cash)
+    trades = []
+    if journal is None:
+        def record(dt, kind, price, size):
+            trades.append({"datetime": dt, "type": kind, "price": price, "size": size})
+    else:
+        record = journal.record
+    run = SymbolRun(htf, mtf, ltf, broker, record, lot_size=lot_size, look_back=look_back,
+                    max_retests=max_retests, atr_thresh=atr_thresh, trailing_atr_mult=trailing_atr_mult,
+                    trade_start_hour=trade_start_hour, trade_end_hour=trade_end_hour, window=window,
+                    core=core, batch=batch, atr=atr, triggers=triggers, intrabar=intrabar)
+    step = run.step
+    for dt in run.bar_times().tolist():
+        step(dt)
+
+    if journal is not None:
+        journal.flush()
+    return {
+        "trades": trades,
+        "analysis": broker.analysis(),
+        "final_value": broker.value(run.htf_close[-1]) if run.sizes[0] else cash,
+        "steps": run.steps,
+    }
+
+
+def run_files(htf_path, mtf_path, ltf_path, fromdate=None, todate=None, intrabar_path=None, **params):
+    feeds = [load_cached(p).between(fromdate, todate) for p in (htf_path, mtf_path, ltf_path)]
+    if intrabar_path:
+        params["intrabar"] = load_cached(intrabar_path).between(fromdate, None)
+    return run_fast_backtest(*feeds, **params)
+
+
+if __name__ == "__main__":
+    import time
+
+    import pandas as pd
+
+    t0 = time.perf_counter()
+    res = run_files("data/EURUSD_H1_bt.csv", "data/EURUSD_M30_bt.csv", "data/EURUSD_M15_bt.csv",
+                    look_back=2, max_retests=2, trailing_atr_mult=1.0, atr_thresh=1.0)
+    elapsed = time.perf_counter() - t0
+    a = res["analysis"]
+    closed = a["total"]["closed"]
+    print(f"Final Portfolio Value: {res['final_value']:.2f}")
+    print(f"Total trades: {closed}")
+    print(f"Won trades: {a['won']['total']}")
+    print(f"Lost trades: {a['lost']['total']}")
+    print(f"Win rate: {(a['won']['total'] / closed * 100) if closed else 0:.2f} %")
+    print(f"{res['steps']} bars in {elapsed:.2f}s")
+    if res["trades"]:
+        pd.DataFrame(res["trades"]).to_csv("trade_log.csv", index=False)
+        print("Trade log exported as trade_log.csv")
@@ -0,0 +1,107 @@
+"""
+Plain-array access to the DATE,TIME,OPEN,HIGH,LOW,CLOSE files in data/.
+
+``load_csv`` returns an ``OHLC`` tuple of NumPy columns: ``time`` holds
+int64 epoch seconds (the file's clock, no timezone shift), the prices are
+float64.
+
+``load_cached`` parses a CSV once into a binary columnar file next to it
+(``.feed_cache/<name>-<sha1>.ohlc``) and memory-maps that on later calls,
+so startup skips the date parsing and concurrent processes share the pages.
+Layout: 8-byte magic, uint64 bar count, then the time, open, high, low and
+close columns back to back (little endian).
+"""
+
+import datetime
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+CACHE_MAGIC = b"SMCOHLC1"
+CACHE_DIRNAME = ".feed_cache"
+_HEADER = len(CACHE_MAGIC) + 8
+
+
+class OHLC(namedtuple("OHLC", "time open high low close")):
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.time)
+
+    def between(self, fromdate=None, todate=None):
+        """Bars with ``fromdate <= time <= todate`` (backtrader's inclusive range)."""
+        lo = 0 if fromdate is None else np.searchsorted(self.time, to_epoch(fromdate), "left")
+        hi = len(self.time) if todate is None else np.searchsorted(self.time, to_epoch(todate), "right")
+        return OHLC(*(col[lo:hi] for col in self))
+
+    def datetimes(self):
+        return self.time.astype("datetime64[s]").astype(datetime.datetime)
+
+
+def to_epoch(dt):
+    if isinstance(dt, (int, np.integer)):
+        return int(dt)
+    return int(np.datetime64(dt, "s").astype(np.int64))
+
+
+def load_csv(path) -> OHLC:
+    with open(path) as f:
+        next(f)  # header
+        rows = [line.rstrip().split(",") for line in f if line.strip()]
+    stamps = np.array([f"{r[0].replace('.', '-')}T{r[1]}" for r in rows], dtype="datetime64[s]")
+    prices = np.array([r[2:6] for r in rows], dtype=np.float64).reshape(-1, 4)
+    return OHLC(
+        stamps.astype(np.int64),
+        prices[:, 0].copy(), prices[:, 1].copy(), prices[:, 2].copy(), prices[:, 3].copy(),
+    )
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(path, cache_dir=None):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}-{file_digest(path)[:16]}.ohlc")
+
+
+def write_cache(ohlc, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(np.uint64(len(ohlc)).astype("<u8").tobytes())
+            f.write(np.ascontiguousarray(ohlc.time, dtype="<i8").tobytes())
+            for col in ohlc[1:]:
+                f.write(np.ascontiguousarray(col, dtype="<f8").tobytes())
+        os.replace(tmp, target)  # atomic: concurrent readers never see a partial file
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def open_cache(target) -> OHLC:
+    raw = np.memmap(target, dtype=np.uint8, mode="r")
+    if bytes(raw[:len(CACHE_MAGIC)]) != CACHE_MAGIC:
+        raise ValueError(f"{target} is not an OHLC cache file")
+    n = int(raw[len(CACHE_MAGIC):_HEADER].view("<u8")[0])
+    cols = [raw[_HEADER + k * n * 8:_HEADER + (k + 1) * n * 8].view("<i8" if k == 0 else "<f8")
+            for k in range(5)]
+    return OHLC(*cols)
+
+
+def load_cached(path, cache_dir=None) -> OHLC:
+    """``load_csv`` through the binary cache, keyed by the CSV's content hash."""
+    target = cache_path(path, cache_dir)
+    if not os.path.exists(target):
+        write_cache(load_csv(path), target)
+    return open_cache(target)
@@ -0,0 +1,84 @@
+"""
+Intrabar exits resolved on a finer feed.
+
+``SubBarIndex(bars, sub)`` maps every strategy bar to the run of finer bars
+(M1, or the 5m file under a 15m strategy) it contains: sub-bars
+``lo[j]:hi[j]`` have ``bars.time[j] <= t < bars.time[j + 1]`` (the last
+bar spans one median bar length).  The index is two ``searchsorted`` calls
+made up front, so resolving a bar later is a lookup plus a walk over its
+few sub-bars, done only while a position is open.
+
+``first_exit`` walks those sub-bars in time order against a resting stop
+and an optional target and reports the first fill:
+
+- a sub-bar that opens through a level fills there at its open (a gap);
+- otherwise a sub-bar that trades through a level fills at the level, and
+  one that trades through both fills at the stop, its path being unknown
+  (the rule smc.labels uses);
+- a bar with no sub-bars (a hole in the finer data) is walked as one
+  sub-bar of its own OHLC.
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+STOP, TARGET = "stop", "target"
+
+
+class SubBarIndex:
+    def __init__(self, bars, sub):
+        bar_time = np.asarray(bars.time, dtype=np.int64)
+        ends = np.empty_like(bar_time)
+        if len(bar_time):
+            ends[:-1] = bar_time[1:]
+            ends[-1] = bar_time[-1] + (int(np.median(np.diff(bar_time))) if len(bar_time) > 1 else 0)
+        self.lo = np.searchsorted(sub.time, bar_time, "left").tolist()
+        self.hi = np.searchsorted(sub.time, ends, "left").tolist()
+        self.time, self.open = sub.time.tolist(), sub.open.tolist()
+        self.high, self.low = sub.high.tolist(), sub.low.tolist()
+        self._bars = (bar_time.tolist(), bars.open.tolist(), bars.high.tolist(), bars.low.tolist())
+
+    def span(self, j):
+        return self.lo[j], self.hi[j]
+
+    def first_exit(self, j, direction, stop, target=None, after=None):
+        """
+        ``(time, price, kind)`` of the first of ``stop`` / ``target`` (kind
+        ``STOP`` / ``TARGET``) that a ``direction`` (1 long, -1 short)
+        position fills inside bar ``j``, or None.  A None or NaN level is
+        not resting; sub-bars before ``after`` (the entry time) are skipped.
+        """
+        lo, hi = self.lo[j], self.hi[j]
+        if lo == hi:
+            time, open_, high, low = ([col[j]] for col in self._bars)
+            lo, hi = 0, 1
+        else:
+            time, open_, high, low = self.time, self.open, self.high, self.low
+            if after is not None:
+                lo = bisect_left(time, after, lo, hi)
+        has_stop = stop is not None and stop == stop
+        has_target = target is not None and target == target
+        if direction > 0:
+            for s in range(lo, hi):
+                o = open_[s]
+                if has_stop and o <= stop:
+                    return time[s], o, STOP
+                if has_target and o >= target:
+                    return time[s], o, TARGET
+                if has_stop and low[s] <= stop:
+                    return time[s], stop, STOP
+                if has_target and high[s] >= target:
+                    return time[s], target, TARGET
+        else:
+            for s in range(lo, hi):
+                o = open_[s]
+                if has_stop and o >= stop:
+                    return time[s], o, STOP
+                if has_target and o <= target:
+                    return time[s], o, TARGET
+                if has_stop and high[s] >= stop:
+                    return time[s], stop, STOP
+                if has_target and low[s] <= target:
+                    return time[s], target, TARGET
+        return None
@@ -0,0 +1,179 @@
+"""
+Streaming trade journals.
+
+Strategies hand every fill to a journal's ``record(dt, kind, price, size)``
+instead of growing a list.  ``MemoryJournal`` keeps the old behaviour (a
+list of dicts); ``TradeJournal`` buffers up to ``batch`` fills in a NumPy
+record array and appends them to a binary file, so memory stays bounded
+and everything up to the last flush survives a crash.
+
+File layout: 8-byte magic, then fixed-size little-endian records
+(int64 epoch seconds, float64 price, float64 size, int8 side with 1 buy /
+-1 sell, int16 tag).  There is no length field - appending is a plain
+write at the end and a torn final record is ignored on read.  Concurrent
+runs each write their own partition (``partition(dir, name)``);
+``merge_partitions`` k-way merges them by time into one journal and
+``export_csv`` writes the classic ``datetime,type,price,size`` trade log,
+both streaming in chunks.
+"""
+
+import csv
+import datetime
+import heapq
+import os
+
+import numpy as np
+
+JOURNAL_MAGIC = b"SMCFILL1"
+RECORD = np.dtype([("time", "<i8"), ("price", "<f8"), ("size", "<f8"), ("side", "i1"), ("tag", "<i2")])
+SUFFIX = ".fills"
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+
+
+class MemoryJournal:
+    """Fills as ``{"datetime", "type", "price", "size"}`` dicts in ``trades``."""
+
+    def __init__(self):
+        self.trades = []
+
+    def record(self, dt, kind, price, size):
+        self.trades.append({"datetime": dt, "type": kind, "price": price, "size": size})
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TradeJournal:
+    def __init__(self, path, batch=4096, mode="a", tag=0):
+        self.path = path
+        self.tag = tag
+        self.count = 0              # fills recorded through this object
+        self._buf = np.zeros(batch, dtype=RECORD)
+        self._n = 0
+        new = mode == "w" or not os.path.exists(path) or not os.path.getsize(path)
+        self._file = open(path, "wb" if mode == "w" else "ab")
+        if new:
+            self._file.write(JOURNAL_MAGIC)
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+                    raise ValueError(f"{path} is not a trade journal")
+            # drop a record torn by an earlier crash so appends stay aligned
+            body = os.path.getsize(path) - len(JOURNAL_MAGIC)
+            if body % RECORD.itemsize:
+                self._file.truncate(len(JOURNAL_MAGIC) + body - body % RECORD.itemsize)
+
+    def record(self, dt, kind, price, size):
+        """Add a fill; ``kind`` is "buy" or "sell", ``dt`` a datetime or epoch seconds."""
+        row = self._buf[self._n]
+        row["time"] = dt if isinstance(dt, (int, np.integer)) else (dt - _EPOCH) // _SECOND
+        row["price"] = price
+        row["size"] = size
+        row["side"] = 1 if kind == "buy" else -1
+        row["tag"] = self.tag
+        self._n += 1
+        self.count += 1
+        if self._n == len(self._buf):
+            self.flush()
+
+    def flush(self):
+        if self._n:
+            self._file.write(self._buf[:self._n].tobytes())
+            self._n = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def partition(directory, name, **kwargs):
+    """A ``TradeJournal`` writing ``<directory>/<name>.fills``."""
+    os.makedirs(directory, exist_ok=True)
+    return TradeJournal(os.path.join(directory, name + SUFFIX), **kwargs)
+
+
+def read_journal(path):
+    """The journal's records as a read-only memory map (empty array if none)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+            raise ValueError(f"{path} is not a trade journal")
+    n = (size - len(JOURNAL_MAGIC)) // RECORD.itemsize
+    if not n:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=len(JOURNAL_MAGIC), shape=(n,))
+
+
+def iter_chunks(path, chunk=65536):
+    records = read_journal(path)
+    for lo in range(0, len(records), chunk):
+        yield np.array(records[lo:lo + chunk])
+
+
+def _rows(path, chunk):
+    for block in iter_chunks(path, chunk):
+        yield from zip(block["time"].tolist(), range(len(block)), [block] * len(block))
+
+
+def merge_partitions(paths, out, chunk=65536):
+    """
+    Merge journals into ``out`` in time order (ties keep partition order),
+    reading ``chunk`` records per partition at a time.  ``paths`` may be a
+    directory of ``*.fills`` partitions.  Returns the number of records.
+    """
+    if isinstance(paths, str):
+        paths = sorted(os.path.join(paths, p) for p in os.listdir(paths) if p.endswith(SUFFIX))
+    streams = [((t, k, i, block) for t, i, block in _rows(p, chunk)) for k, p in enumerate(paths)]
+    total = 0
+    buf = np.zeros(chunk, dtype=RECORD)
+    n = 0
+    with open(out, "wb") as f:
+        f.write(JOURNAL_MAGIC)
+        for _, _, i, block in heapq.merge(*streams, key=lambda r: (r[0], r[1])):
+            buf[n] = block[i]
+            n += 1
+            if n == chunk:
+                f.write(buf.tobytes())
+                total += n
+                n = 0
+        f.write(buf[:n].tobytes())
+    return total + n
+
+
+def export_csv(path, out, chunk=65536):
+    """Write a journal as the ``datetime,type,price,size`` CSV trade log."""
+    with open(out, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["datetime", "type", "price", "size"])
+        for block in iter_chunks(path, chunk):
+            stamps = block["time"].astype("datetime64[s]").astype(str)
+            for stamp, side, price, size in zip(stamps, block["side"].tolist(), block["price"].tolist(),
+                                                block["size"].tolist()):
+                writer.writerow([stamp.replace("T", " "), "buy" if side > 0 else "sell", price,
+                                 int(size) if size.is_integer() else size])
+
+
+def to_frame(path):
+    """A journal as a pandas DataFrame with the trade-log columns plus ``tag``."""
+    import pandas as pd
+
+    records = read_journal(path)
+    return pd.DataFrame({
+        "datetime": records["time"].astype("datetime64[s]"),
+        "type": np.where(records["side"] > 0, "buy", "sell"),
+        "price": records["price"],
+        "size": records["size"],
+        "tag": records["tag"],
+    })
@@ -0,0 +1,546 @@
+"""
+Asyncio live loop for SMCStrategyCore against a MetaTrader5-style API.
+
+The ``mt5`` module is passed in (the real ``MetaTrader5`` package, or any
+object with the same functions), so the loop can run against a fake or a
+replay.  Each timeframe keeps a rolling window of closed bars; after the
+first fill only bars newer than the last one seen are fetched.  The runner
+sleeps until the next LTF bar closes (server time, plus ``grace``) instead
+of polling on fixed sleeps, and every broker call runs on a single-thread
+executor so the event loop never blocks on the terminal.  With
+``resample=True`` only the LTF bars are fetched and the HTF window is
+built from them (smc/resample.py), one broker call per bar instead of two.
+
+``LiveEngine`` trades many symbols from one process and one broker
+connection: each symbol keeps its own LiveRunner (windows, strategy core,
+pending PnL tasks) while the engine owns the clock.  Symbols whose bars
+close at the same server time are woken together and fetched in one
+executor call, and the HTF window is only asked for once its next bar is
+due; all runners share the engine's executor and ``DailyRiskManager``.
+"""
+
+import asyncio
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from smc.detectors import CandleBuffer
+from smc.resample import Resampler
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+# ======= Risk Tools =======
+class DailyRiskManager:
+    def __init__(self, max_loss=20000, profit_target=60000, max_trades=30, today=datetime.date.today, log=print):
+        self.max_loss = max_loss
+        self.profit_target = profit_target
+        self.max_trades = max_trades
+        self.today = today
+        self.log = log
+        self._reset_day()
+
+    def _reset_day(self):
+        self.day = self.today()
+        self.day_pnl = 0
+        self.day_trades = 0
+
+    def update_pnl(self, profit):
+        if self.today() != self.day:
+            self._reset_day()
+        self.day_pnl += profit
+
+    def record_trade(self):
+        if self.today() != self.day:
+            self._reset_day()
+        self.day_trades += 1
+
+    def can_trade(self):
+        if self.today() != self.day:
+            self._reset_day()
+        if self.day_pnl <= -abs(self.max_loss):
+            self.log(f"Max daily loss hit: ${self.day_pnl:.2f}")
+            return False
+        if self.day_pnl >= self.profit_target:
+            self.log(f"Daily profit target reached: ${self.day_pnl:.2f}")
+            return False
+        if self.day_trades >= self.max_trades:
+            self.log(f"Max trades per day reached: {self.day_trades}")
+            return False
+        return True
+
+def calc_dynamic_lot(equity, profit_target, daily_pnl, entry, stop, pip_value=10, min_lot=0.01, max_lot=2.0):
+    # Adjust risk to reach profit target in as few trades as possible
+    to_target = profit_target - daily_pnl
+    if to_target <= 0:
+        return 0.0
+    stop_pips = abs(entry - stop) / 0.1  # 0.1 = 10 pips for gold (adjust if needed)
+    if stop_pips * pip_value == 0:
+        return min_lot
+    lot = to_target / (stop_pips * pip_value * 2)  # risk half (since RR is 1:2, reward is twice risk)
+    lot = max(min_lot, min(lot, max_lot))
+    return round(lot, 2)
+
+def round_price(mt5, price, symbol):
+    info = mt5.symbol_info(symbol)
+    if info is None:
+        return round(price, 2)
+    digits = info.digits
+    return round(price, digits)
+
+def fix_sl_tp_rr(mt5, entry, sl, order_type, min_stop_distance, symbol, rr_ratio=2):
+    """
+    1:2 risk-reward (reward is always exactly twice the risk).
+    Ensures SL/TP are on correct side and min_stop_distance away.
+    """
+    info = mt5.symbol_info(symbol)
+    digits = info.digits if info else 2
+    increment = min_stop_distance * 1.2 if min_stop_distance > 0 else 0.50
+
+    if order_type == mt5.ORDER_TYPE_BUY:
+        # SL below entry, TP above
+        if sl is None or sl >= entry:
+            sl = entry - increment
+        if entry - sl < increment:
+            sl = entry - increment
+        risk = entry - sl
+        tp = entry + risk * rr_ratio
+    else:
+        # SL above entry, TP below
+        if sl is None or sl <= entry:
+            sl = entry + increment
+        if sl - entry < increment:
+            sl = entry + increment
+        risk = sl - entry
+        tp = entry - risk * rr_ratio
+
+    # Enforce minimum distance between sl/tp and entry
+    sl = round(sl, digits)
+    tp = round(tp, digits)
+
+    # Never allow SL and TP to be equal
+    if abs(sl - tp) < increment:
+        if order_type == mt5.ORDER_TYPE_BUY:
+            tp = sl + increment * rr_ratio
+        else:
+            sl = tp + increment * rr_ratio
+
+    return sl, tp
+
+
+def timeframe_seconds(timeframe):
+    """
+    Bar length of an MT5 TIMEFRAME_* constant: plain minutes, hours with
+    0x4000 set, weeks with 0x8000.  Months (0xC000) have no fixed length,
+    so MN1 raises ValueError.
+    """
+    unit, count = timeframe & 0xC000, timeframe & 0x3FFF
+    if unit == 0:
+        return count * 60
+    if unit == 0x4000:
+        return count * 3600
+    if unit == 0x8000:
+        return count * 7 * 86400
+    raise ValueError(f"timeframe {timeframe:#x} is monthly and has no fixed bar length")
+
+
+class BarWindow:
+    """
+    Rolling window of the last ``size`` closed bars of one symbol/timeframe.
+    The first fetch pulls ``history`` bars (at least ``size``); every fresh
+    bar is also handed to ``sink.extend_arrays`` when a sink is given.
+    """
+
+    def __init__(self, symbol, timeframe, size, history=None, sink=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.period = timeframe_seconds(timeframe)
+        self.candles = CandleBuffer(size)
+        self.history = max(size, history or 0)
+        self.sink = sink
+        self.last_time = None       # epoch seconds of the newest bar held
+
+    def fetch(self, mt5):
+        """Pull closed bars newer than ``last_time``; returns how many were added."""
+        size = self.history
+        count = size if self.last_time is None else 2
+        while True:
+            # start_pos=1 skips the bar still forming
+            rates = mt5.copy_rates_from_pos(self.symbol, self.timeframe, 1, count)
+            if rates is None or not len(rates):
+                return 0
+            times = rates["time"]
+            if self.last_time is None or times[0] <= self.last_time or count >= size:
+                break
+            count = min(count * 4, size)   # more bars closed than we asked for: widen
+        fresh = rates[times > self.last_time] if self.last_time is not None else rates
+        if len(fresh):
+            self.candles.extend_arrays(fresh["time"], fresh["open"], fresh["high"], fresh["low"], fresh["close"])
+            if self.sink is not None:
+                self.sink.extend_arrays(fresh["time"], fresh["open"], fresh["high"], fresh["low"], fresh["close"])
+            self.last_time = int(fresh["time"][-1])
+        return len(fresh)
+
+    def next_close(self):
+        """Server epoch second at which the bar after ``last_time`` closes."""
+        return self.last_time + 2 * self.period
+
+
+class LiveRunner:
+    """
+    One symbol's live decision loop: HTF/LTF windows, ``core.on_new_candles``
+    on every closed LTF bar, then the same order flow as smc_live_bot.py.
+    ``sleep`` and ``clock`` default to asyncio.sleep / time.time and can be
+    swapped for a simulated clock.  ``on_decision(bar_time, signal, seconds)``
+    is called after each LTF bar with the wall time from the fetch that
+    found the bar to the end of the decision.  ``resample=True`` builds the
+    HTF window from the LTF bars instead of fetching it (``self.htf`` is
+    then None).
+    """
+
+    def __init__(self, mt5, core, risk_manager, symbol="XAUUSD", htf=None, ltf=None, htf_bars=100,
+                 ltf_bars=100, atr_thresh=0.3, valid_hours=(7, 20), look_back=2, rr_ratio=2,
+                 magic=202405, settle=30.0, grace=1.0, poll=0.5, sleep=None, clock=None, executor=None,
+                 log=print, on_decision=None, resample=False):
+        self.mt5 = mt5
+        self.core = core
+        self.risk = risk_manager
+        self.symbol = symbol
+        htf = mt5.TIMEFRAME_M15 if htf is None else htf
+        ltf = mt5.TIMEFRAME_M5 if ltf is None else ltf
+        self.resampler = None
+        if resample:
+            base, period = timeframe_seconds(ltf), timeframe_seconds(htf)
+            self.resampler = Resampler(base, [period], htf_bars)
+            # enough LTF history on the first fetch to fill the HTF window
+            self.htf = None
+            self.ltf = BarWindow(symbol, ltf, ltf_bars, htf_bars * period // base, self.resampler)
+        else:
+            self.htf = BarWindow(symbol, htf, htf_bars)
+            self.ltf = BarWindow(symbol, ltf, ltf_bars)
+        self.atr_thresh = atr_thresh
+        self.valid_hours = valid_hours
+        self.look_back = look_back
+        self.rr_ratio = rr_ratio
+        self.magic = magic
+        self.settle = settle
+        self.grace = grace
+        self.poll = poll
+        self.sleep = sleep or asyncio.sleep
+        self.clock = clock or time.time
+        self.executor = executor
+        self.log = log
+        self.on_decision = on_decision
+        self.bars = 0
+        self._offset = 0.0          # server clock - local clock
+        self._running = False
+        self._tasks = set()
+        self._bar_seen = 0.0        # perf_counter() when the current bar was fetched
+
+    async def call(self, fn, *args, **kwargs):
+        """Run a blocking broker call on the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def _sync_clock(self):
+        tick = await self.call(self.mt5.symbol_info_tick, self.symbol)
+        if tick is not None:
+            self._offset = tick.time - self.clock()
+
+    def server_now(self):
+        return self.clock() + self._offset
+
+    async def wait_for_bar(self):
+        """Sleep to the next LTF close, then poll until the bar shows up."""
+        await self.sleep(max(0.0, self.ltf.next_close() + self.grace - self.server_now()))
+        delay = self.poll
+        while self._running:
+            self._bar_seen = time.perf_counter()
+            if await self.call(self.ltf.fetch, self.mt5):
+                return True
+            await self.sleep(delay)
+            delay = min(delay * 2, self.ltf.period)   # market closed: back off
+        return False
+
+    async def run(self, max_bars=None):
+        """Trade until ``stop()`` or ``max_bars`` LTF bars have been processed."""
+        own_executor = self.executor is None
+        if own_executor:
+            self.executor = ThreadPoolExecutor(max_workers=1)   # MT5 calls stay serialized
+        self._running = True
+        try:
+            await self._sync_clock()
+            self._bar_seen = time.perf_counter()
+            await self._fetch_htf()
+            await self.call(self.ltf.fetch, self.mt5)
+            if self.ltf.last_time is not None:
+                await self._decide()
+            while self._running and (max_bars is None or self.bars < max_bars):
+                if self.ltf.last_time is None:
+                    await self.sleep(self.ltf.period)
+                    await self.call(self.ltf.fetch, self.mt5)
+                    continue
+                if not await self.wait_for_bar():
+                    break
+                await self._fetch_htf()
+                await self._sync_clock()
+                await self._decide()
+            if self._tasks:
+                await asyncio.gather(*self._tasks)
+        finally:
+            self._running = False
+            if own_executor:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+
+    def stop(self):
+        self._running = False
+
+    async def _fetch_htf(self):
+        if self.htf is not None:
+            await self.call(self.htf.fetch, self.mt5)
+
+    @property
+    def htf_candles(self):
+        return self.resampler.windows[0] if self.htf is None else self.htf.candles
+
+    async def _decide(self):
+        signal = await self.on_bar()
+        if self.on_decision is not None:
+            self.on_decision(self.ltf.last_time, signal, time.perf_counter() - self._bar_seen)
+
+    async def on_bar(self):
+        """Decide on the newest closed LTF bar; returns the signal dict."""
+        self.bars += 1
+        candles_ltf = self.ltf.candles
+        closes = candles_ltf.close
+        if len(closes) < 14:
+            self.log("Waiting for more data...")
+            return {"signal": "flat"}
+        if not self.risk.can_trade():
+            self.log("No trading today due to risk/profit limit.")
+            return {"signal": "flat"}
+        atr = float(np.std(closes[-14:], ddof=1))
+
+        now = candles_ltf[-1][0]
+        signal = self.core.on_new_candles(
+            self.htf_candles, [], candles_ltf,
+            atr_value=atr,
+            atr_thresh=self.atr_thresh,
+            valid_hours=self.valid_hours,
+            look_back=self.look_back,
+            hour=now.hour
+        )
+        self.log(f"{now} | Signal: {signal}")
+
+        if signal.get("signal") in ["long", "short"]:
+            positions = await self.call(self.mt5.positions_get, symbol=self.symbol)
+            if not positions:
+                await self.open_position(signal)
+        return signal
+
+    async def open_position(self, signal):
+        mt5 = self.mt5
+        entry = signal.get("entry")
+        stop = signal.get("stop")
+        if not entry or not stop:
+            self.log("Missing entry/stop for dynamic lot calc, skipping trade.")
+            return None
+
+        info = await self.call(mt5.symbol_info, self.symbol)
+        min_stop_distance = info.trade_stops_level * info.point if info else 0.5
+        order_type = mt5.ORDER_TYPE_BUY if signal["signal"] == "long" else mt5.ORDER_TYPE_SELL
+
+        sl, tp = await self.call(fix_sl_tp_rr, mt5, entry, stop, order_type, min_stop_distance, self.symbol,
+                                 rr_ratio=self.rr_ratio)
+
+        account = await self.call(mt5.account_info)
+        equity = account.equity if account else 10000
+        lot = calc_dynamic_lot(equity, self.risk.profit_target, self.risk.day_pnl, entry, sl)
+        if lot <= 0.0:
+            self.log("Lot size zero: not trading.")
+            return None
+
+        tick = await self.call(mt5.symbol_info_tick, self.symbol)
+        price = tick.ask if order_type == mt5.ORDER_TYPE_BUY else tick.bid
+
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": self.symbol,
+            "volume": lot,
+            "type": order_type,
+            "price": price,
+            "sl": sl,
+            "tp": tp,
+            "deviation": 20,
+            "magic": self.magic,
+            "comment": f"SMC Live {signal['signal'].upper()}",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        res = await self.call(mt5.order_send, request)
+        self.log(f"{signal['signal'].upper()} Order Result: {res}")
+        self.risk.record_trade()
+
+        # Book the closed-trade PnL a little later without holding up the bar loop
+        task = asyncio.ensure_future(self._update_pnl())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return res
+
+    async def _update_pnl(self):
+        await self.sleep(self.settle)
+        now = EPOCH + datetime.timedelta(seconds=int(self.server_now()))
+        deals = await self.call(self.mt5.history_deals_get, now - datetime.timedelta(days=1), now,
+                                group=self.symbol)
+        profits = [d.profit for d in deals or () if d.symbol == self.symbol and d.entry == 1]  # entry==1: closed
+        profit = profits[-1] if profits else 0
+        if profit != 0:
+            self.risk.update_pnl(profit)
+            self.log(f"Updated daily PnL: ${self.risk.day_pnl:.2f}")
+
+
+class LiveEngine:
+    """
+    Many LiveRunners on one clock, one executor and one ``risk_manager``.
+    ``add(symbol, core, **kwargs)`` builds a symbol's runner (``kwargs`` as
+    for LiveRunner).  ``on_decision(symbol, bar_time, signal, seconds)``
+    gets each symbol's decision latency, measured from the start of the
+    batched fetch that found its bar.
+    """
+
+    def __init__(self, mt5, risk_manager, grace=1.0, poll=0.5, sleep=None, clock=None, executor=None, log=print,
+                 on_decision=None):
+        self.mt5 = mt5
+        self.risk = risk_manager
+        self.grace = grace
+        self.poll = poll
+        self.sleep = sleep or asyncio.sleep
+        self.clock = clock or time.time
+        self.executor = executor
+        self.log = log
+        self.on_decision = on_decision
+        self.runners = []
+        self.wakeups = 0            # batched fetches made
+        self._offset = 0.0
+        self._running = False
+
+    def add(self, symbol, core, **kwargs):
+        """Register ``symbol`` traded by ``core``; returns its LiveRunner."""
+        on_decision = None
+        if self.on_decision is not None:
+            on_decision = lambda bar_time, signal, seconds: self.on_decision(symbol, bar_time, signal, seconds)
+        kwargs = {"log": self.log, **kwargs}
+        runner = LiveRunner(self.mt5, core, self.risk, symbol=symbol, sleep=self.sleep, clock=self.clock,
+                            executor=self.executor, on_decision=on_decision, **kwargs)
+        self.runners.append(runner)
+        return runner
+
+    def server_now(self):
+        return self.clock() + self._offset
+
+    async def call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def _sync_clock(self):
+        tick = await self.call(self.mt5.symbol_info_tick, self.runners[0].symbol)
+        if tick is not None:
+            self._offset = tick.time - self.clock()
+            for runner in self.runners:
+                runner._offset = self._offset
+
+    def _fetch(self, runners, now):
+        """Fetch every runner's new LTF bars (and HTF bars once due) in one go; returns the LTF counts."""
+        mt5 = self.mt5
+        counts = []
+        for runner in runners:
+            fresh = runner.ltf.fetch(mt5)
+            htf = runner.htf
+            if htf is not None and (htf.last_time is None or (fresh and now >= htf.next_close())):
+                htf.fetch(mt5)
+            counts.append(fresh)
+        return counts
+
+    async def run(self, max_bars=None, until=None):
+        """
+        Trade every symbol until ``stop()``, or until each has processed
+        ``max_bars`` LTF bars or has no bar left closing by server time
+        ``until``.
+        """
+        own_executor = self.executor is None
+        if own_executor:
+            self.executor = ThreadPoolExecutor(max_workers=1)   # MT5 calls stay serialized
+        for runner in self.runners:
+            runner.executor = self.executor
+            runner._running = True
+        self._running = True
+        try:
+            await self._sync_clock()
+            seen = time.perf_counter()
+            await self.call(self._fetch, self.runners, self.server_now())
+            ready = [r for r in self.runners if r.ltf.last_time is not None]
+            for runner in ready:
+                runner._bar_seen = seen
+            for runner in ready:
+                await runner._decide()
+
+            due = {}                # runner -> server time of its next fetch
+            delay = {}              # runner -> poll back-off while its bar is late
+            for runner in self.runners:
+                if max_bars is None or runner.bars < max_bars:
+                    due[runner] = self._next_fetch(runner)
+            while self._running:
+                if until is not None:
+                    for runner in [r for r, t in due.items() if t - self.grace > until]:
+                        del due[runner]
+                if not due:
+                    break
+                wake = min(due.values())
+                await self.sleep(max(0.0, wake - self.server_now()))
+                batch = [r for r, t in due.items() if t <= wake]
+                seen = time.perf_counter()
+                counts = await self.call(self._fetch, batch, self.server_now())
+                self.wakeups += 1
+                await self._sync_clock()
+                fresh = []
+                for runner, count in zip(batch, counts):
+                    if count:
+                        runner._bar_seen = seen
+                        fresh.append(runner)
+                        delay.pop(runner, None)
+                    else:
+                        # no bar yet (market closed or lagging): back off
+                        wait = delay.get(runner, self.poll)
+                        due[runner] = self.server_now() + wait
+                        delay[runner] = min(wait * 2, runner.ltf.period)
+                # one at a time, so each sees the risk manager as the previous left it
+                for runner in fresh:
+                    await runner._decide()
+                for runner in fresh:
+                    if max_bars is not None and runner.bars >= max_bars:
+                        del due[runner]
+                    else:
+                        due[runner] = self._next_fetch(runner)
+            tasks = [task for runner in self.runners for task in runner._tasks]
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            self._running = False
+            for runner in self.runners:
+                runner._running = False
+            if own_executor:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+                for runner in self.runners:
+                    runner.executor = None
+
+    def stop(self):
+        self._running = False
+
+    def _next_fetch(self, runner):
+        if runner.ltf.last_time is None:
+            return self.server_now() + runner.ltf.period
+        return runner.ltf.next_close() + self.grace
@@ -0,0 +1,154 @@
+"""
+Monte Carlo robustness of a backtest's closed trades.
+
+``trade_pnl`` turns a fill log (the ``datetime,type,price,size`` CSV that
+backtest.py and compare_performance.py write, or a journal ``.fills``
+file) into per-trade PnL: fills add up to a position and a trade closes
+each time it is back to flat.  ``simulate`` replays that PnL ``sims``
+times in random order - ``"shuffle"`` permutes the trades (same final
+equity, different path), ``"bootstrap"`` draws as many trades with
+replacement (the final equity varies too) - and records each path's
+maximum drawdown, lowest equity and final equity.
+
+Paths are built ``batch`` rows at a time as (batch, trades) arrays
+(permute or gather, cumsum, running peak) sized to stay in cache, and the
+simulations are split into fixed chunks of ``CHUNK`` with one spawned seed
+each, spread over a process pool; the same ``seed`` gives the same result
+for any ``jobs``.  ``summarize`` reduces them to percentiles and the
+probability of ruin, i.e. of equity ever falling ``ruin`` (a fraction of
+the starting cash) below it.
+
+    cd smc_bot && python montecarlo.py trade_log.csv --sims 100000 --jobs 8
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from journal import SUFFIX, read_journal
+
+METHODS = ("shuffle", "bootstrap")
+CHUNK = 4096                # simulations per seed / pool task
+BATCH_CELLS = 1 << 17       # trades x paths per array pass
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+RUIN_LEVELS = (0.1, 0.25, 0.5)
+
+
+def load_fills(path):
+    """``(price, size)`` arrays of a trade log CSV or journal, sizes signed (sells negative)."""
+    if path.endswith(SUFFIX):
+        records = read_journal(path)
+        return np.asarray(records["price"], dtype=np.float64), np.asarray(records["size"], dtype=np.float64)
+    fills = pd.read_csv(path, usecols=["price", "size"])
+    return fills["price"].to_numpy(np.float64), fills["size"].to_numpy(np.float64)
+
+
+def trade_pnl(price, size):
+    """PnL of each round trip (flat to flat); a position still open at the end is left out."""
+    price = np.asarray(price, dtype=np.float64)
+    size = np.asarray(size, dtype=np.float64)
+    flat = np.flatnonzero(np.isclose(np.cumsum(size), 0.0, atol=1e-9))
+    if not len(flat):
+        return np.zeros(0)
+    return np.diff(np.cumsum(-price * size)[flat], prepend=0.0)
+
+
+def _paths(pnl, rng, method, rows):
+    if method == "shuffle":
+        return rng.permuted(np.tile(pnl, (rows, 1)), axis=1)
+    if method == "bootstrap":
+        return np.take(pnl, rng.integers(0, len(pnl), (rows, len(pnl))))
+    raise ValueError(f"unknown method {method!r}; expected one of {METHODS}")
+
+
+def simulate_chunk(pnl, sims, seed, method="shuffle", cash=10000.0, batch=None):
+    """``sims`` paths from one seed; returns ``max_dd``, ``max_dd_pct``, ``min_equity``, ``final``."""
+    pnl = np.asarray(pnl, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    out = {name: np.empty(sims) for name in ("max_dd", "max_dd_pct", "min_equity", "final")}
+    if not len(pnl):
+        out["max_dd"][:] = out["max_dd_pct"][:] = 0.0
+        out["min_equity"][:] = out["final"][:] = cash
+        return out
+    batch = batch or max(1, BATCH_CELLS // len(pnl))
+    for lo in range(0, sims, batch):
+        rows = min(batch, sims - lo)
+        hi = lo + rows
+        equity = _paths(pnl, rng, method, rows)
+        equity[:, 0] += cash
+        np.cumsum(equity, axis=1, out=equity)
+        # the starting cash is the first peak: lift the first bar for the scan only
+        first = equity[:, 0].copy()
+        np.maximum(first, cash, out=equity[:, 0])
+        peak = np.maximum.accumulate(equity, axis=1)
+        equity[:, 0] = first
+        out["min_equity"][lo:hi] = np.minimum(equity.min(axis=1), cash)
+        out["final"][lo:hi] = equity[:, -1]
+        out["max_dd_pct"][lo:hi] = 1.0 - (equity / peak).min(axis=1)
+        out["max_dd"][lo:hi] = np.subtract(peak, equity, out=peak).max(axis=1)
+    return out
+
+
+def simulate(pnl, sims=10000, method="shuffle", cash=10000.0, jobs=None, seed=None, batch=None):
+    """
+    ``sims`` Monte Carlo paths of ``pnl`` (see module docstring) with up to
+    ``jobs`` worker processes (1 runs in-process).  Returns the per-path
+    arrays of ``simulate_chunk`` for all paths.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}; expected one of {METHODS}")
+    if sims < 1:
+        raise ValueError(f"sims must be at least 1, got {sims}")
+    pnl = np.asarray(pnl, dtype=np.float64)
+    sizes = [min(CHUNK, sims - lo) for lo in range(0, sims, CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(pnl, n, s, method, cash, batch) for n, s in zip(sizes, seeds)]
+    if jobs == 1 or len(args) <= 1:
+        parts = [simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            parts = list(pool.map(simulate_chunk, *zip(*args)))
+    names = ("max_dd", "max_dd_pct", "min_equity", "final")
+    return {name: np.concatenate([p[name] for p in parts]) for name in names}
+
+
+def summarize(results, cash=10000.0, percentiles=PERCENTILES, ruin_levels=RUIN_LEVELS):
+    """Percentiles of each per-path metric, plus ruin and loss probabilities."""
+    summary = {name: dict(zip((f"p{q}" for q in percentiles), np.percentile(values, percentiles).tolist()))
+               for name, values in results.items()}
+    min_equity = results["min_equity"]
+    summary["ruin"] = {f"{level:.0%}": float(np.mean(min_equity <= cash * (1 - level))) for level in ruin_levels}
+    summary["p_loss"] = float(np.mean(results["final"] < cash))
+    return summary
+
+
+def run_log(path, sims=10000, methods=METHODS, cash=10000.0, jobs=None, seed=None, ruin_levels=RUIN_LEVELS):
+    """``simulate`` + ``summarize`` per method for one trade log; returns {method: summary}."""
+    pnl = trade_pnl(*load_fills(path))
+    return {method: {"trades": len(pnl),
+                     **summarize(simulate(pnl, sims, method, cash, jobs, seed), cash, ruin_levels=ruin_levels)}
+            for method in methods}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("logs", nargs="+", help="trade log CSVs or journal .fills files")
+    parser.add_argument("--sims", type=int, default=10000)
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    parser.add_argument("--cash", type=float, default=10000.0)
+    parser.add_argument("--ruin", type=float, nargs="+", default=list(RUIN_LEVELS),
+                        help="ruin levels as fractions of the starting cash")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for path in args.logs:
+        for method, summary in run_log(path, args.sims, args.methods, args.cash, args.jobs, args.seed,
+                                       args.ruin).items():
+            print(f"\n=== {path} - {method} ({summary['trades']} trades, {args.sims} paths) ===")
+            table = pd.DataFrame({k: v for k, v in summary.items() if isinstance(v, dict) and k != "ruin"}).T
+            print(table.to_string(float_format=lambda x: f"{x:.4f}"))
+            print("P(ruin): " + ", ".join(f"-{k}: {v:.4f}" for k, v in summary["ruin"].items()))
+            print(f"P(final < cash): {summary['p_loss']:.4f}")
@@ -0,0 +1,497 @@
+"""
+Market replay that stands in for the MetaTrader5 module.
+
+``ReplayMT5`` serves the MetaTrader5 functions the live bot uses
+(copy_rates_from_pos, symbol_info, symbol_info_tick, account_info,
+positions_get, order_send, history_deals_get) from feeds.OHLC bars on a
+virtual server clock:
+
+- ``speed=1000`` runs the clock 1000x wall time (``sleep`` divides by it);
+- ``speed=None`` jumps the clock to each wake-up, so a run takes only as
+  long as the decisions themselves.  Every sleeper waits on its own future;
+  the clock wakes the earliest one once no broker call handed to
+  ``executor()`` is in flight and the event loop has gone quiet, so time
+  never moves under a task that is still working.
+
+Market orders fill at the forming bar's open (plus ``spread`` on buys) and
+SL/TP are checked against each bar of the symbol's finest feed as it closes;
+when one bar touches both, the stop wins.
+
+``run_replay`` drives a LiveRunner over a date range and reports
+per-bar decision latency and throughput; ``run_watchlist`` does the same
+for many symbols at once, through one LiveEngine or one LiveRunner task
+per symbol:
+
+    cd smc_bot && python mt5_replay.py --symbol EURUSD --fromdate 2023-01-02 --todate 2023-04-01
+"""
+
+import argparse
+import asyncio
+import datetime
+import functools
+import heapq
+import itertools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from feeds import load_cached, to_epoch
+from live_runner import EPOCH, DailyRiskManager, LiveEngine, LiveRunner, timeframe_seconds
+from smc.SMCStrategyCore import SMCStrategyCore
+
+RATE_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+              ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")]
+
+FEEDS = {
+    "EURUSD": dict(htf=("H1", "data/EURUSD_H1_bt.csv"), ltf=("M15", "data/EURUSD_M15_bt.csv"),
+                   digits=5, contract_size=100000.0, atr_thresh=0.0005),
+    # the bundled "30m" file holds 15m bars
+    "XAUUSD": dict(htf=("M15", "data/XAUUSD_30m_bt.csv"), ltf=("M15", "data/XAUUSD_15m_bt.csv"),
+                   digits=2, contract_size=100.0, atr_thresh=0.3),
+}
+
+
+class ReplayMT5:
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 0x4001
+    TIMEFRAME_H4 = 0x4004
+    TIMEFRAME_D1 = 0x4018
+    TIMEFRAME_W1 = 0x8001
+    TIMEFRAME_MN1 = 0xC001
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    POSITION_TYPE_BUY = 0
+    POSITION_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    DEAL_ENTRY_IN = 0
+    DEAL_ENTRY_OUT = 1
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+
+    def __init__(self, start, speed=None, balance=10000.0):
+        self.speed = speed
+        self.balance = balance
+        self._start = to_epoch(start)
+        self._virtual = float(self._start)
+        self._wall0 = time.monotonic()
+        self._sleepers = []         # (wake-up time, seq, future) heap (speed=None)
+        self._seq = itertools.count()
+        self._busy = 0              # broker calls in flight on executor()
+        self._activity = 0          # bumped by every sleep, call and call completion
+        self._ticking = False       # an _advance chain is scheduled
+        self._symbols = {}
+        self._positions = {}        # ticket -> position namespace
+        self._deals = []
+        self._ticket = 0
+        self._error = (1, "Success")
+        self.rate_calls = 0         # copy_rates_from_pos requests served
+
+    # -- setup --
+    def add_symbol(self, name, bars, digits=2, contract_size=100.0, spread=0.0, stops_level=0):
+        """``bars``: MT5 timeframe -> feeds.OHLC."""
+        finest = min(bars, key=timeframe_seconds)
+        self._symbols[name] = SimpleNamespace(
+            name=name, bars=bars, finest=bars[finest], period=timeframe_seconds(finest),
+            info=SimpleNamespace(name=name, digits=digits, point=10.0 ** -digits, trade_stops_level=stops_level,
+                                 trade_contract_size=contract_size, spread=round(spread * 10 ** digits)),
+            spread=spread,
+        )
+
+    # -- clock --
+    def clock(self):
+        """Virtual server time, epoch seconds."""
+        if self.speed is None:
+            return self._virtual
+        return self._start + (time.monotonic() - self._wall0) * self.speed
+
+    async def sleep(self, seconds):
+        if self.speed is not None:
+            await asyncio.sleep(seconds / self.speed)
+            return
+        # discrete-event clock: the earliest pending wake-up moves it first
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        heapq.heappush(self._sleepers, (self._virtual + max(seconds, 0.0), next(self._seq), fut))
+        self._kick(loop)
+        try:
+            await fut
+        finally:
+            fut.cancel()            # no-op once woken; a cancelled sleeper is skipped by _advance
+
+    def executor(self):
+        """Single-thread executor for the runners' broker calls; the clock waits for each call."""
+        return _ReplayExecutor(self)
+
+    # loop iterations without activity before the clock moves: enough for a
+    # resumed task to reach its next await through a gather or two
+    QUIET = 8
+
+    def _kick(self, loop):
+        self._activity += 1
+        if not self._ticking and not self._busy:
+            self._ticking = True
+            loop.call_soon(self._advance, loop, self._activity, self.QUIET)
+
+    def _advance(self, loop, seen, hops):
+        if self._busy:
+            self._ticking = False   # the call's completion kicks again
+            return
+        if self._activity != seen:
+            loop.call_soon(self._advance, loop, self._activity, self.QUIET)
+            return
+        if hops:
+            loop.call_soon(self._advance, loop, seen, hops - 1)
+            return
+        sleepers = self._sleepers
+        while sleepers and sleepers[0][2].done():
+            heapq.heappop(sleepers)
+        if not sleepers:
+            self._ticking = False
+            return
+        target, _, fut = heapq.heappop(sleepers)
+        self._virtual = max(self._virtual, target)
+        fut.set_result(None)
+        self._activity += 1
+        loop.call_soon(self._advance, loop, self._activity, self.QUIET)
+
+    def _call_started(self):
+        self._busy += 1
+        self._activity += 1
+
+    def _call_done(self, loop):
+        self._busy -= 1
+        self._kick(loop)
+
+    def today(self):
+        return (EPOCH + datetime.timedelta(seconds=int(self.clock()))).date()
+
+    # -- MetaTrader5 API --
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        return True
+
+    def last_error(self):
+        return self._error
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.rate_calls += 1
+        now = self.clock()
+        self._settle(now)
+        sym = self._symbols.get(symbol)
+        if sym is None or timeframe not in sym.bars:
+            self._error = (-2, "Invalid params")
+            return None
+        ohlc = sym.bars[timeframe]
+        # bars opened by now; the newest one is still forming (pos 0)
+        end = int(np.searchsorted(ohlc.time, now, "right")) - start_pos
+        start = max(0, end - count)
+        out = np.zeros(max(0, end - start), dtype=RATE_DTYPE)
+        for name in ("time", "open", "high", "low", "close"):
+            out[name] = getattr(ohlc, name)[start:end]
+        return out
+
+    def symbol_info(self, symbol):
+        sym = self._symbols.get(symbol)
+        return sym.info if sym else None
+
+    def symbol_info_tick(self, symbol):
+        now = self.clock()
+        self._settle(now)
+        sym = self._symbols.get(symbol)
+        if sym is None:
+            return None
+        bid = self._price(sym, now)
+        return SimpleNamespace(time=int(now), bid=bid, ask=bid + sym.spread, last=bid)
+
+    def account_info(self):
+        now = self.clock()
+        self._settle(now)
+        floating = math.fsum(self._profit(p, self._price(self._symbols[p.symbol], now))
+                             for p in self._positions.values())
+        return SimpleNamespace(balance=self.balance, equity=self.balance + floating, profit=floating,
+                               margin=0.0, currency="USD")
+
+    def positions_get(self, symbol=None, ticket=None):
+        self._settle(self.clock())
+        return tuple(p for p in self._positions.values()
+                     if (symbol is None or p.symbol == symbol) and (ticket is None or p.ticket == ticket))
+
+    def order_send(self, request):
+        now = self.clock()
+        self._settle(now)
+        sym = self._symbols.get(request.get("symbol"))
+        if sym is None or request.get("action") != self.TRADE_ACTION_DEAL or request.get("volume", 0) <= 0:
+            return SimpleNamespace(retcode=self.TRADE_RETCODE_INVALID, deal=0, order=0, volume=0.0,
+                                   price=0.0, comment="Invalid request", request=request)
+        bid = self._price(sym, now)
+        is_buy = request["type"] == self.ORDER_TYPE_BUY
+        price = bid + sym.spread if is_buy else bid
+        self._ticket += 1
+        ticket = self._ticket
+
+        closing = self._positions.get(request.get("position"))
+        if closing is not None:
+            self._close(closing, price, now)
+        else:
+            pos = SimpleNamespace(
+                ticket=ticket, symbol=sym.name, type=self.POSITION_TYPE_BUY if is_buy else self.POSITION_TYPE_SELL,
+                volume=request["volume"], price_open=price, sl=request.get("sl") or 0.0, tp=request.get("tp") or 0.0,
+                time=int(now), magic=request.get("magic", 0), comment=request.get("comment", ""), profit=0.0,
+                _bar=max(0, int(np.searchsorted(sym.finest.time, now, "right")) - 1),
+            )
+            self._positions[ticket] = pos
+            self._deal(pos, self.DEAL_ENTRY_IN, price, now, 0.0)
+        return SimpleNamespace(retcode=self.TRADE_RETCODE_DONE, deal=ticket, order=ticket,
+                               volume=request["volume"], price=price, comment="Request executed", request=request)
+
+    def history_deals_get(self, date_from, date_to, group=None):
+        self._settle(self.clock())
+        lo, hi = to_epoch(date_from), to_epoch(date_to)
+        return tuple(d for d in self._deals if lo <= d.time <= hi and (group is None or d.symbol == group))
+
+    # -- simulation --
+    def _price(self, sym, now):
+        ohlc = sym.finest
+        i = int(np.searchsorted(ohlc.time, now, "right")) - 1
+        if i < 0:
+            return float(ohlc.open[0])
+        if now >= ohlc.time[i] + sym.period:    # between bars (gap or end of data)
+            return float(ohlc.close[i])
+        return float(ohlc.open[i])
+
+    def _profit(self, pos, price):
+        sign = 1.0 if pos.type == self.POSITION_TYPE_BUY else -1.0
+        return sign * (price - pos.price_open) * pos.volume * self._symbols[pos.symbol].info.trade_contract_size
+
+    def _settle(self, now):
+        """Close positions whose SL/TP was touched by a bar that has closed by ``now``."""
+        for pos in list(self._positions.values()):
+            sym = self._symbols[pos.symbol]
+            ohlc = sym.finest
+            closed = int(np.searchsorted(ohlc.time, now - sym.period, "right"))
+            long = pos.type == self.POSITION_TYPE_BUY
+            for i in range(pos._bar, closed):
+                high, low = float(ohlc.high[i]), float(ohlc.low[i])
+                stop_hit = pos.sl and (low <= pos.sl if long else high + sym.spread >= pos.sl)
+                target_hit = pos.tp and (high >= pos.tp if long else low + sym.spread <= pos.tp)
+                if stop_hit or target_hit:
+                    self._close(pos, pos.sl if stop_hit else pos.tp, int(ohlc.time[i]) + sym.period)
+                    break
+            else:
+                pos._bar = max(pos._bar, closed)
+
+    def _close(self, pos, price, when):
+        profit = self._profit(pos, price)
+        self.balance += profit
+        del self._positions[pos.ticket]
+        self._deal(pos, self.DEAL_ENTRY_OUT, price, when, profit)
+
+    def _deal(self, pos, entry, price, when, profit):
+        self._ticket += 1
+        long = pos.type == self.POSITION_TYPE_BUY
+        self._deals.append(SimpleNamespace(
+            ticket=self._ticket, order=pos.ticket, position_id=pos.ticket, time=int(when), symbol=pos.symbol,
+            type=(self.ORDER_TYPE_BUY if long else self.ORDER_TYPE_SELL) if entry == self.DEAL_ENTRY_IN
+            else (self.ORDER_TYPE_SELL if long else self.ORDER_TYPE_BUY),
+            entry=entry, volume=pos.volume, price=price, profit=profit, magic=pos.magic,
+        ))
+
+
+class _ReplayExecutor(ThreadPoolExecutor):
+    """Counts the calls in flight so ReplayMT5's clock holds still while one runs."""
+
+    def __init__(self, mt5):
+        super().__init__(max_workers=1)
+        self.mt5 = mt5
+
+    def submit(self, fn, /, *args, **kwargs):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return super().submit(fn, *args, **kwargs)
+        self.mt5._call_started()
+        fut = super().submit(fn, *args, **kwargs)
+        # register after run_in_executor chains its asyncio future to ``fut``, so the
+        # release is queued behind the result and the clock cannot move before the caller resumes
+        loop.call_soon(fut.add_done_callback, lambda f: self._release(loop))
+        return fut
+
+    def _release(self, loop):
+        try:
+            loop.call_soon_threadsafe(self.mt5._call_done, loop)
+        except RuntimeError:
+            pass                    # the run ended while its last call's result was in delivery
+
+
+def _timeframe(mt5, name):
+    return getattr(mt5, f"TIMEFRAME_{name}")
+
+
+def _load(spec, loaded=None):
+    """MT5 timeframe -> OHLC for a FEEDS entry, and its LTF timeframe; ``loaded`` caches by path."""
+    loaded = {} if loaded is None else loaded
+    bars = {}
+    for tf in ("htf", "ltf"):
+        name, path = spec[tf]
+        if path not in loaded:
+            loaded[path] = load_cached(path)
+        bars[_timeframe(ReplayMT5, name)] = loaded[path]
+    return bars, _timeframe(ReplayMT5, spec["ltf"][0])
+
+
+def _start(ltf, period, fromdate, warmup):
+    """Server time just after the close of LTF bar ``warmup`` (from ``fromdate``), so the windows begin full."""
+    first = ltf.time[0] if fromdate is None else to_epoch(fromdate)
+    i0 = max(int(np.searchsorted(ltf.time, first, "left")), warmup)
+    return int(ltf.time[i0]) + period + 1
+
+
+def _bar_count(ltf, period, start, last):
+    """LTF bars a runner decides on from ``start`` to ``last``: the first fill, then every close."""
+    closes = ltf.time + period
+    return int(np.searchsorted(closes, last, "right") - np.searchsorted(closes, start, "right")) + 1
+
+
+def run_replay(symbol="EURUSD", fromdate=None, todate=None, speed=None, feeds=None, warmup=100,
+               core=None, log=None, **runner_kwargs):
+    """
+    Replay ``symbol`` from ``fromdate`` to ``todate`` through a LiveRunner.
+    Returns a dict with the decision ``latencies`` (seconds per bar), bar and
+    order counts, wall/virtual durations, deals and the final balance.
+    """
+    spec = (feeds or FEEDS)[symbol]
+    bars, ltf_tf = _load(spec)
+    ltf = bars[ltf_tf]
+    period = timeframe_seconds(ltf_tf)
+
+    start = _start(ltf, period, fromdate, warmup)
+    last = int(ltf.time[-1]) if todate is None else to_epoch(todate)
+    n_bars = _bar_count(ltf, period, start, last)
+
+    mt5 = ReplayMT5(start, speed=speed)
+    mt5.add_symbol(symbol, bars, digits=spec.get("digits", 2), contract_size=spec.get("contract_size", 100.0),
+                   spread=spec.get("spread", 0.0))
+    core = core or SMCStrategyCore(lot_size=0.1, look_back=2, max_retests=8, atr_thresh=0.01)
+    latencies = []
+    log = log or (lambda msg: None)
+    runner_kwargs.setdefault("atr_thresh", spec.get("atr_thresh", 0.3))
+    runner = LiveRunner(mt5, core, DailyRiskManager(today=mt5.today, log=log), symbol=symbol,
+                        htf=_timeframe(mt5, spec["htf"][0]), ltf=ltf_tf, sleep=mt5.sleep, clock=mt5.clock,
+                        executor=mt5.executor(), log=log,
+                        on_decision=lambda bar_time, signal, seconds: latencies.append(seconds),
+                        **runner_kwargs)
+
+    t0 = time.perf_counter()
+    with runner.executor:
+        asyncio.run(runner.run(max_bars=max(n_bars, 1)))
+    wall = time.perf_counter() - t0
+    return {
+        "latencies": latencies,
+        "bars": runner.bars,
+        "orders": sum(1 for d in mt5._deals if d.entry == mt5.DEAL_ENTRY_IN),
+        "deals": list(mt5._deals),
+        "balance": mt5.balance,
+        "wall_s": wall,
+        "virtual_s": mt5.clock() - start,
+    }
+
+
+def run_watchlist(watchlist, fromdate=None, todate=None, speed=None, warmup=100, engine=True, core=None,
+                  log=None, risk=None, **runner_kwargs):
+    """
+    Replay ``watchlist`` (``(name, spec)`` pairs, ``spec`` a FEEDS entry)
+    on one ReplayMT5 from ``fromdate`` to ``todate``, every symbol with its
+    own ``core()`` (default: a fresh SMCStrategyCore) and all sharing one
+    DailyRiskManager (``risk`` overrides its keyword arguments).  With
+    ``engine=True`` one LiveEngine trades them all; otherwise every symbol
+    runs its own LiveRunner task, as separate bots would.  Returns the
+    per-symbol ``latencies`` and ``bars``, ``orders``, ``rate_calls``, the
+    engine's batched ``wakeups`` (None without it), ``wall_s``,
+    ``virtual_s`` and the final ``balance``.
+    """
+    loaded = {}
+    specs = [(name, spec, *_load(spec, loaded)) for name, spec in watchlist]
+    start = max(_start(bars[ltf_tf], timeframe_seconds(ltf_tf), fromdate, warmup)
+                for _, _, bars, ltf_tf in specs)
+    mt5 = ReplayMT5(start, speed=speed)
+    for name, spec, bars, _ in specs:
+        mt5.add_symbol(name, bars, digits=spec.get("digits", 2), contract_size=spec.get("contract_size", 100.0),
+                       spread=spec.get("spread", 0.0))
+    core = core or (lambda: SMCStrategyCore(lot_size=0.1, look_back=2, max_retests=8, atr_thresh=0.01))
+    log = log or (lambda msg: None)
+    risk = DailyRiskManager(today=mt5.today, log=log, **(risk or {}))
+    latencies = {name: [] for name, _ in watchlist}
+
+    def record(symbol, bar_time, signal, seconds):
+        latencies[symbol].append(seconds)
+
+    runners = []
+    executor = mt5.executor()
+    if engine:
+        live = LiveEngine(mt5, risk, sleep=mt5.sleep, clock=mt5.clock, executor=executor, log=log,
+                          on_decision=record)
+    for name, spec, bars, ltf_tf in specs:
+        kwargs = {"atr_thresh": spec.get("atr_thresh", 0.3), **runner_kwargs,
+                  "htf": _timeframe(mt5, spec["htf"][0]), "ltf": ltf_tf}
+        if engine:
+            runners.append(live.add(name, core(), **kwargs))
+        else:
+            on_decision = functools.partial(record, name)
+            runners.append(LiveRunner(mt5, core(), risk, symbol=name, sleep=mt5.sleep, clock=mt5.clock,
+                                      executor=executor, log=log, on_decision=on_decision, **kwargs))
+    last = (max(int(bars[ltf_tf].time[-1]) for _, _, bars, ltf_tf in specs) if todate is None
+            else to_epoch(todate))
+
+    async def separate():
+        await asyncio.gather(*(
+            runner.run(max_bars=max(_bar_count(bars[ltf_tf], timeframe_seconds(ltf_tf), start, last), 1))
+            for runner, (_, _, bars, ltf_tf) in zip(runners, specs)))
+
+    t0 = time.perf_counter()
+    with executor:
+        asyncio.run(live.run(until=last) if engine else separate())
+    wall = time.perf_counter() - t0
+    return {
+        "latencies": latencies,
+        "bars": {runner.symbol: runner.bars for runner in runners},
+        "orders": sum(1 for d in mt5._deals if d.entry == mt5.DEAL_ENTRY_IN),
+        "rate_calls": mt5.rate_calls,
+        "wakeups": live.wakeups if engine else None,
+        "balance": mt5.balance,
+        "wall_s": wall,
+        "virtual_s": mt5.clock() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbol", default="EURUSD", choices=list(FEEDS))
+    parser.add_argument("--fromdate", type=datetime.datetime.fromisoformat, default=None)
+    parser.add_argument("--todate", type=datetime.datetime.fromisoformat, default=None)
+    parser.add_argument("--speed", type=float, default=None, help="clock multiplier, e.g. 1000 (default: as fast as possible)")
+    parser.add_argument("--verbose", action="store_true", help="print every signal")
+    args = parser.parse_args()
+
+    res = run_replay(args.symbol, args.fromdate, args.todate, speed=args.speed,
+                     log=print if args.verbose else None)
+    lat = np.array(res["latencies"]) * 1e3
+    print(f"{args.symbol}: {res['bars']} bars, {res['orders']} orders, balance {res['balance']:.2f}")
+    print(f"replayed {res['virtual_s'] / 86400:.1f} days in {res['wall_s']:.2f}s "
+          f"({res['bars'] / res['wall_s']:.0f} bars/s)")
+    if len(lat):
+        print(f"decision latency ms: p50 {np.percentile(lat, 50):.3f} | p90 {np.percentile(lat, 90):.3f} | "
+              f"p99 {np.percentile(lat, 99):.3f} | max {lat.max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Portfolio backtest: many symbols on one clock, one cash account.
+
+Every symbol gets its own SMCStrategyCore, position book and
+``fast_backtest.SymbolRun`` (signals precomputed per symbol as in the
+single-symbol engine); the cash is shared.  The symbols' bar times are
+merged lazily with ``heapq.merge`` over one ``(time, symbol)`` stream per
+symbol - nothing is concatenated into one frame - so bars with the same
+timestamp step in watchlist order and each fill moves the cash the next
+symbol's orders are checked against (BackBroker's submission and
+execution checks, against the shared account).  ``max_open`` caps how many
+symbols may hold or await a position at once; entries over it are dropped
+and counted in ``skipped``.
+
+Equity is marked after every timestamp as the cash plus each open position
+at its symbol's last HTF close, so the drawdown is the portfolio's as it
+happened, correlations included, not a sum of per-symbol drawdowns.
+
+    cd smc_bot && python portfolio.py --symbols EURUSD XAUUSD --max-open 1
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+
+import numpy as np
+
+from fast_backtest import FastBroker, SymbolRun
+from feeds import load_cached
+from journal import partition
+
+
+class Account:
+    """Cash shared by every symbol's broker, plus the open-position cap."""
+
+    def __init__(self, cash=10000.0, max_open=None):
+        self.cash = cash
+        self.max_open = max_open
+        self.brokers = []
+        self.skipped = 0
+
+    def busy(self):
+        """Symbols holding a position or with orders not yet filled."""
+        return sum(1 for b in self.brokers if b.position.size or b.pending or b.submitted)
+
+
+class SharedCashBroker(FastBroker):
+    """FastBroker booking its cash on an ``Account``."""
+
+    def __init__(self, account):
+        self.account = account
+        super().__init__(account.cash)
+        account.brokers.append(self)
+
+    @property
+    def cash(self):
+        return self.account.cash
+
+    @cash.setter
+    def cash(self, value):
+        self.account.cash = value
+
+    def submit(self, size, dt, price):
+        account = self.account
+        if (account.max_open is not None and not (self.position.size or self.pending or self.submitted)
+                and account.busy() >= account.max_open):
+            account.skipped += 1
+            return
+        super().submit(size, dt, price)
+
+
+def drawdown(values, cash):
+    """Largest peak-to-trough drop of an equity curve (absolute and fraction), cash as first peak."""
+    if not len(values):
+        return 0.0, 0.0
+    peak = np.maximum(np.maximum.accumulate(values), cash)
+    return float((peak - values).max()), float((1.0 - values / peak).max())
+
+
+def run_portfolio(watchlist, params=None, cash=10000.0, max_open=None, fromdate=None, todate=None,
+                  journal_dir=None):
+    """
+    Backtest ``watchlist`` (dicts with ``name`` and ``htf``/``mtf``/``ltf``
+    file paths, optionally an ``intrabar`` file path to resolve exits on and
+    ``params`` overriding the shared ``params``)
+    as one portfolio.  Fills go to ``trades`` (with a ``symbol`` key) or,
+    with ``journal_dir``, to per-symbol journal partitions tagged with the
+    watchlist position.  Returns ``final_value``, ``max_drawdown``,
+    ``max_drawdown_pct``, the ``equity`` curve as (times, values) arrays,
+    per-symbol ``symbols`` results, ``trades``, ``skipped`` and ``steps``.
+    """
+    account = Account(cash, max_open)
+    runs, journals, trades = [], [], []
+    loaded = {}                 # path -> OHLC: a file shared by symbols or timeframes is mapped once
+    try:
+        for k, sym in enumerate(watchlist):
+            feeds = []
+            for tf in ("htf", "mtf", "ltf"):
+                if sym[tf] not in loaded:
+                    loaded[sym[tf]] = load_cached(sym[tf]).between(fromdate, todate)
+                feeds.append(loaded[sym[tf]])
+            extra = {}
+            if sym.get("intrabar"):
+                extra["intrabar"] = load_cached(sym["intrabar"]).between(fromdate, None)
+            if journal_dir:
+                journal = partition(journal_dir, sym["name"], mode="w", tag=k)
+                journals.append(journal)
+                record = journal.record
+            else:
+                record = _recorder(trades, sym["name"])
+            runs.append(SymbolRun(*feeds, SharedCashBroker(account), record,
+                                  **{**(params or {}), **sym.get("params", {}), **extra}))
+
+        streams = [zip(run.bar_times().tolist(), itertools.repeat(k)) for k, run in enumerate(runs)]
+        steps = [run.step for run in runs]
+        times, values = [], []
+        last = None
+        for t, k in heapq.merge(*streams):
+            if t != last:
+                if last is not None:
+                    times.append(last)
+                    values.append(_value(account, runs))
+                last = t
+            steps[k](t)
+        if last is not None:
+            times.append(last)
+            values.append(_value(account, runs))
+    finally:
+        for journal in journals:
+            journal.close()
+
+    values = np.array(values, dtype=np.float64)
+    max_dd, max_dd_pct = drawdown(values, cash)
+    return {
+        "final_value": float(values[-1]) if len(values) else cash,
+        "max_drawdown": max_dd,
+        "max_drawdown_pct": max_dd_pct,
+        "equity": (np.array(times, dtype=np.int64), values),
+        "symbols": {sym["name"]: {"analysis": run.broker.analysis(), "steps": run.steps}
+                    for sym, run in zip(watchlist, runs)},
+        "trades": trades,
+        "skipped": account.skipped,
+        "steps": sum(run.steps for run in runs),
+    }
+
+
+def _recorder(trades, name):
+    def record(dt, kind, price, size):
+        trades.append({"symbol": name, "datetime": dt, "type": kind, "price": price, "size": size})
+    return record
+
+
+def _value(account, runs):
+    return account.cash + sum(run.broker.position.size * run.mark() for run in runs if run.broker.position.size)
+
+
+if __name__ == "__main__":
+    import time
+
+    from compare_performance import symbols
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbols", nargs="*", default=None, help="names from the watchlist (default: all)")
+    parser.add_argument("--cash", type=float, default=10000.0)
+    parser.add_argument("--max-open", type=int, default=None, help="symbols in a position at once")
+    parser.add_argument("--journal-dir", default=None, help="stream fills to per-symbol journals here")
+    args = parser.parse_args()
+
+    watchlist = []
+    for sym in symbols:
+        if args.symbols is None or sym["name"] in args.symbols:
+            missing = [sym[tf] for tf in ("htf", "mtf", "ltf") if not os.path.exists(sym[tf])]
+            if missing:
+                print(f"{sym['name']} - skipped, missing {', '.join(missing)}")
+            else:
+                watchlist.append(sym)
+    t0 = time.perf_counter()
+    res = run_portfolio(watchlist, dict(look_back=2, max_retests=8, trailing_atr_mult=1.0, atr_thresh=0.3),
+                        cash=args.cash, max_open=args.max_open, journal_dir=args.journal_dir)
+    elapsed = time.perf_counter() - t0
+    for name, sym in res["symbols"].items():
+        a = sym["analysis"]
+        print(f"{name}: {a['total']['closed']} trades, pnl {a['pnl']['net']['total']:.2f}")
+    print(f"Final Portfolio Value: {res['final_value']:.2f}")
+    print(f"Max drawdown: {res['max_drawdown']:.2f} ({res['max_drawdown_pct'] * 100:.2f} %)")
+    print(f"Entries skipped by --max-open: {res['skipped']}")
+    print(f"{res['steps']} bars in {elapsed:.2f}s")
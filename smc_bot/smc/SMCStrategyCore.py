@@ -7,12 +7,35 @@ Ultra-High-Frequency Smart Money Concept (SMC) Strategy Core
 - High trade count, designed for robust statistical backtests and strategy discovery
 """
 
+import numpy as np
+
 from smc.detectors import (
-    detect_bos, detect_choch, detect_orderblock, detect_fvg, liquidity_sweep, Candle
+    detect_bos, detect_choch, CandleBuffer
+)
+from smc.vectorized import (
+    detect_bos_batch, detect_choch_batch, detect_orderblock_batch, detect_fvg_batch,
+    rolling_max, rolling_min, BULL, BEAR, NONE
 )
+from smc.instrument import call_plain
+from smc.scanner import SignalScanner
+
+
+def _last_time(candles):
+    if not len(candles):
+        return None
+    if isinstance(candles, CandleBuffer):
+        return int(candles.time[-1])
+    return candles[-1][0]
+
+
+def _fvg_side(fvg):
+    side = fvg.get("side") if fvg else None
+    return BULL if side == "bull" else BEAR if side == "bear" else NONE
+
 
 class SMCStrategyCore:
-    def __init__(self, lot_size=0.02, look_back=1, max_retests=999, atr_thresh=0.01, session_only=False):
+    def __init__(self, lot_size=0.02, look_back=1, max_retests=999, atr_thresh=0.01, session_only=False,
+                 stats=None, cache_htf=True, scanner=None):
         self.lot_size = lot_size
         self.look_back = look_back
         self.state = "flat"
@@ -21,6 +44,14 @@ class SMCStrategyCore:
         self.max_retests = max_retests
         self.atr_thresh = atr_thresh
         self.session_only = session_only
+        self.stats = stats          # smc.instrument.DetectorStats, or None for no instrumentation
+        self.scanner = scanner or SignalScanner(look_back=look_back)
+        # HTF bias memo: recomputed only when the HTF window's last closed bar changes
+        self.cache_htf = cache_htf
+        self._htf_key = None
+        self._htf_bias = None
+        self.htf_hits = 0
+        self.htf_misses = 0
 
     def get_htf_bias(self, htf_candles, look_back):
         # Loosest: Accept any bias or both sides (for more trades)
@@ -30,6 +61,27 @@ class SMCStrategyCore:
             return "bear"
         return None  # or random.choice(["bull", "bear"]) for real chaos!
 
+    def htf_bias(self, htf_candles, look_back):
+        """
+        ``get_htf_bias`` memoized on the timestamp of the window's last
+        closed bar (plus window length and look_back), so it runs once per
+        new HTF bar rather than once per LTF bar.
+        """
+        key = (_last_time(htf_candles), len(htf_candles), look_back)
+        if self.cache_htf and key == self._htf_key:
+            self.htf_hits += 1
+            return self._htf_bias
+        self.htf_misses += 1
+        run = call_plain if self.stats is None else self.stats.call
+        self._htf_bias = run("htf_bias", self.get_htf_bias, htf_candles, look_back)
+        self._htf_key = key
+        return self._htf_bias
+
+    def htf_cache_info(self):
+        calls = self.htf_hits + self.htf_misses
+        return {"hits": self.htf_hits, "misses": self.htf_misses,
+                "hit_rate": self.htf_hits / calls if calls else 0.0}
+
     def get_entry(self, candles_ltf, bias, htf_ok, atr_value, atr_thresh=0.01, asian_levels=None, hour=12):
         # Ultra-loose: ignore ATR/session unless forced
         if self.session_only and not (7 <= hour < 20):
@@ -37,58 +89,48 @@ class SMCStrategyCore:
         if atr_value < atr_thresh:
             return {"signal": "flat"}
 
-        # --- Trigger ALL SMC entries ---
-        triggers = []
-        ob_bull = detect_orderblock(candles_ltf, "bull")
-        ob_bear = detect_orderblock(candles_ltf, "bear")
-        fvg_bull = detect_fvg(candles_ltf)
-        bos_bull = detect_bos(candles_ltf, self.look_back)
-        choch_bear = detect_choch(candles_ltf, self.look_back)
-        # Bulls
-        if ob_bull:
-            triggers.append("OB_bull")
-        if fvg_bull and fvg_bull.get("side") == "bull":
-            triggers.append("FVG_bull")
-        if bos_bull:
-            triggers.append("BOS")
-        # Bears
-        if ob_bear:
-            triggers.append("OB_bear")
-        if fvg_bull and fvg_bull.get("side") == "bear":
-            triggers.append("FVG_bear")
-        if choch_bear:
-            triggers.append("CHoCH")
-
-        if triggers:
-            # Choose direction based on triggers present
-            is_bull = any(t for t in triggers if "bull" in t or t == "BOS")
-            is_bear = any(t for t in triggers if "bear" in t or t == "CHoCH")
-            # If both present, take both directions (or prioritize bull for this example)
-            if is_bull:
-                direction = "long"
-                entry = candles_ltf[-1][3]  # Close price
-                # Use low of last 5 bars as stop
-                stop = min([c[2] for c in candles_ltf[-5:]])
-                target = entry + 1 * (entry - stop)
-            elif is_bear:
-                direction = "short"
-                entry = candles_ltf[-1][3]
-                # Use high of last 5 bars as stop
-                stop = max([c[1] for c in candles_ltf[-5:]])
-                target = entry - 1 * (stop - entry)
-            else:
-                # Failsafe: no clear direction
-                return {"signal": "flat"}
-
-            # Allow infinite retests for ultra-frequency (remove retest logic for max signals)
-            return {
-                "signal": direction,
-                "entry": entry,
-                "stop": stop,
-                "target": target,
-                "zone_type": ",".join(triggers)
-            }
-        return {"signal": "flat"}
+        # --- Trigger ALL SMC entries (one scan of the window) ---
+        run = call_plain if self.stats is None else self.stats.call
+        scan = self.scanner.scan(candles_ltf, run)
+        fvg = scan["fvg"]
+        bull, bear = [], []
+        if scan["orderblock_bull"]:
+            bull.append("OB_bull")
+        if fvg and fvg.get("side") == "bull":
+            bull.append("FVG_bull")
+        if scan["bos"]:
+            bull.append("BOS")
+        if scan["orderblock_bear"]:
+            bear.append("OB_bear")
+        if fvg and fvg.get("side") == "bear":
+            bear.append("FVG_bear")
+        if scan["choch"]:
+            bear.append("CHoCH")
+        for name, side in self.scanner.triggers:
+            if scan[name]:
+                (bull if side == "bull" else bear).append(name)
+
+        if not bull and not bear:
+            return {"signal": "flat"}
+        # Bull triggers take priority when both sides fire
+        entry = scan["entry"]  # c[3] of the last bar
+        if bull:
+            direction = "long"
+            stop = scan["stop_long"]  # lowest c[2] of the last 5 bars
+            target = entry + 1 * (entry - stop)
+        else:
+            direction = "short"
+            stop = scan["stop_short"]  # highest c[1] of the last 5 bars
+            target = entry - 1 * (stop - entry)
+
+        # Allow infinite retests for ultra-frequency (remove retest logic for max signals)
+        return {
+            "signal": direction,
+            "entry": entry,
+            "stop": stop,
+            "target": target,
+            "zone_type": ",".join(bull + bear)
+        }
 
     def on_new_candles(self, candles_htf, candles_mtf, candles_ltf, atr_value=1.0, atr_thresh=0.01,
                        valid_hours=(0, 24), htf_source="htf", look_back=1, asian_levels=None, hour=None):
@@ -97,8 +139,86 @@ class SMCStrategyCore:
             hour = 12  # default noon if no hour info
         if self.session_only and not (valid_hours[0] <= hour < valid_hours[1]):
             return {"signal": "flat"}
-        bias_htf = self.get_htf_bias(candles_htf, look_back)
+        bias_htf = self.htf_bias(candles_htf, look_back)
         htf_ok = bias_htf is not None
         return self.get_entry(
             candles_ltf, bias_htf, htf_ok, atr_value, atr_thresh=atr_thresh, asian_levels=asian_levels, hour=hour
         )
+
+    def triggers_batch(self, open_, high, low, close, window=50):
+        """
+        The detector half of ``signals_batch``: per-bar ``bull`` / ``bear``
+        trigger flags plus ``entry``, ``stop_long`` and ``stop_short`` for
+        the trailing ``window`` candles.  None of it depends on the ATR or
+        session filters, so it can be computed once and reused across
+        parameter sets and sub-ranges.  The detector settings come from the
+        scanner ``get_entry`` reads, and plugin triggers registered on it
+        are ORed into their side, as ``get_entry`` does.
+        """
+        scanner = self.scanner
+        cols = (open_, high, low, close)
+
+        def flags(name, batch):
+            # a replaced built-in runs its own batch form, or its fn per window
+            if scanner.replaced(name):
+                return scanner.batch_flags(name, *cols, window)
+            return batch()
+
+        ob_bull = flags("orderblock_bull", lambda: detect_orderblock_batch(
+            *cols, "bull", depth=scanner.ob_depth, window=window)["idx"] >= 0)
+        ob_bear = flags("orderblock_bear", lambda: detect_orderblock_batch(
+            *cols, "bear", depth=scanner.ob_depth, window=window)["idx"] >= 0)
+        if scanner.replaced("fvg"):
+            fvg_side = scanner.batch_values("fvg", *cols, window, value=_fvg_side)
+        else:
+            fvg_side = detect_fvg_batch(high, low, scanner.fvg_lookback, window)["side"]
+        bos = flags("bos", lambda: detect_bos_batch(high, low, close, scanner.look_back, window))
+        choch = flags("choch", lambda: detect_choch_batch(low, close, scanner.look_back, window))
+        # Same tuple slots as get_entry: entry from c[3], stops from c[2] / c[1]
+        k = min(scanner.stop_bars, window)
+        bull = ob_bull | (fvg_side == BULL) | bos
+        bear = ob_bear | (fvg_side == BEAR) | choch
+        for name, side in scanner.triggers:
+            trig = scanner.batch_flags(name, *cols, window)
+            if side == "bull":
+                bull = bull | trig
+            else:
+                bear = bear | trig
+        return {
+            "bull": bull,
+            "bear": bear,
+            "entry": np.asarray(low, dtype=np.float64),
+            "stop_long": rolling_min(high, k),
+            "stop_short": rolling_max(open_, k),
+        }
+
+    def signals_batch(self, open_, high, low, close, atr, hours=None, atr_thresh=0.01,
+                      valid_hours=(0, 24), window=50, triggers=None):
+        """
+        Vectorized ``on_new_candles`` over a whole LTF history.  Bar ``t`` gets
+        the signal for the trailing ``window`` candles ending at ``t``; the HTF
+        bias does not feed into ``get_entry`` so only LTF columns are needed.
+        ``triggers`` may carry a precomputed ``triggers_batch`` for the same
+        bars, in which case the OHLC columns are not read.  Returns arrays
+        ``signal`` (1 long, -1 short, 0 flat), ``entry``, ``stop`` and
+        ``target``.
+        """
+        if triggers is None:
+            triggers = self.triggers_batch(open_, high, low, close, window)
+        entry = triggers["entry"]
+        n = len(entry)
+
+        active = ~(np.asarray(atr, dtype=np.float64) < atr_thresh)
+        if self.session_only:
+            hour = np.full(n, 12) if hours is None else np.asarray(hours)
+            active &= (valid_hours[0] <= hour) & (hour < valid_hours[1]) & (7 <= hour) & (hour < 20)
+        is_bull = active & triggers["bull"]
+        is_bear = active & ~is_bull & triggers["bear"]
+
+        stop = np.where(is_bull, triggers["stop_long"], triggers["stop_short"])
+        target = np.where(is_bull, entry + 1 * (entry - stop), entry - 1 * (stop - entry))
+        signal = np.where(is_bull, 1, np.where(is_bear, -1, 0)).astype(np.int8)
+        flat = signal == 0
+        stop[flat] = np.nan
+        target[flat] = np.nan
+        return {"signal": signal, "entry": np.where(flat, np.nan, entry), "stop": stop, "target": target}
@@ -1,10 +1,209 @@
+import datetime
 from typing import List, Tuple, Literal, Optional
 
+import numpy as np
+
+from smc.rolling import RollingMax, RollingMin
+
 # Candle: (datetime, open, high, low, close)
 Candle = Tuple           # (datetime, open, high, low, close)
 Side   = Literal["bull", "bear"]
 
+EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+
+
+def to_epoch(t) -> int:
+    """Epoch seconds of a candle time: datetime/Timestamp, datetime64, int or 'YYYY.MM.DD HH:MM[:SS]'."""
+    if isinstance(t, datetime.datetime):
+        if t.tzinfo is not None:
+            t = t.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return (t - EPOCH) // _SECOND
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    if isinstance(t, str):
+        t = t.replace(".", "-").replace(" ", "T")
+    return int(np.datetime64(t, "s").astype(np.int64))
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity candle window in typed arrays: int64 epoch seconds plus
+    float64 open/high/low/close.  ``append`` is O(1) (the newest
+    ``capacity`` bars are kept), ``buf.high`` etc. are contiguous views of
+    the current window and slicing returns a view buffer, not a copy.  It
+    reads like a list of candles - ``buf[-1]`` is a
+    ``(datetime, open, high, low, close)`` tuple - and every detector here
+    takes it in place of a list.
+    """
+
+    __slots__ = ("capacity", "_time", "_ohlc", "_start", "_stop", "_fixed", "_trackers")
+    _ROWS = {"open": 0, "high": 1, "low": 2, "close": 3}
+
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        # twice the capacity so the window stays contiguous; it is compacted
+        # once every ``capacity`` appends
+        self._time = np.empty(2 * capacity, dtype=np.int64)
+        self._ohlc = np.empty((4, 2 * capacity), dtype=np.float64)   # open, high, low, close rows
+        self._start = 0
+        self._stop = 0
+        self._fixed = False         # views from slicing are read-only windows
+        self._trackers = None       # (row, window, kind, skip) -> RollingMax/RollingMin
+
+    @classmethod
+    def from_candles(cls, candles, capacity=None):
+        candles = list(candles)
+        buf = cls(capacity or max(len(candles), 1))
+        for c in candles:
+            buf.append(c)
+        return buf
+
+    @classmethod
+    def _view(cls, time, ohlc, start, stop):
+        view = cls.__new__(cls)
+        view.capacity = stop - start
+        view._time = time
+        view._ohlc = ohlc
+        view._start = start
+        view._stop = stop
+        view._fixed = True
+        view._trackers = None
+        return view
+
+    # -- writing --
+    def append_bar(self, time, open_, high, low, close):
+        if self._fixed:
+            raise TypeError("cannot append to a CandleBuffer view")
+        ohlc = self._ohlc
+        if self._trackers:
+            new = (open_, high, low, close)
+            for (row, _, _, skip), tracker in self._trackers.items():
+                if not skip:
+                    tracker.push(new[row])
+                elif self._stop - skip >= self._start:
+                    tracker.push(ohlc[row, self._stop - skip].item())
+        if self._stop == len(self._time):
+            keep = self.capacity - 1
+            self._time[:keep] = self._time[self._stop - keep:self._stop]
+            ohlc[:, :keep] = ohlc[:, self._stop - keep:self._stop]
+            self._start, self._stop = 0, keep
+        elif self._stop - self._start == self.capacity:
+            self._start += 1
+        col = self._stop
+        self._time[col] = time
+        ohlc[0, col] = open_
+        ohlc[1, col] = high
+        ohlc[2, col] = low
+        ohlc[3, col] = close
+        self._stop = col + 1
+
+    def append(self, candle):
+        """Append a ``(time, open, high, low, close)`` tuple."""
+        self.append_bar(to_epoch(candle[0]), candle[1], candle[2], candle[3], candle[4])
+
+    def extend_arrays(self, time, open_, high, low, close):
+        """Append whole columns (e.g. MT5 rates) without building tuples."""
+        for row in zip(np.asarray(time).tolist(), np.asarray(open_).tolist(), np.asarray(high).tolist(),
+                       np.asarray(low).tolist(), np.asarray(close).tolist()):
+            self.append_bar(*row)
+
+    # -- columns --
+    @property
+    def time(self):
+        return self._time[self._start:self._stop]
+
+    @property
+    def open(self):
+        return self._ohlc[0, self._start:self._stop]
+
+    @property
+    def high(self):
+        return self._ohlc[1, self._start:self._stop]
+
+    @property
+    def low(self):
+        return self._ohlc[2, self._start:self._stop]
+
+    @property
+    def close(self):
+        return self._ohlc[3, self._start:self._stop]
+
+    def extreme(self, column, window, kind="max", skip=0):
+        """
+        Max/min of ``column`` ("open", "high", "low", "close") over the
+        ``window`` bars ending ``skip`` bars before the newest, clipped to
+        what the buffer holds; None when that span is empty.  The first call
+        on a writable buffer registers a rolling tracker that every later
+        append feeds, so repeated calls are O(1) whatever the window.
+        """
+        row = self._ROWS[column]
+        n = self._stop - self._start
+        window = min(window, self.capacity - skip)
+        if window <= 0 or n <= skip:
+            return None
+        if self._fixed:
+            span = self._ohlc[row, self._start + max(0, n - skip - window):self._stop - skip]
+            return float(span.max() if kind == "max" else span.min())
+        if self._trackers is None:
+            self._trackers = {}
+        key = (row, window, kind, skip)
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = self._trackers[key] = (RollingMax if kind == "max" else RollingMin)(window)
+            for v in self._ohlc[row, self._start + max(0, n - skip - window):self._stop - skip].tolist():
+                tracker.push(v)
+        return float(tracker.value)
+
+    # -- sequence protocol --
+    def __len__(self):
+        return self._stop - self._start
+
+    def _row(self, col):
+        o, h, l, c = self._ohlc[:, col].tolist()
+        return EPOCH + datetime.timedelta(seconds=int(self._time[col])), o, h, l, c
+
+    def __getitem__(self, key):
+        n = self._stop - self._start
+        if isinstance(key, slice):
+            lo, hi, step = key.indices(n)
+            if step != 1:
+                return [self[i] for i in range(lo, hi, step)]
+            return CandleBuffer._view(self._time, self._ohlc, self._start + lo, self._start + max(lo, hi))
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError("CandleBuffer index out of range")
+        return self._row(self._start + key)
+
+    def __iter__(self):
+        for col in range(self._start, self._stop):
+            yield self._row(col)
+
+    def __repr__(self):
+        return f"CandleBuffer(len={len(self)}, capacity={self.capacity})"
+
+
+def _swing_masks(high, low, look_back):
+    n = len(high)
+    hi = np.zeros(n, dtype=bool)
+    lo = np.zeros(n, dtype=bool)
+    if n > 2 * look_back:
+        core = slice(look_back, n - look_back)
+        h, l = high[core], low[core]
+        hi_c = np.ones(n - 2 * look_back, dtype=bool)
+        lo_c = hi_c.copy()
+        for d in range(1, look_back + 1):
+            hi_c &= (h > high[look_back - d:n - look_back - d]) & (h > high[look_back + d:n - look_back + d])
+            lo_c &= (l < low[look_back - d:n - look_back - d]) & (l < low[look_back + d:n - look_back + d])
+        hi[core] = hi_c
+        lo[core] = lo_c
+    return hi, lo
+
 def swing_points(prices: List[Candle], look_back: int = 3):
+    if isinstance(prices, CandleBuffer):
+        hi, lo = _swing_masks(prices.high, prices.low, look_back)
+        return hi.tolist(), lo.tolist()
     n = len(prices)
     hi = [False] * n
     lo = [False] * n
@@ -20,6 +219,10 @@ def swing_points(prices: List[Candle], look_back: int = 3):
 def detect_bos(prices: List[Candle], look_back: int = 3) -> bool:
     if len(prices) < look_back * 2 + 1:
         return False
+    if isinstance(prices, CandleBuffer):
+        high = prices.high
+        idx = np.flatnonzero(_swing_masks(high, prices.low, look_back)[0])
+        return bool(len(idx)) and bool(prices.close[-1] > high[idx[-1]])
     highs, _ = swing_points(prices, look_back)
     try:
         idx = len(highs) - 1 - highs[::-1].index(True)
@@ -31,6 +234,9 @@ def detect_bos(prices: List[Candle], look_back: int = 3) -> bool:
 def detect_choch(prices: List[Candle], look_back: int = 3) -> bool:
     if len(prices) < look_back + 4:
         return False
+    if isinstance(prices, CandleBuffer):
+        close = prices.close
+        return bool((close[-1] < prices.low[-(look_back + 3):-1]).any())
     current_close = prices[-1][4]
     window = prices[-(look_back + 3):-1]
     for candle in window:
@@ -42,6 +248,17 @@ def detect_orderblock(prices: List[Candle], side: Side, depth: int = 20) -> Opti
     if len(prices) < 2:
         return None
     search_start = max(0, len(prices) - depth - 1)
+    if isinstance(prices, CandleBuffer):
+        tail = prices[search_start:]
+        o, h, l, c = tail.open.tolist(), tail.high.tolist(), tail.low.tolist(), tail.close.tolist()
+        for k in range(len(c) - 2, -1, -1):
+            if side == "bear":
+                found = c[k] > o[k] and c[k + 1] < o[k + 1] and c[k + 1] < l[k]
+            else:
+                found = c[k] < o[k] and c[k + 1] > o[k + 1] and c[k + 1] > h[k]
+            if found:
+                return search_start + k, o[k], c[k]
+        return None
     rng = range(len(prices) - 2, search_start - 1, -1)
     if side == "bear":
         for i in rng:
@@ -61,6 +278,16 @@ def detect_orderblock(prices: List[Candle], side: Side, depth: int = 20) -> Opti
 
 def detect_fvg(prices: List[Candle], lookback: int = 10):
     # FVG: fair value gap between candle i and i+2
+    if isinstance(prices, CandleBuffer):
+        # whole columns: short windows index from the end, as lists do
+        high, low = prices.high.tolist(), prices.low.tolist()
+        for i in range(len(high) - lookback - 2, len(high) - 2):
+            h0, l0, h2, l2 = high[i], low[i], high[i + 2], low[i + 2]
+            if h0 < l2:
+                return {"side": "bear", "upper": l2, "lower": h0, "idx": i}
+            if l0 > h2:
+                return {"side": "bull", "upper": l0, "lower": h2, "idx": i}
+        return None
     for i in range(len(prices) - lookback - 2, len(prices) - 2):
         h0, l0 = prices[i][2], prices[i][3]
         h2, l2 = prices[i + 2][2], prices[i + 2][3]
@@ -80,6 +307,17 @@ def get_session(hour):
 
 def session_high_low(candles: List[Candle], session="asia"):
     # candles: [(datetime, open, high, low, close), ...]
+    if isinstance(candles, CandleBuffer):
+        hrs = (candles.time // 3600) % 24
+        if session == "asia":
+            mask = (hrs < 7) | (hrs >= 21)
+        elif session == "london":
+            mask = (hrs >= 7) & (hrs < 12)
+        else:
+            mask = (hrs >= 12) & (hrs < 20)
+        if not mask.any():
+            return None, None
+        return float(candles.high[mask].max()), float(candles.low[mask].min())
     hours = [c[0].hour if hasattr(c[0], "hour") else int(str(c[0])[11:13]) for c in candles]
     if session == "asia":
         idx = [i for i, h in enumerate(hours) if 0 <= h < 7 or 21 <= h <= 23]
@@ -94,11 +332,17 @@ def session_high_low(candles: List[Candle], session="asia"):
     return high, low
 
 def liquidity_sweep(prices: List[Candle], side: Side, window=30, asian_levels=None):
-    recent = prices[-window:]
-    high_prev = max(c[2] for c in recent[:-1])
-    low_prev  = min(c[3] for c in recent[:-1])
-    last_high = recent[-1][2]
-    last_low  = recent[-1][3]
+    if isinstance(prices, CandleBuffer) and window > 1 and len(prices) > 1:
+        high_prev = prices.extreme("high", window - 1, "max", skip=1)
+        low_prev  = prices.extreme("low", window - 1, "min", skip=1)
+        last_high = float(prices.high[-1])
+        last_low  = float(prices.low[-1])
+    else:
+        recent = prices[-window:]
+        high_prev = max(c[2] for c in recent[:-1])
+        low_prev  = min(c[3] for c in recent[:-1])
+        last_high = recent[-1][2]
+        last_low  = recent[-1][3]
     sweep = ((side == "bull" and last_high > high_prev) or
              (side == "bear" and last_low < low_prev))
     if asian_levels:
@@ -109,7 +353,14 @@ def liquidity_sweep(prices: List[Candle], side: Side, window=30, asian_levels=No
             sweep = True
     return sweep
 
-def premium_discount_zone(candles: List[Candle]):
+def premium_discount_zone(candles: List[Candle], window=None):
+    # window: only the last ``window`` candles (default: all of them)
+    if isinstance(candles, CandleBuffer) and len(candles):
+        swing_hi = candles.extreme("close", window or candles.capacity, "max")
+        swing_lo = candles.extreme("close", window or candles.capacity, "min")
+        return swing_hi, swing_lo, (swing_hi + swing_lo) / 2
+    if window:
+        candles = candles[-window:]
     closes = [c[4] for c in candles]
     swing_hi = max(closes)
     swing_lo = min(closes)
@@ -0,0 +1,65 @@
+"""
+Opt-in timing and hit-rate counters for the detectors SMCStrategyCore runs.
+
+Pass a ``DetectorStats`` as ``SMCStrategyCore(stats=...)``; every detector
+call in ``get_entry`` and every ``get_htf_bias`` call is then timed and
+counted, and a call "hits" when its result is truthy (a found order block,
+gap, break or bias).  Read the totals with ``snapshot()`` / ``report()`` or
+receive each call through ``on_record(name, seconds, hit)``.  Without a
+stats object the core goes through ``call_plain``, one extra function call
+per detector.
+"""
+
+import time
+
+
+def call_plain(name, fn, *args):
+    return fn(*args)
+
+
+class DetectorStats:
+    def __init__(self, on_record=None):
+        self.on_record = on_record
+        self.reset()
+
+    def reset(self):
+        self._totals = {}           # name -> [calls, hits, seconds]
+
+    def record(self, name, seconds, hit):
+        tot = self._totals.get(name)
+        if tot is None:
+            tot = self._totals[name] = [0, 0, 0.0]
+        tot[0] += 1
+        tot[1] += bool(hit)
+        tot[2] += seconds
+        if self.on_record is not None:
+            self.on_record(name, seconds, hit)
+
+    def call(self, name, fn, *args):
+        """``fn(*args)``, timed and counted under ``name``."""
+        t0 = time.perf_counter()
+        result = fn(*args)
+        self.record(name, time.perf_counter() - t0, result)
+        return result
+
+    def snapshot(self):
+        """name -> {calls, hits, hit_rate, total_s, mean_us}, in first-call order."""
+        return {
+            name: {
+                "calls": calls,
+                "hits": hits,
+                "hit_rate": hits / calls if calls else 0.0,
+                "total_s": seconds,
+                "mean_us": seconds / calls * 1e6 if calls else 0.0,
+            }
+            for name, (calls, hits, seconds) in self._totals.items()
+        }
+
+    def report(self):
+        """The snapshot as a text table, most expensive detector first."""
+        snap = self.snapshot()
+        lines = [f"{'detector':16s} {'calls':>9s} {'hits':>9s} {'hit %':>7s} {'total s':>9s} {'mean us':>9s}"]
+        for name, s in sorted(snap.items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"{name:16s} {s['calls']:9d} {s['hits']:9d} {s['hit_rate'] * 100:7.2f} "
+                         f"{s['total_s']:9.3f} {s['mean_us']:9.2f}")
+        return "\n".join(lines)
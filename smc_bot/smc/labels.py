@@ -0,0 +1,127 @@
+"""
+Bulk stop/target outcome labels for signals, without a broker.
+
+For every signal ``label_outcomes`` finds which of its stop and target the
+price reaches first, after how many bars, and the trade's maximum adverse /
+favourable excursion (MAE / MFE) on the way.  Searches run over sparse
+tables (power-of-two range max/min) of the future highs and lows: each
+signal's first touch is found by binary lifting, all signals at once, so
+the cost is O((bars + signals) log bars) array work with no per-bar loop.
+
+Conventions: a signal at bar ``i`` is filled at ``entry`` and judged from
+bar ``i + 1`` on; a bar that touches both levels counts as a stop (as the
+replay broker settles it); MAE and MFE are positive price distances.
+"""
+
+import numpy as np
+
+STOP, NONE, TARGET = -1, 0, 1
+
+
+class _RangeMax:
+    """Sparse table: ``table[k, x] = max(a[x: x + 2**k])``, -inf past the end."""
+
+    def __init__(self, a):
+        n = len(a)
+        levels = [a]
+        span = 1
+        while 2 * span <= n:
+            prev = levels[-1]
+            nxt = np.full(n, -np.inf)
+            nxt[:n - 2 * span + 1] = np.maximum(prev[:n - 2 * span + 1], prev[span:n - span + 1])
+            levels.append(nxt)
+            span *= 2
+        self.n = n
+        self.table = np.vstack(levels) if n else np.empty((1, 0))
+
+    def first_at_least(self, start, end, threshold):
+        """Smallest ``j`` in ``[start, end)`` with ``a[j] >= threshold``, else ``end``."""
+        p = start.copy()
+        for k in range(len(self.table) - 1, -1, -1):
+            span = 1 << k
+            inside = p + span <= end
+            below = self.table[k, np.minimum(p, self.n - 1)] < threshold
+            p = np.where(inside & below, p + span, p)
+        return p
+
+    def max(self, lo, hi):
+        """``max(a[lo:hi])`` per pair; -inf where the range is empty."""
+        length = np.maximum(hi - lo, 1)
+        k = np.floor(np.log2(length)).astype(np.intp)
+        lo_c = np.minimum(lo, self.n - 1)
+        hi_c = np.clip(hi - (1 << k), 0, self.n - 1)
+        out = np.maximum(self.table[k, lo_c], self.table[k, hi_c])
+        return np.where(hi > lo, out, -np.inf)
+
+
+def label_outcomes(high, low, index, direction, entry, stop, target, max_bars=None, close=None):
+    """
+    Label signals on bar ``index`` (1 long / -1 short ``direction``) with
+    their ``entry``, ``stop`` and ``target`` levels.  ``max_bars`` caps how
+    far ahead to look (default: to the end of the data); ``close`` gives
+    the exit price of trades neither level closed by then.
+
+    Returns arrays per signal: ``outcome`` (1 target, -1 stop, 0 neither),
+    ``exit_idx``, ``bars`` (``exit_idx - index``), ``exit_price``, ``mae``,
+    ``mfe`` and ``r`` (the result in multiples of the entry-stop distance).
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    index = np.asarray(index, dtype=np.intp)
+    long_ = np.asarray(direction) > 0
+    entry, stop, target = (np.asarray(a, dtype=np.float64) for a in (entry, stop, target))
+    n = len(high)
+
+    start = index + 1
+    end = np.full(len(index), n, dtype=np.intp)
+    if max_bars is not None:
+        end = np.minimum(end, start + max_bars)
+    end = np.maximum(end, start)
+
+    highs, lows = _RangeMax(high), _RangeMax(-low)
+    # long: stop on low <= stop, target on high >= target; short mirrored
+    hit_stop = np.where(long_, lows.first_at_least(start, end, -stop), highs.first_at_least(start, end, stop))
+    hit_target = np.where(long_, highs.first_at_least(start, end, target),
+                          lows.first_at_least(start, end, -target))
+
+    outcome = np.where(hit_stop <= hit_target, STOP, TARGET).astype(np.int8)
+    exit_idx = np.minimum(hit_stop, hit_target)
+    open_ = exit_idx >= end
+    outcome[open_] = NONE
+    exit_idx = np.where(open_, end - 1, exit_idx)
+
+    exit_price = np.where(outcome == STOP, stop, target)
+    exit_price[open_] = np.nan
+    if close is not None:
+        marked = open_ & (exit_idx >= start)
+        exit_price[marked] = np.asarray(close, dtype=np.float64)[exit_idx[marked]]
+
+    span_hi = highs.max(start, exit_idx + 1)
+    span_lo = -lows.max(start, exit_idx + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mfe = np.where(long_, span_hi - entry, entry - span_lo)
+        mae = np.where(long_, entry - span_lo, span_hi - entry)
+        empty = exit_idx < start
+        mfe[empty] = np.nan
+        mae[empty] = np.nan
+        sign = np.where(long_, 1.0, -1.0)
+        r = (exit_price - entry) * sign / np.abs(entry - stop)
+    return {
+        "outcome": outcome,
+        "exit_idx": exit_idx,
+        "bars": exit_idx - index,
+        "exit_price": exit_price,
+        "mae": mae,
+        "mfe": mfe,
+        "r": r,
+    }
+
+
+def label_signals(signals, high, low, close=None, max_bars=None):
+    """``label_outcomes`` for every non-flat bar of a ``signals_batch`` result, plus its ``index``."""
+    signal = np.asarray(signals["signal"])
+    index = np.flatnonzero(signal)
+    labels = label_outcomes(high, low, index, signal[index], signals["entry"][index], signals["stop"][index],
+                            signals["target"][index], max_bars=max_bars, close=close)
+    labels["index"] = index
+    return labels
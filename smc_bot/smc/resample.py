@@ -0,0 +1,91 @@
+"""
+Higher-timeframe candles built from one base feed, bar by bar.
+
+``Resampler(base_period, periods, size)`` takes the base (lowest timeframe)
+bars through ``update_bar`` and keeps, per requested period, a
+``CandleBuffer`` of the last ``size`` closed bars plus the one bar still
+forming - never the history, so another timeframe costs one more window.
+Buckets are aligned on multiples of the period in the feed's own clock (as
+MT5 and the CSV files stamp bars) and each bar carries its bucket's start
+time.
+
+A bucket is emitted as soon as it is complete: on the base bar that ends it
+(``time + base_period`` reaches the bucket end) or, when the feed skips
+that bar (weekends, holes in the data), on the first bar of a later
+bucket.  The forming bar never shows in ``windows``, so a consumer cannot
+see a higher-timeframe high or low before the base feed has printed it.
+
+When the feed starts partway into a bucket (a backtest from an arbitrary
+bar, or a live fetch of N base bars) that first bucket is missing its
+open and part of its range, so it is dropped rather than emitted as a full
+bar.  Later buckets are kept even when a hole skips their first base bar:
+the broker prints those bars from the same ticks.
+"""
+
+import numpy as np
+
+from .detectors import CandleBuffer
+
+
+class Resampler:
+    def __init__(self, base_period, periods, size=50):
+        """``base_period`` and ``periods`` in seconds; each period a multiple of the base."""
+        self.base_period = int(base_period)
+        self.periods = tuple(int(p) for p in periods)
+        for period in self.periods:
+            if period < self.base_period or period % self.base_period:
+                raise ValueError(f"period {period}s is not a multiple of the {self.base_period}s base")
+        self.windows = [CandleBuffer(size) for _ in self.periods]
+        self._forming = [None] * len(self.periods)     # [start, open, high, low, close] per period
+        self._partial = [False] * len(self.periods)    # forming bar is the feed's truncated first bucket
+        self.last_time = None
+
+    def update_bar(self, time, open_, high, low, close):
+        """Add one closed base bar; returns how many higher-timeframe bars it closed."""
+        if self.last_time is not None and time <= self.last_time:
+            return 0                # already seen
+        first = self.last_time is None
+        self.last_time = time
+        closed = 0
+        for k, period in enumerate(self.periods):
+            start = time - time % period
+            bar = self._forming[k]
+            if bar is not None and bar[0] != start:
+                # the bucket's last base bar never came
+                if not self._partial[k]:
+                    self.windows[k].append_bar(*bar)
+                    closed += 1
+                bar = None
+            if bar is None:
+                bar = [start, open_, high, low, close]
+                self._partial[k] = first and time != start
+            else:
+                if high > bar[2]:
+                    bar[2] = high
+                if low < bar[3]:
+                    bar[3] = low
+                bar[4] = close
+            if time + self.base_period >= start + period:
+                if not self._partial[k]:
+                    self.windows[k].append_bar(*bar)
+                    closed += 1
+                bar = None
+            self._forming[k] = bar
+        return closed
+
+    def extend_arrays(self, time, open_, high, low, close):
+        """``update_bar`` over whole columns (e.g. MT5 rates); returns the bars closed."""
+        closed = 0
+        for row in zip(np.asarray(time).tolist(), np.asarray(open_).tolist(), np.asarray(high).tolist(),
+                       np.asarray(low).tolist(), np.asarray(close).tolist()):
+            closed += self.update_bar(*row)
+        return closed
+
+    def forming(self, k=0):
+        """The ``k``-th period's unfinished bar as a candle tuple, or None."""
+        bar = self._forming[k]
+        if bar is None or self._partial[k]:
+            return None
+        buf = CandleBuffer(1)
+        buf.append_bar(*bar)
+        return buf[-1]
@@ -0,0 +1,75 @@
+"""
+Rolling-window extremes.
+
+``RollingMax`` / ``RollingMin`` track the max/min of the last ``window``
+values pushed, in amortized O(1) per push (monotonic deque), whatever the
+window length.  ``rolling_max`` / ``rolling_min`` are the whole-series
+versions: ``out[t] = max(a[max(0, t - k + 1): t + 1])`` in O(n) using
+block prefix/suffix maxima (van Herk / Gil-Werman), so the cost does not
+grow with ``k`` either.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class RollingMax:
+    __slots__ = ("window", "count", "_q", "_sign")
+
+    def __init__(self, window):
+        self.window = max(int(window), 1)
+        self.count = 0              # values pushed so far
+        self._q = deque()           # (index, signed value), values decreasing
+        self._sign = 1.0
+
+    def push(self, value):
+        """Add the next value; returns the extreme of the last ``window`` values."""
+        v = self._sign * value
+        q = self._q
+        while q and q[-1][1] <= v:
+            q.pop()
+        q.append((self.count, v))
+        self.count += 1
+        if q[0][0] <= self.count - 1 - self.window:
+            q.popleft()
+        return self._sign * q[0][1]
+
+    @property
+    def value(self):
+        """Current extreme, or None before the first push."""
+        return self._sign * self._q[0][1] if self._q else None
+
+
+class RollingMin(RollingMax):
+    __slots__ = ()
+
+    def __init__(self, window):
+        super().__init__(window)
+        self._sign = -1.0
+
+
+def _as_f8(a):
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+def rolling_max(a, k):
+    # out[t] = max(a[max(0, t - k + 1): t + 1]); k >= 1
+    a = _as_f8(a)
+    n = len(a)
+    if k <= 1 or n == 0:
+        return a.copy()
+    k = min(k, n)
+    # front padding makes every window full; back padding fills the last block
+    blocks = -(-(n + k - 1) // k)
+    padded = np.full(blocks * k, -np.inf)
+    padded[k - 1:k - 1 + n] = a
+    grid = padded.reshape(blocks, k)
+    prefix = np.maximum.accumulate(grid, axis=1).ravel()
+    suffix = np.maximum.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    # window [i, i + k - 1] of padded = suffix of i's block + prefix of the next
+    return np.maximum(suffix[:n], prefix[k - 1:k - 1 + n])
+
+
+def rolling_min(a, k):
+    return -rolling_max(-_as_f8(a), k)
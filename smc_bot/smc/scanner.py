@@ -0,0 +1,164 @@
+"""
+Single-read signal scan for ``SMCStrategyCore.get_entry``.
+
+``SignalScanner.scan`` pulls the window's open/high/low/close columns out
+once (one ``zip`` for a candle list, four ``tolist`` calls for a
+``CandleBuffer``) and runs every registered detector over those columns,
+so the order blocks, fair value gap, BOS and CHoCH no longer each walk the
+candle tuples.  The result is one dict: each detector's output under its
+name (same values as the matching ``smc.detectors`` function) plus the
+entry and the long/short stop extremes of the last ``stop_bars`` bars.
+
+Detectors are plugins: ``add(name, fn, side=None)`` registers
+``fn(cols) -> value`` on the same columns; with ``side`` set ("bull" or
+"bear") a truthy value also becomes a ``get_entry`` trigger for that side.
+A trigger may also bring ``batch(open_, high, low, close, window)``, its
+per-bar flags over a whole history (``SMCStrategyCore.triggers_batch``);
+without one ``batch_flags`` runs ``fn`` on every trailing window.  The
+same holds for a built-in detector replaced through ``add``: its ``batch``
+returns what the ``smc.vectorized`` function would (flags, or the per-bar
+side for "fvg"), and without one its ``fn`` is run window by window.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from smc.detectors import CandleBuffer
+from smc.instrument import call_plain
+
+Columns = namedtuple("Columns", "open high low close")
+
+
+def columns(candles):
+    """The window as ``Columns`` of plain sequences."""
+    if isinstance(candles, CandleBuffer):
+        return Columns(candles.open.tolist(), candles.high.tolist(), candles.low.tolist(),
+                       candles.close.tolist())
+    if not len(candles):
+        return Columns((), (), (), ())
+    return Columns(*list(zip(*candles))[1:5])
+
+
+def scan_orderblock(side, depth=20):
+    def scan(cols):
+        o, h, l, c = cols
+        n = len(c)
+        if n < 2:
+            return None
+        for i in range(n - 2, max(0, n - depth - 1) - 1, -1):
+            if side == "bear":
+                found = c[i] > o[i] and c[i + 1] < o[i + 1] and c[i + 1] < l[i]
+            else:
+                found = c[i] < o[i] and c[i + 1] > o[i + 1] and c[i + 1] > h[i]
+            if found:
+                return i, o[i], c[i]
+        return None
+    return scan
+
+
+def scan_fvg(lookback=10):
+    def scan(cols):
+        high, low = cols.high, cols.low
+        n = len(high)
+        # short windows index from the end, as detect_fvg does on lists
+        for i in range(n - lookback - 2, n - 2):
+            h0, l0, h2, l2 = high[i], low[i], high[i + 2], low[i + 2]
+            if h0 < l2:
+                return {"side": "bear", "upper": l2, "lower": h0, "idx": i}
+            if l0 > h2:
+                return {"side": "bull", "upper": l0, "lower": h2, "idx": i}
+        return None
+    return scan
+
+
+def scan_bos(look_back):
+    def scan(cols):
+        high = cols.high
+        n = len(high)
+        if n < look_back * 2 + 1:
+            return False
+        # newest swing high: scanning back stops at the first one
+        for i in range(n - look_back - 1, look_back - 1, -1):
+            h = high[i]
+            if all(h > high[j] for j in range(i - look_back, i + look_back + 1) if j != i):
+                return cols.close[-1] > h
+        return False
+    return scan
+
+
+def scan_choch(look_back):
+    def scan(cols):
+        if len(cols.close) < look_back + 4:
+            return False
+        last = cols.close[-1]
+        return any(last < low for low in cols.low[-(look_back + 3):-1])
+    return scan
+
+
+class SignalScanner:
+    def __init__(self, look_back=1, ob_depth=20, fvg_lookback=10, stop_bars=5):
+        self.look_back = look_back
+        self.ob_depth = ob_depth
+        self.fvg_lookback = fvg_lookback
+        self.stop_bars = stop_bars
+        self.detectors = {}         # name -> fn(cols)
+        self.triggers = []          # (name, side) of plugins that open trades
+        self.batches = {}           # name -> batch(open_, high, low, close, window)
+        self.add("orderblock_bull", scan_orderblock("bull", ob_depth))
+        self.add("orderblock_bear", scan_orderblock("bear", ob_depth))
+        self.add("fvg", scan_fvg(fvg_lookback))
+        self.add("bos", scan_bos(look_back))
+        self.add("choch", scan_choch(look_back))
+        self.builtins = dict(self.detectors)
+
+    def add(self, name, fn, side=None, batch=None):
+        """
+        Register ``fn(cols)`` under ``name``; ``side`` makes a truthy result a
+        trigger, and ``batch`` is its whole-history form.
+        """
+        self.detectors[name] = fn
+        self.batches.pop(name, None)
+        if side is not None:
+            self.triggers.append((name, side))
+        if batch is not None:
+            self.batches[name] = batch
+        return self
+
+    def replaced(self, name):
+        """True when built-in detector ``name`` no longer runs its own code."""
+        return self.detectors[name] is not self.builtins[name]
+
+    def batch_values(self, name, open_, high, low, close, window=50, value=bool):
+        """
+        Per-bar ``value(fn(cols))`` of detector ``name`` over the trailing
+        ``window`` bars ending at each bar, or its ``batch`` form's output.
+        """
+        if name in self.batches:
+            return np.asarray(self.batches[name](open_, high, low, close, window))
+        fn = self.detectors[name]
+        o, h, l, c = (np.asarray(x).tolist() for x in (open_, high, low, close))
+        out = []
+        for t in range(len(c)):
+            lo = max(0, t + 1 - window)
+            out.append(value(fn(Columns(o[lo:t + 1], h[lo:t + 1], l[lo:t + 1], c[lo:t + 1]))))
+        return np.asarray(out)
+
+    def batch_flags(self, name, open_, high, low, close, window=50):
+        """Per-bar truth of trigger ``name`` over the trailing ``window`` bars ending at each bar."""
+        return self.batch_values(name, open_, high, low, close, window).astype(bool)
+
+    def scan(self, candles, run=call_plain):
+        """
+        Every detector's result plus ``entry`` (bar[-1][3], as get_entry
+        reads it), ``stop_long`` (min of the last highs) and ``stop_short``
+        (max of the last opens).  ``run(name, fn, cols)`` wraps each
+        detector call, e.g. ``DetectorStats.call``.
+        """
+        cols = columns(candles)
+        out = {name: run(name, fn, cols) for name, fn in self.detectors.items()}
+        if len(cols.close):
+            out["entry"] = cols.low[-1]
+            out["stop_long"] = min(cols.high[-self.stop_bars:])
+            out["stop_short"] = max(cols.open[-self.stop_bars:])
+        return out
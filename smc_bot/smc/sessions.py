@@ -0,0 +1,128 @@
+"""
+Incremental per-day session ranges.
+
+``SessionIndex`` takes bars as they close and keeps, for each named
+session, the high/low of the current and the last few past instances -
+one instance per trading day, so Asia (21:00-07:00 by default) running over
+midnight is a single range.  ``current`` / ``previous`` / ``levels`` are
+O(1) lookups, and each ``update`` costs O(number of sessions), so session
+levels can be consulted on every bar instead of rescanning the window the
+way ``detectors.session_high_low`` does.
+
+Session bounds are local ``(start, end)`` times as hours or "HH:MM"
+strings (end exclusive, start > end wraps midnight).  ``tz`` is the zone
+they are defined in and ``bar_tz`` the zone of the bar stamps (both
+zoneinfo names or tzinfo objects); with ``tz=None`` the bounds are read on
+the bar clock directly.
+"""
+
+import datetime
+from collections import deque, namedtuple
+
+from smc.detectors import EPOCH, to_epoch
+
+DEFAULT_SESSIONS = {"asia": (21, 7), "london": (7, 12), "ny": (12, 20)}
+
+SessionRange = namedtuple("SessionRange", "name start end high low bars")
+SessionRange.__doc__ = "One session instance; ``start``/``end`` are bar-clock epoch seconds."
+
+
+def _minutes(bound):
+    if isinstance(bound, str):
+        hh, mm = bound.split(":")
+        return int(hh) * 60 + int(mm)
+    return int(round(bound * 60))
+
+
+def _zone(tz):
+    if tz is None or isinstance(tz, datetime.tzinfo):
+        return tz
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(tz)
+
+
+class SessionIndex:
+    def __init__(self, sessions=None, tz=None, bar_tz="UTC", history=5):
+        self.sessions = {name: (_minutes(s), _minutes(e)) for name, (s, e) in (sessions or DEFAULT_SESSIONS).items()}
+        self.tz = _zone(tz)
+        self.bar_tz = _zone(bar_tz) if self.tz is not None else None
+        self.last_time = None
+        # name -> deque of [start, end, high, low, bars], newest last
+        self._ranges = {name: deque(maxlen=history + 1) for name in self.sessions}
+        self._shift_hour = None
+        self._shift = 0
+
+    def _offset(self, epoch):
+        """Seconds from the bar clock to the session clock (cached per hour)."""
+        if self.tz is None:
+            return 0
+        hour = epoch // 3600
+        if hour != self._shift_hour:
+            naive = EPOCH + datetime.timedelta(seconds=hour * 3600)
+            local = naive.replace(tzinfo=self.bar_tz).astimezone(self.tz).replace(tzinfo=None)
+            self._shift = int((local - naive).total_seconds())
+            self._shift_hour = hour
+        return self._shift
+
+    # -- feed --
+    def update_bar(self, epoch, high, low):
+        shift = self._offset(epoch)
+        local = epoch + shift
+        day, minute = divmod(local // 60, 1440)
+        for name, (start, end) in self.sessions.items():
+            if start < end:
+                if not start <= minute < end:
+                    continue
+                open_day = day
+            elif minute >= start:
+                open_day = day
+            elif minute < end:
+                open_day = day - 1
+            else:
+                continue
+            session_start = (open_day * 1440 + start) * 60 - shift
+            ranges = self._ranges[name]
+            rng = ranges[-1] if ranges else None
+            if rng is None or rng[0] != session_start:
+                length = ((end - start) % 1440 or 1440) * 60
+                ranges.append([session_start, session_start + length, high, low, 1])
+            else:
+                if high > rng[2]:
+                    rng[2] = high
+                if low < rng[3]:
+                    rng[3] = low
+                rng[4] += 1
+        self.last_time = epoch
+        return self
+
+    def update(self, candle):
+        """Add a ``(time, open, high, low, close)`` candle."""
+        return self.update_bar(to_epoch(candle[0]), candle[2], candle[3])
+
+    # -- lookups --
+    def current(self, name):
+        """The latest instance of ``name`` (still open or already closed), or None."""
+        ranges = self._ranges[name]
+        return SessionRange(name, *ranges[-1]) if ranges else None
+
+    def previous(self, name, back=1):
+        """The instance ``back`` sessions before ``current``, or None."""
+        ranges = self._ranges[name]
+        return SessionRange(name, *ranges[-1 - back]) if len(ranges) > back else None
+
+    def last_complete(self, name):
+        """The latest instance that has ended by the last bar, or None."""
+        rng = self.current(name)
+        if rng is not None and self.last_time is not None and self.last_time < rng.end:
+            rng = self.previous(name)
+        return rng
+
+    def active(self):
+        """Names of the sessions the last bar fell in."""
+        return [name for name, ranges in self._ranges.items()
+                if ranges and ranges[-1][0] <= self.last_time < ranges[-1][1]]
+
+    def levels(self, name, complete=True):
+        """``(high, low)`` of the last complete (or the current) instance; ``(None, None)`` if none."""
+        rng = self.last_complete(name) if complete else self.current(name)
+        return (rng.high, rng.low) if rng else (None, None)
@@ -0,0 +1,124 @@
+"""
+Incremental market-structure tracker.
+
+Push one closed candle at a time with ``update``; the tracker keeps the last
+confirmed swing high/low, the BOS/CHoCH flags and the latest order block /
+fair value gap candidates with O(look_back) work per bar, independent of the
+window size.  The answers match ``smc.detectors`` called on the trailing
+``window`` candles, so callers can swap a re-scan of history for a push.
+"""
+
+from collections import deque
+
+from smc.detectors import Candle, detect_fvg
+
+
+class StructureTracker:
+    def __init__(self, look_back=3, window=50, ob_depth=20, fvg_lookback=10):
+        self.look_back = look_back
+        self.window = window
+        self.ob_depth = ob_depth
+        self.fvg_lookback = fvg_lookback
+        self.count = 0              # candles seen; the newest one is bar count - 1
+        self.swing_high = None      # (bar, high) of the last confirmed swing high
+        self.swing_low = None       # (bar, low)
+        self.bos = False
+        self.choch = False
+        self._recent = deque(maxlen=max(2 * look_back + 1, 3))
+        self._prev_lows = deque(maxlen=look_back + 2)
+        self._last_ob = {"bull": None, "bear": None}   # (bar, open, close)
+        self._gaps = deque()        # (bar, side, upper, lower), oldest first
+        self._warmup = []           # first candles, for detect_fvg's short-window quirks
+
+    # -- helpers --
+    def _window_start(self):
+        return max(0, self.count - self.window)
+
+    def _window_len(self):
+        return min(self.count, self.window)
+
+    # -- feed --
+    def update(self, candle: Candle):
+        lb = self.look_back
+        t = self.count
+        _, o, h, l, c = candle[:5]
+        self.count += 1
+        start = self._window_start()
+        m = self._window_len()
+
+        # CHoCH: close below any low of the lb + 2 candles before it
+        self.choch = m >= lb + 4 and any(c < low for low in self._prev_lows)
+        self._prev_lows.append(l)
+
+        # Order block patterns complete on the candle after the OB
+        if self._recent:
+            _, po, ph, pl, pc = self._recent[-1]
+            if pc > po and c < o and c < pl:
+                self._last_ob["bear"] = (t - 1, po, pc)
+            if pc < po and c > o and c > ph:
+                self._last_ob["bull"] = (t - 1, po, pc)
+
+        # Fair value gaps complete two candles later
+        if len(self._recent) >= 2:
+            _, _, h0, l0, _ = self._recent[-2]
+            if h0 < l:
+                self._gaps.append((t - 2, "bear", l, h0))
+            elif l0 > h:
+                self._gaps.append((t - 2, "bull", l0, h))
+        while self._gaps and self._gaps[0][0] < t - self.fvg_lookback - 1:
+            self._gaps.popleft()
+
+        self._recent.append((t, o, h, l, c))
+        if len(self._warmup) < self.fvg_lookback + 2:
+            self._warmup.append((t, o, h, l, c))
+
+        # Swing points are confirmed look_back candles after the fact
+        if len(self._recent) >= 2 * lb + 1:
+            span = list(self._recent)[-(2 * lb + 1):]
+            mid = span[lb]
+            others = span[:lb] + span[lb + 1:]
+            if all(mid[2] > x[2] for x in others):
+                self.swing_high = (mid[0], mid[2])
+            if all(mid[3] < x[3] for x in others):
+                self.swing_low = (mid[0], mid[3])
+
+        # BOS: close above the last swing high still inside the window
+        self.bos = (m >= 2 * lb + 1 and self.swing_high is not None
+                    and self.swing_high[0] >= start + lb and c > self.swing_high[1])
+        return self
+
+    # -- zone queries (window relative, like the detectors) --
+    def orderblock(self, side):
+        """Same as ``detect_orderblock(window, side, ob_depth)``."""
+        ob = self._last_ob[side]
+        t = self.count - 1
+        start = self._window_start()
+        if ob is None or self._window_len() < 2 or ob[0] < max(start, t - self.ob_depth):
+            return None
+        return ob[0] - start, ob[1], ob[2]
+
+    def fvg(self):
+        """Same as ``detect_fvg(window, fvg_lookback)``."""
+        t = self.count - 1
+        start = self._window_start()
+        if t - self.fvg_lookback - 1 < start:
+            try:
+                return detect_fvg(self._warmup[start:t + 1], self.fvg_lookback)
+            except IndexError:
+                return None
+        if not self._gaps:
+            return None
+        bar, side, upper, lower = self._gaps[0]
+        return {"side": side, "upper": upper, "lower": lower, "idx": bar - start}
+
+    def snapshot(self):
+        return {
+            "bar": self.count - 1,
+            "swing_high": self.swing_high,
+            "swing_low": self.swing_low,
+            "bos": self.bos,
+            "choch": self.choch,
+            "ob_bull": self.orderblock("bull"),
+            "ob_bear": self.orderblock("bear"),
+            "fvg": self.fvg(),
+        }
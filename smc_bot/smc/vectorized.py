@@ -0,0 +1,238 @@
+"""
+Vectorized whole-history versions of the SMC detectors.
+
+Every ``*_batch`` function takes full OHLC columns (1-D arrays, oldest bar
+first) and returns one value per bar.  Bar ``t`` carries exactly what the
+matching function in ``smc.detectors`` returns when it is called on the
+trailing window ``candles[max(0, t - window + 1): t + 1]`` - the window the
+backtrader wrapper hands to the core on every bar.
+
+Zones use plain arrays instead of tuples/dicts:
+- order blocks: ``idx`` (window relative, -1 when none), ``open``, ``close``
+- fair value gaps: ``side`` (1 bull, -1 bear, 0 none), ``upper``, ``lower``, ``idx``
+"""
+
+import numpy as np
+
+from smc.detectors import detect_fvg
+from smc.rolling import rolling_max, rolling_min
+
+BULL, BEAR, NONE = 1, -1, 0
+
+
+def _as_f8(a):
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+def _last_true_index(mask):
+    # out[t] = largest i <= t with mask[i], -1 if none
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(idx) else idx
+
+
+def _next_true_index(mask):
+    # out[t] = smallest i >= t with mask[i], len(mask) if none
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1] if n else idx
+
+
+def _window_start(n, window):
+    return np.maximum(np.arange(n) - window + 1, 0)
+
+
+def swing_points_batch(high, low, look_back: int = 3):
+    """Same as ``swing_points`` on the whole history."""
+    high, low = _as_f8(high), _as_f8(low)
+    n = len(high)
+    hi = np.zeros(n, dtype=bool)
+    lo = np.zeros(n, dtype=bool)
+    if n - 2 * look_back <= 0:
+        return hi, lo
+    core = slice(look_back, n - look_back)
+    hi[core] = True
+    lo[core] = True
+    for k in range(1, look_back + 1):
+        hi[core] &= (high[core] > high[look_back - k:n - look_back - k]) & \
+                    (high[core] > high[look_back + k:n - look_back + k])
+        lo[core] &= (low[core] < low[look_back - k:n - look_back - k]) & \
+                    (low[core] < low[look_back + k:n - look_back + k])
+    return hi, lo
+
+
+def detect_bos_batch(high, low, close, look_back: int = 3, window: int = 50):
+    high, close = _as_f8(high), _as_f8(close)
+    n = len(close)
+    out = np.zeros(n, dtype=bool)
+    if n == 0:
+        return out
+    t = np.arange(n)
+    start = _window_start(n, window)
+    swing_hi, _ = swing_points_batch(high, low, look_back)
+    last_hi = _last_true_index(swing_hi)
+    probe = t - look_back
+    ok = (t - start + 1 >= look_back * 2 + 1) & (probe >= 0)
+    idx = np.full(n, -1)
+    idx[ok] = last_hi[probe[ok]]
+    ok &= idx >= start + look_back
+    out[ok] = close[ok] > high[idx[ok]]
+    return out
+
+
+def detect_choch_batch(low, close, look_back: int = 3, window: int = 50):
+    low, close = _as_f8(low), _as_f8(close)
+    n = len(close)
+    out = np.zeros(n, dtype=bool)
+    if n < 2:
+        return out
+    t = np.arange(n)
+    ok = t - _window_start(n, window) + 1 >= look_back + 4
+    prev_max_low = np.empty(n)
+    prev_max_low[0] = -np.inf
+    prev_max_low[1:] = rolling_max(low, look_back + 2)[:-1]
+    out[ok] = close[ok] < prev_max_low[ok]
+    return out
+
+
+def detect_orderblock_batch(open_, high, low, close, side, depth: int = 20, window: int = 50):
+    open_, high, low, close = _as_f8(open_), _as_f8(high), _as_f8(low), _as_f8(close)
+    n = len(close)
+    res = {
+        "idx": np.full(n, -1),
+        "open": np.full(n, np.nan),
+        "close": np.full(n, np.nan),
+    }
+    if n < 2:
+        return res
+    pat = np.zeros(n, dtype=bool)
+    if side == "bear":
+        pat[:-1] = (close[:-1] > open_[:-1]) & (close[1:] < open_[1:]) & (close[1:] < low[:-1])
+    else:
+        pat[:-1] = (close[:-1] < open_[:-1]) & (close[1:] > open_[1:]) & (close[1:] > high[:-1])
+    t = np.arange(n)
+    start = _window_start(n, window)
+    last = np.full(n, -1)
+    last[1:] = _last_true_index(pat)[:-1]
+    ok = (t - start + 1 >= 2) & (last >= np.maximum(start, t - depth))
+    pos = last[ok]
+    res["idx"][ok] = pos - start[ok]
+    res["open"][ok] = open_[pos]
+    res["close"][ok] = close[pos]
+    return res
+
+
+def detect_fvg_batch(high, low, lookback: int = 10, window: int = 50):
+    high, low = _as_f8(high), _as_f8(low)
+    n = len(high)
+    res = {
+        "side": np.zeros(n, dtype=np.int8),
+        "upper": np.full(n, np.nan),
+        "lower": np.full(n, np.nan),
+        "idx": np.full(n, -1),
+    }
+    if n == 0:
+        return res
+    bear = np.zeros(n, dtype=bool)
+    bull = np.zeros(n, dtype=bool)
+    if n > 2:
+        bear[:-2] = high[:-2] < low[2:]
+        bull[:-2] = ~bear[:-2] & (low[:-2] > high[2:])
+    nxt = _next_true_index(bear | bull)
+    t = np.arange(n)
+    start = _window_start(n, window)
+    first = t - lookback - 1
+    full = first >= start
+    ok = full.copy()
+    pos = np.full(n, n)
+    pos[ok] = nxt[first[ok]]
+    ok &= pos <= t - 2
+    p = pos[ok]
+    is_bear = bear[p]
+    res["side"][ok] = np.where(is_bear, BEAR, BULL)
+    res["upper"][ok] = np.where(is_bear, low[p + 2], low[p])
+    res["lower"][ok] = np.where(is_bear, high[p], high[p + 2])
+    res["idx"][ok] = p - start[ok]
+    # Windows shorter than lookback + 2 make detect_fvg wrap around with
+    # negative indexes (or raise); only a handful of warm-up bars, so defer to it.
+    for i in np.flatnonzero(~full):
+        s = start[i]
+        candles = [(j, np.nan, high[j], low[j], np.nan) for j in range(s, i + 1)]
+        try:
+            gap = detect_fvg(candles, lookback)
+        except IndexError:
+            continue
+        if gap:
+            res["side"][i] = BULL if gap["side"] == "bull" else BEAR
+            res["upper"][i] = gap["upper"]
+            res["lower"][i] = gap["lower"]
+            res["idx"][i] = gap["idx"]
+    return res
+
+
+def liquidity_sweep_batch(high, low, side, window: int = 30, candles_window: int = 50, asian_levels=None):
+    """
+    ``liquidity_sweep(candles, side, window, asian_levels)`` per bar.
+    ``asian_levels`` is an optional ``(asia_hi, asia_lo)`` pair of per-bar
+    arrays (NaN where unknown).  Bars whose window holds a single candle,
+    where ``liquidity_sweep`` raises, are ``False``.
+    """
+    high, low = _as_f8(high), _as_f8(low)
+    n = len(high)
+    out = np.zeros(n, dtype=bool)
+    k = min(window, candles_window) - 1
+    if n < 2 or k < 1:
+        return out
+    if side == "bull":
+        out[1:] = high[1:] > rolling_max(high, k)[:-1]
+    else:
+        out[1:] = low[1:] < rolling_min(low, k)[:-1]
+    if asian_levels is not None:
+        asia_hi, asia_lo = (_as_f8(a) for a in asian_levels)
+        with np.errstate(invalid="ignore"):
+            if side == "bull":
+                out[1:] |= high[1:] > asia_hi[1:]
+            else:
+                out[1:] |= low[1:] < asia_lo[1:]
+    return out
+
+
+def premium_discount_zone_batch(close, window: int = 50):
+    swing_hi = rolling_max(close, window)
+    swing_lo = rolling_min(close, window)
+    return swing_hi, swing_lo, (swing_hi + swing_lo) / 2
+
+
+def session_high_low_batch(hours, high, low, session="asia", window: int = 200):
+    """Per-bar ``session_high_low``; NaN where the session has no bars."""
+    hours = np.asarray(hours)
+    if session == "asia":
+        mask = ((hours >= 0) & (hours < 7)) | ((hours >= 21) & (hours <= 23))
+    elif session == "london":
+        mask = (hours >= 7) & (hours < 12)
+    else:
+        mask = (hours >= 12) & (hours < 20)
+    hi = rolling_max(np.where(mask, _as_f8(high), -np.inf), window)
+    lo = rolling_min(np.where(mask, _as_f8(low), np.inf), window)
+    empty = np.isinf(hi)
+    hi[empty] = np.nan
+    lo[empty] = np.nan
+    return hi, lo
+
+
+def detect_all(open_, high, low, close, look_back: int = 3, window: int = 50,
+               ob_depth: int = 20, fvg_lookback: int = 10, sweep_window: int = 30):
+    """Run every detector over the whole history in one go."""
+    swing_hi, swing_lo = swing_points_batch(high, low, look_back)
+    pd_hi, pd_lo, pd_eq = premium_discount_zone_batch(close, window)
+    return {
+        "swing_high": swing_hi,
+        "swing_low": swing_lo,
+        "bos": detect_bos_batch(high, low, close, look_back, window),
+        "choch": detect_choch_batch(low, close, look_back, window),
+        "ob_bull": detect_orderblock_batch(open_, high, low, close, "bull", ob_depth, window),
+        "ob_bear": detect_orderblock_batch(open_, high, low, close, "bear", ob_depth, window),
+        "fvg": detect_fvg_batch(high, low, fvg_lookback, window),
+        "sweep_bull": liquidity_sweep_batch(high, low, "bull", sweep_window, window),
+        "sweep_bear": liquidity_sweep_batch(high, low, "bear", sweep_window, window),
+        "premium_discount": (pd_hi, pd_lo, pd_eq),
+    }
@@ -0,0 +1,187 @@
+"""
+Parallel parameter sweeps over the native engine (fast_backtest).
+
+The HTF/MTF/LTF files are parsed once and copied into a single shared-memory
+block; pool workers map it read-only instead of re-reading the CSVs or
+unpickling arrays per task.  Each finished combination is appended to a CSV
+results table as soon as it completes, and rerunning with the same table
+skips every combination already in it, so an interrupted sweep resumes.
+Every row carries a ``run`` signature (a hash of the feed files' contents,
+the date range and the fixed params); resuming into a table written by a
+different run raises instead of mixing its rows in.
+
+    cd smc_bot && python sweep.py --jobs 32 --out sweep_results.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from fast_backtest import run_fast_backtest
+from feeds import OHLC, file_digest, load_cached
+
+DEFAULT_GRID = {
+    "look_back": [2, 3, 4],
+    "max_retests": [1, 2, 999],
+    "trailing_atr_mult": [1.0, 1.5, 2.0],
+    "atr_thresh": [0.8, 1.0, 1.5],
+}
+METRICS = ["final_value", "total_trades", "won", "lost", "win_rate", "pnl"]
+
+
+def _views(buf, sizes):
+    # time (int64) + OHLC (float64) per feed, laid out back to back
+    feeds, offset = [], 0
+    for n in sizes:
+        cols = []
+        for dtype in (np.int64,) + (np.float64,) * 4:
+            col = np.ndarray(n, dtype=dtype, buffer=buf, offset=offset)
+            cols.append(col)
+            offset += n * 8
+        feeds.append(OHLC(*cols))
+    return feeds
+
+
+class SharedFeeds:
+    """OHLC feeds copied once into one shared-memory block."""
+
+    def __init__(self, feeds):
+        sizes = [len(f) for f in feeds]
+        self.shm = shared_memory.SharedMemory(create=True, size=max(sum(sizes) * 5 * 8, 1))
+        self.spec = (self.shm.name, sizes)
+        for view, feed in zip(_views(self.shm.buf, sizes), feeds):
+            for dst, src in zip(view, feed):
+                dst[:] = src
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_worker = {}
+
+
+def attach_feeds(spec):
+    """Pool initializer: map the parent's block, read-only."""
+    name, sizes = spec
+    # pool workers share the parent's resource tracker, so attaching only
+    # re-adds a name it already holds; unregistering here would drop the
+    # parent's entry and make its own unlink fail
+    shm = shared_memory.SharedMemory(name=name)
+    feeds = _views(shm.buf, sizes)
+    for feed in feeds:
+        for col in feed:
+            col.flags.writeable = False
+    _worker["shm"] = shm
+    _worker["feeds"] = feeds
+
+
+def worker_feeds():
+    """The (htf, mtf, ltf) feeds mapped by ``attach_feeds`` in this worker."""
+    return _worker["feeds"]
+
+
+def summarize(res):
+    a = res["analysis"]
+    closed = a["total"]["closed"]
+    won = a["won"]["total"]
+    return {
+        "final_value": res["final_value"],
+        "total_trades": closed,
+        "won": won,
+        "lost": a["lost"]["total"],
+        "win_rate": (won / closed) * 100 if closed else 0,
+        "pnl": a["pnl"]["net"]["total"],
+    }
+
+
+def run_combo(params):
+    return params, summarize(run_fast_backtest(*_worker["feeds"], **params))
+
+
+def grid_combos(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def _key(row, names):
+    return tuple(str(row[n]) for n in names)
+
+
+def run_signature(paths, fromdate=None, todate=None, fixed=None):
+    """Short hash of everything besides the grid that a results row depends on."""
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(file_digest(path).encode())
+    h.update(repr((fromdate, todate, sorted((fixed or {}).items()))).encode())
+    return h.hexdigest()[:16]
+
+
+def finished_keys(out, names, signature):
+    """Grid keys already in ``out``; ValueError if any row is from a different run."""
+    if not os.path.exists(out) or not os.path.getsize(out):
+        return set()
+    with open(out, newline="") as f:
+        rows = list(csv.DictReader(f))
+    stale = sum(1 for row in rows if row.get("run") != signature)
+    if stale:
+        raise ValueError(f"{out}: {stale} rows come from a different sweep (feeds, dates or fixed params); "
+                         "use another --out or delete it")
+    return {_key(row, names) for row in rows}
+
+
+def run_sweep(htf_path, mtf_path, ltf_path, grid=None, out="sweep_results.csv", jobs=None,
+              fromdate=None, todate=None, fixed=None, verbose=True):
+    """
+    Run every combination of ``grid`` (param -> list of values) not yet in
+    ``out``; ``fixed`` holds engine parameters shared by all runs.  Returns
+    the number of combinations run.
+    """
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    signature = run_signature((htf_path, mtf_path, ltf_path), fromdate, todate, fixed)
+    done = finished_keys(out, names, signature)
+    todo = [c for c in grid_combos(grid) if _key(c, names) not in done]
+    if verbose and done:
+        print(f"Resuming: {len(done)} combinations already in {out}")
+    if not todo:
+        return 0
+
+    feeds = [load_cached(p).between(fromdate, todate) for p in (htf_path, mtf_path, ltf_path)]
+    write_header = not (os.path.exists(out) and os.path.getsize(out))
+    with SharedFeeds(feeds) as shared, open(out, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=names + METRICS + ["run"])
+        if write_header:
+            writer.writeheader()
+        with ProcessPoolExecutor(jobs, initializer=attach_feeds, initargs=(shared.spec,)) as pool:
+            futures = [pool.submit(run_combo, {**(fixed or {}), **combo}) for combo in todo]
+            for i, fut in enumerate(as_completed(futures), start=1):
+                params, metrics = fut.result()
+                writer.writerow({**{n: params[n] for n in names}, **metrics, "run": signature})
+                f.flush()
+                if verbose:
+                    print(f"[{i}/{len(todo)}] {params} -> {metrics}")
+    return len(todo)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--htf", default="data/EURUSD_H1_bt.csv")
+    parser.add_argument("--mtf", default="data/EURUSD_M30_bt.csv")
+    parser.add_argument("--ltf", default="data/EURUSD_M15_bt.csv")
+    parser.add_argument("--out", default="sweep_results.csv")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    run_sweep(args.htf, args.mtf, args.ltf, out=args.out, jobs=args.jobs)
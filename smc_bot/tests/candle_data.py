@@ -0,0 +1,43 @@
+import csv
+import datetime
+import os
+import random
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+
+def load_candles(name, rows=600):
+    candles = []
+    with open(os.path.join(DATA_DIR, name)) as f:
+        reader = csv.reader(f)
+        next(reader)
+        for i, row in enumerate(reader):
+            if i >= rows:
+                break
+            candles.append((f"{row[0]} {row[1]}", *map(float, row[2:6])))
+    return candles
+
+def random_candles(n=400, seed=7):
+    rng = random.Random(seed)
+    candles, price = [], 100.0
+    for i in range(n):
+        o = price
+        c = round(o + rng.choice([-1, 1]) * rng.randint(0, 5) * 0.1, 1)
+        h = max(o, c) + rng.randint(0, 3) * 0.1
+        l = min(o, c) - rng.randint(0, 3) * 0.1
+        t = datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=i)
+        candles.append((t.strftime("%Y.%m.%d %H:%M:%S"), o, h, l, c))
+        price = c
+    return candles
+
+def columns(candles):
+    return [np.array([c[k] for c in candles]) for k in (1, 2, 3, 4)]
+
+def windows(candles, window):
+    for t in range(len(candles)):
+        yield t, candles[max(0, t - window + 1): t + 1]
+
+def fixtures():
+    return [load_candles("EURUSD_M15_bt.csv"), load_candles("XAUUSD_15m_bt.csv"), random_candles()]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Scripts run from smc_bot/ (``from bridges.bt_wrapper import ...``); make
+# those top-level modules importable when pytest runs from the repo root.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,70 @@
+"""Minimal stand-in for the MetaTrader5 module over feeds.OHLC bars, on a hand-driven clock."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+RATE_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8")]
+
+
+class FakeMT5:
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 0x4001
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+
+    def __init__(self, bars, now):
+        self.bars = bars            # timeframe -> feeds.OHLC
+        self.now = now              # server epoch seconds
+        self.calls = []             # (function name, args)
+        self.orders = []
+        self.positions = []
+
+    # -- clock --
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+    # -- MetaTrader5 API --
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.calls.append(("copy_rates_from_pos", (symbol, timeframe, start_pos, count)))
+        ohlc = self.bars[timeframe]
+        # bars opened by now; the last one is still forming (pos 0)
+        end = int(np.searchsorted(ohlc.time, self.now, "right")) - start_pos
+        start = max(0, end - count)
+        out = np.empty(max(0, end - start), dtype=RATE_DTYPE)
+        for name in ("time", "open", "high", "low", "close"):
+            out[name] = getattr(ohlc, name)[start:end]
+        return out
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(digits=2, trade_stops_level=0, point=0.01)
+
+    def symbol_info_tick(self, symbol):
+        ohlc = min(self.bars.values(), key=lambda o: o.time[1] - o.time[0])
+        i = max(0, int(np.searchsorted(ohlc.time, self.now, "right")) - 1)
+        price = float(ohlc.open[i])
+        return SimpleNamespace(time=int(self.now), bid=price, ask=price)
+
+    def account_info(self):
+        return SimpleNamespace(equity=10000.0)
+
+    def positions_get(self, symbol=None):
+        self.calls.append(("positions_get", (symbol,)))
+        return tuple(self.positions)
+
+    def order_send(self, request):
+        self.orders.append((self.now, request))
+        return SimpleNamespace(retcode=10009, request=request)
+
+    def history_deals_get(self, date_from, date_to, group=None):
+        return ()
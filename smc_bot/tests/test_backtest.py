@@ -0,0 +1,18 @@
+import datetime
+import os
+
+import pytest
+
+from candle_data import DATA_DIR
+
+# --- Tests
+def test_default_single_run_completes(tmp_path, monkeypatch):
+    pytest.importorskip("backtrader")
+    from backtest import run_backtest
+
+    # the script reads data/ and writes its trade log relative to the working directory
+    os.symlink(DATA_DIR, tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    results = run_backtest(fromdate=datetime.datetime(2023, 1, 2), todate=datetime.datetime(2023, 1, 20), plot=False)
+    assert len(results) == 1 and results[0].analyzers.trades.get_analysis() is not None
+    assert (tmp_path / "trade_log.fills").exists()
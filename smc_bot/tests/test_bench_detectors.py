@@ -0,0 +1,20 @@
+import json
+import os
+
+from benchmarks.bench_detectors import CASES, run_suite
+from candle_data import DATA_DIR
+
+FEEDS = {"EURUSD": tuple(os.path.join(DATA_DIR, f"EURUSD_{tf}_bt.csv") for tf in ("H1", "M30", "M15"))}
+
+# --- Tests
+def test_suite_report_is_complete_and_serializable():
+    report = run_suite(windows=(50,), look_backs=(1, 2), bars=20, feeds=FEEDS, verbose=False)
+    results = report["results"]
+    expected = sum(2 if takes_lb else 1 for takes_lb, _ in CASES.values())
+    assert len(results) == expected
+    for rec in results:
+        assert rec["calls"] == 20
+        assert 0 < rec["p50_us"] <= rec["p99_us"]
+        assert rec["bars_per_s"] > 0
+    assert results == sorted(results, key=lambda r: (r["symbol"], r["case"], r["window"], r["look_back"] or 0))
+    assert json.loads(json.dumps(report)) == report
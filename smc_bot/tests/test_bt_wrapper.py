@@ -0,0 +1,67 @@
+import datetime
+import os
+
+import pytest
+
+bt = pytest.importorskip("backtrader")
+
+from bridges.bt_feeds import csv_feed
+from bridges.bt_wrapper import SMCBacktraderWrapper
+from candle_data import DATA_DIR, load_candles
+
+TODATE = datetime.datetime(2023, 1, 6)
+
+
+class WindowCapture(SMCBacktraderWrapper):
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def next(self):
+        self.seen.append((len(self.data_ltf), list(self._candles(2, self.data_ltf))))
+
+
+class ResampledCapture(SMCBacktraderWrapper):
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def next(self):
+        htf, mtf = self._resampled()
+        self.seen.append((self._candles(2, self.data_ltf)[-1][0], list(htf), list(mtf)))
+
+
+def run_capture():
+    cerebro = bt.Cerebro(stdstats=False)
+    for name, compression in (("EURUSD_H1_bt.csv", 60), ("EURUSD_M30_bt.csv", 30), ("EURUSD_M15_bt.csv", 15)):
+        cerebro.adddata(csv_feed(os.path.join(DATA_DIR, name), compression, todate=TODATE))
+    cerebro.addstrategy(WindowCapture, print_signals=False)
+    return cerebro.run()[0]
+
+
+def closed_bars(name, now, period):
+    """The file's bars that had closed by ``now``, as (datetime, o, h, l, c) - at most 50."""
+    bars = [(datetime.datetime.strptime(c[0], "%Y.%m.%d %H:%M:%S"), *c[1:]) for c in load_candles(name, rows=400)]
+    return [c for c in bars if c[0] + datetime.timedelta(minutes=period) <= now][-50:]
+
+# --- Tests
+def test_rolling_windows_hold_trailing_bars():
+    strat = run_capture()
+    ref = load_candles("EURUSD_M15_bt.csv", rows=1000)
+    assert strat.seen[0][0] == 15  # ATR(14) minperiod
+    for n, window in strat.seen:
+        expected = ref[max(0, n - 50): n]
+        assert [c[1:] for c in window] == [c[1:] for c in expected]
+        assert window[-1][0].strftime("%Y.%m.%d %H:%M:%S") == expected[-1][0]
+
+
+def test_resampled_windows_hold_closed_bars_only():
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(csv_feed(os.path.join(DATA_DIR, "EURUSD_M15_bt.csv"), 15, todate=TODATE))
+    cerebro.addstrategy(ResampledCapture, print_signals=False, resample=(60, 30))
+    strat = cerebro.run()[0]
+    assert len(strat.seen) == len(strat.data_ltf) - 14 and len(strat.seen[-1][1]) == 50
+    for last, htf, mtf in strat.seen[::7]:
+        now = last + datetime.timedelta(minutes=15)
+        assert htf == closed_bars("EURUSD_H1_bt.csv", now, 60)
+        assert mtf == closed_bars("EURUSD_M30_bt.csv", now, 30)
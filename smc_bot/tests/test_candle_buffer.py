@@ -0,0 +1,81 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from candle_data import fixtures, windows
+from smc.detectors import (
+    CandleBuffer, detect_bos, detect_choch, detect_fvg, detect_orderblock, liquidity_sweep,
+    premium_discount_zone, session_high_low, swing_points, to_epoch,
+)
+from smc.SMCStrategyCore import SMCStrategyCore
+
+
+def dated(candles):
+    return [(datetime.datetime.strptime(c[0], "%Y.%m.%d %H:%M:%S"), *c[1:]) for c in candles]
+
+
+def fvg_or_error(prices):
+    try:
+        return detect_fvg(prices)
+    except IndexError:
+        return "IndexError"
+
+# --- Tests
+def test_ring_keeps_the_newest_bars_in_contiguous_views():
+    buf = CandleBuffer(4)
+    for i in range(11):
+        buf.append_bar(i * 60, i, i + 0.5, i - 0.5, i + 0.25)
+        assert len(buf) == min(i + 1, 4)
+        np.testing.assert_array_equal(buf.time, [k * 60 for k in range(max(0, i - 3), i + 1)])
+        assert buf.close.flags.c_contiguous
+    assert buf[-1] == (datetime.datetime(1970, 1, 1, 0, 10), 10.0, 10.5, 9.5, 10.25)
+    assert buf[0][1] == 7.0
+    with pytest.raises(IndexError):
+        buf[4]
+
+    view = buf[1:3]
+    assert isinstance(view, CandleBuffer) and len(view) == 2
+    assert np.shares_memory(view.high, buf.high)
+    assert list(view) == list(buf)[1:3]
+    assert len(buf[5:]) == 0
+    with pytest.raises(TypeError):
+        view.append_bar(0, 1, 1, 1, 1)
+
+
+def test_time_conversions():
+    t = datetime.datetime(2023, 1, 2, 3, 45)
+    expected = 1672631100
+    assert to_epoch(t) == expected
+    assert to_epoch(pd.Timestamp(t)) == expected
+    assert to_epoch(np.datetime64(t)) == expected
+    assert to_epoch("2023.01.02 03:45:00") == expected
+    assert to_epoch(expected) == expected
+    assert to_epoch(t.replace(tzinfo=datetime.timezone(datetime.timedelta(hours=2)))) == expected - 7200
+
+
+def test_detectors_match_tuple_lists():
+    for candles in fixtures():
+        candles = dated(candles)
+        buf = CandleBuffer(50)
+        core = SMCStrategyCore(look_back=2)
+        for t, w in windows(candles, 50):
+            buf.append(candles[t])
+            assert list(buf) == w
+            for lb in (1, 2, 3):
+                assert swing_points(buf, lb) == swing_points(w, lb)
+                assert detect_bos(buf, lb) == detect_bos(w, lb)
+                assert detect_choch(buf, lb) == detect_choch(w, lb)
+            for side in ("bull", "bear"):
+                assert detect_orderblock(buf, side) == detect_orderblock(w, side)
+                if len(w) >= 2:
+                    assert liquidity_sweep(buf, side, asian_levels=(w[0][2], w[0][3])) == \
+                        liquidity_sweep(w, side, asian_levels=(w[0][2], w[0][3]))
+            assert fvg_or_error(buf) == fvg_or_error(w)
+            for session in ("asia", "london", "ny"):
+                assert session_high_low(buf, session) == session_high_low(w, session)
+            assert premium_discount_zone(buf) == premium_discount_zone(w)
+            if len(w) >= 12:
+                kwargs = dict(atr_value=1.0, atr_thresh=0.0, look_back=2)
+                assert core.on_new_candles(buf, [], buf, **kwargs) == core.on_new_candles(w, [], w, **kwargs)
@@ -0,0 +1,41 @@
+import datetime
+import os
+
+import pytest
+
+pytest.importorskip("backtrader")
+
+from candle_data import DATA_DIR
+from compare_performance import compare
+
+TODATE = datetime.datetime(2023, 1, 20)
+
+
+def watchlist(tmp_path):
+    def sym(name, files, comprs):
+        entry = {"name": name, "log": str(tmp_path / f"trade_log_{name.lower()}.csv")}
+        for tf, fname, compr in zip(("htf", "mtf", "ltf"), files, comprs):
+            entry[tf] = os.path.join(DATA_DIR, fname)
+            entry[f"{tf}_compr"] = compr
+        return entry
+
+    return [
+        sym("EURUSD", ("EURUSD_H1_bt.csv", "EURUSD_M30_bt.csv", "EURUSD_M15_bt.csv"), (60, 30, 15)),
+        sym("MISSING", ("nope_H1.csv", "nope_M30.csv", "nope_M15.csv"), (60, 30, 15)),
+        sym("XAUUSD", ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv"), (30, 15, 15)),
+    ]
+
+# --- Tests
+def test_parallel_matches_sequential(tmp_path):
+    syms = watchlist(tmp_path)
+    out = tmp_path / "performance_comparison.csv"
+    seq = compare(syms, jobs=1, out=None, todate=TODATE)
+    xau_log = open(syms[2]["log"]).read()
+    os.remove(syms[2]["log"])
+
+    par = compare(syms, jobs=2, out=str(out), todate=TODATE)
+    assert list(par["Symbol"]) == ["EURUSD", "XAUUSD"]
+    assert par.equals(seq)
+    assert out.exists()
+    assert int(par.loc[1, "Total Trades"]) > 0
+    assert open(syms[2]["log"]).read() == xau_log
@@ -0,0 +1,54 @@
+import datetime
+import os
+
+import pytest
+
+bt = pytest.importorskip("backtrader")
+
+from bridges.bt_feeds import csv_feed
+from bridges.bt_wrapper import SMCBacktraderWrapper
+from candle_data import DATA_DIR
+from fast_backtest import run_files
+
+TODATE = datetime.datetime(2023, 2, 1)
+CASES = {
+    "EURUSD": ([("EURUSD_H1_bt.csv", 60), ("EURUSD_M30_bt.csv", 30), ("EURUSD_M15_bt.csv", 15)],
+               dict(look_back=2, atr_thresh=0.0005, trailing_atr_mult=1.0)),
+    "XAUUSD": ([("XAUUSD_30m_bt.csv", 30), ("XAUUSD_15m_bt.csv", 15), ("XAUUSD_15m_bt.csv", 15)],
+               dict(look_back=2, atr_thresh=0.3, trailing_atr_mult=1.5)),
+}
+
+
+def run_backtrader(files, **params):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.set_cash(10000)
+    for name, compression in files:
+        cerebro.adddata(csv_feed(os.path.join(DATA_DIR, name), compression, todate=TODATE))
+    cerebro.addstrategy(SMCBacktraderWrapper, print_signals=False, **params)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+    strat = cerebro.run()[0]
+    return strat, cerebro.broker.getvalue()
+
+def run_fast(files, **params):
+    return run_files(*[os.path.join(DATA_DIR, name) for name, _ in files], todate=TODATE, **params)
+
+# --- Tests
+@pytest.mark.parametrize("symbol", sorted(CASES))
+def test_parity_with_backtrader(symbol):
+    files, params = CASES[symbol]
+    strat, value = run_backtrader(files, **params)
+    res = run_fast(files, **params)
+    ref = strat.analyzers.trades.get_analysis()
+
+    assert res["trades"] and res["trades"] == strat.trades
+    assert res["final_value"] == pytest.approx(value, abs=1e-9)
+    a = res["analysis"]
+    assert a["total"]["total"] == ref.total.total
+    assert a["total"]["closed"] == ref.total.closed
+    assert a["won"]["total"] == ref.won.total
+    assert a["lost"]["total"] == ref.lost.total
+    assert a["pnl"]["net"]["total"] == pytest.approx(ref.pnl.net.total, abs=1e-9)
+
+def test_core_signals_match_batch_signals():
+    files, params = CASES["XAUUSD"]
+    assert run_fast(files, batch=False, **params) == run_fast(files, **params)
@@ -0,0 +1,86 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from feeds import cache_path, load_cached, load_csv
+
+SOURCE = os.path.join(DATA_DIR, "EURUSD_M15_bt.csv")
+
+
+def copy_source(tmp_path, lines=400):
+    path = tmp_path / "EURUSD_M15_bt.csv"
+    with open(SOURCE) as src, open(path, "w") as dst:
+        for _, line in zip(range(lines), src):
+            dst.write(line)
+    return str(path)
+
+# --- Tests
+def test_cache_round_trip(tmp_path):
+    path = copy_source(tmp_path)
+    ref = load_csv(path)
+    first = load_cached(path)
+    assert os.path.exists(cache_path(path))
+    again = load_cached(path)
+    for a, b, c in zip(ref, first, again):
+        np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(a, c)
+    assert isinstance(again.time, np.memmap)
+    assert not again.close.flags.writeable
+
+
+def test_cache_is_keyed_by_content(tmp_path):
+    path = copy_source(tmp_path)
+    old = cache_path(path)
+    load_cached(path)
+    with open(path, "a") as f:
+        f.write("2030.01.01,00:00:00,1.5,1.6,1.4,1.55\n")
+    assert cache_path(path) != old
+    fresh = load_cached(path)
+    assert len(fresh) == len(load_csv(path))
+    assert fresh.close[-1] == 1.55
+
+
+def test_cache_dir_override(tmp_path):
+    path = copy_source(tmp_path)
+    load_cached(path, cache_dir=str(tmp_path / "elsewhere"))
+    assert os.listdir(tmp_path / "elsewhere")
+    assert not os.path.exists(tmp_path / ".feed_cache")
+
+
+def test_epoch2num_matches_backtrader():
+    bt = pytest.importorskip("backtrader")
+    from bridges.bt_feeds import epoch2num
+
+    ohlc = load_csv(SOURCE).between(todate=datetime.datetime(2023, 2, 1))
+    assert epoch2num(ohlc.time) == [bt.date2num(d) for d in ohlc.datetimes()]
+
+
+def test_array_feed_matches_csv_feed(tmp_path):
+    bt = pytest.importorskip("backtrader")
+    from bridges.bt_feeds import ArrayFeed, csv_feed
+
+    path = copy_source(tmp_path, lines=1000)
+    todate = datetime.datetime(2023, 1, 15)
+
+    def bars(feed):
+        cerebro = bt.Cerebro(stdstats=False)
+        cerebro.adddata(feed)
+
+        class Record(bt.Strategy):
+            def __init__(self):
+                self.rows = []
+
+            def next(self):
+                d = self.data
+                self.rows.append((d.datetime[0], d.open[0], d.high[0], d.low[0], d.close[0]))
+
+        cerebro.addstrategy(Record)
+        return cerebro.run()[0].rows
+
+    ref = bars(csv_feed(path, 15, todate=todate))
+    ours = bars(ArrayFeed(dataname=load_cached(path), timeframe=bt.TimeFrame.Minutes,
+                          compression=15, todate=todate))
+    assert ref and ours == ref
@@ -0,0 +1,42 @@
+from candle_data import fixtures, windows
+from smc.detectors import detect_bos, detect_fvg, detect_orderblock
+from smc.instrument import DetectorStats
+from smc.SMCStrategyCore import SMCStrategyCore
+
+NAMES = ["htf_bias", "orderblock_bull", "orderblock_bear", "fvg", "bos", "choch"]
+
+
+def run(core, candles):
+    return [core.on_new_candles(w, [], w, atr_value=1.0, atr_thresh=0.0, look_back=2)
+            for _, w in windows(candles, 50) if len(w) >= 10]
+
+# --- Tests
+def test_stats_count_calls_and_hits():
+    for candles in fixtures():
+        seen = []
+        stats = DetectorStats(on_record=lambda name, secs, hit: seen.append((name, bool(hit))))
+        signals = run(SMCStrategyCore(look_back=2, stats=stats), candles)
+        assert signals == run(SMCStrategyCore(look_back=2), candles)
+
+        snap = stats.snapshot()
+        assert list(snap) == NAMES
+        assert all(s["calls"] == len(signals) for s in snap.values())
+        assert all(s["total_s"] > 0 for s in snap.values())
+
+        ltf = [w for _, w in windows(candles, 50) if len(w) >= 10]
+        assert snap["orderblock_bull"]["hits"] == sum(detect_orderblock(w, "bull") is not None for w in ltf)
+        assert snap["fvg"]["hits"] == sum(detect_fvg(w) is not None for w in ltf)
+        assert snap["bos"]["hits"] == sum(detect_bos(w, 2) for w in ltf)
+        assert snap["bos"]["hit_rate"] == snap["bos"]["hits"] / len(ltf)
+
+        assert len(seen) == len(signals) * len(NAMES)
+        assert sum(hit for name, hit in seen if name == "fvg") == snap["fvg"]["hits"]
+
+
+def test_reset_and_report():
+    stats = DetectorStats()
+    run(SMCStrategyCore(look_back=2, stats=stats), fixtures()[0])
+    report = stats.report().splitlines()
+    assert len(report) == len(NAMES) + 1
+    stats.reset()
+    assert stats.snapshot() == {}
@@ -0,0 +1,72 @@
+import datetime
+import os
+
+import numpy as np
+
+from candle_data import DATA_DIR
+from fast_backtest import run_fast_backtest, run_files
+from feeds import OHLC, load_cached
+from intrabar import STOP, TARGET, SubBarIndex
+
+TODATE = datetime.datetime(2023, 3, 1)
+FILES = [os.path.join(DATA_DIR, name) for name in ("EURUSD_H1_bt.csv", "EURUSD_M30_bt.csv", "EURUSD_M30_bt.csv")]
+M15 = os.path.join(DATA_DIR, "EURUSD_M15_bt.csv")
+PARAMS = dict(atr_thresh=0.0005, look_back=2, max_retests=8)
+
+
+def ohlc(rows):
+    cols = np.array(rows, dtype=np.float64).T
+    return OHLC(cols[0].astype(np.int64), *cols[1:])
+
+
+# one 60s bar at t=0 split into three 20s sub-bars, then a bar with no sub-bars
+BARS = ohlc([(0, 10, 14, 6, 10), (60, 10, 11, 9, 10)])
+SUB = ohlc([(0, 10, 11, 9, 10.5), (20, 10.5, 14, 10, 13), (40, 13, 13, 6, 7)])
+
+# --- Tests
+def test_sub_bars_are_indexed_per_bar():
+    index = SubBarIndex(BARS, SUB)
+    assert index.span(0) == (0, 3) and index.span(1) == (3, 3)
+
+
+def test_first_touch_in_time_order_decides():
+    index = SubBarIndex(BARS, SUB)
+    assert index.first_exit(0, 1, stop=8, target=12) == (20, 12, TARGET)
+    assert index.first_exit(0, 1, stop=9.5, target=12) == (0, 9.5, STOP)
+    assert index.first_exit(0, -1, stop=12, target=8) == (20, 12, STOP)
+    assert index.first_exit(0, 1, stop=5, target=20) is None
+    # no target resting: NaN and None alike
+    assert index.first_exit(0, 1, stop=8, target=float("nan")) == (40, 8, STOP)
+    assert index.first_exit(0, -1, stop=None, target=7) == (40, 7, TARGET)
+    # sub-bars before the entry are not walked
+    assert index.first_exit(0, 1, stop=9.5, target=13.5, after=20) == (20, 13.5, TARGET)
+
+
+def test_gaps_fill_at_the_open_and_both_levels_fill_at_the_stop():
+    index = SubBarIndex(BARS, SUB)
+    assert index.first_exit(0, 1, stop=13.5, target=20, after=40) == (40, 13, STOP)
+    assert index.first_exit(0, -1, stop=20, target=13.5, after=40) == (40, 13, TARGET)
+    assert index.first_exit(0, -1, stop=20, target=11, after=40) == (40, 11, TARGET)
+    assert SubBarIndex(BARS, ohlc([(0, 10, 14, 6, 10)])).first_exit(0, 1, stop=7, target=13) == (0, 7, STOP)
+    # a bar with no sub-bars is walked on its own OHLC
+    assert index.first_exit(1, -1, stop=10.5, target=5) == (60, 10.5, STOP)
+
+
+def test_engine_exits_inside_the_sub_bars():
+    feeds = [load_cached(p).between(None, TODATE) for p in FILES]
+    sub = load_cached(M15)
+    base = run_fast_backtest(*feeds, **PARAMS)
+    assert run_fast_backtest(*feeds, intrabar=None, **PARAMS) == base
+
+    res = run_files(*FILES, todate=TODATE, intrabar_path=M15, **PARAMS)
+    assert res["analysis"]["total"]["closed"] > 0
+    bars = {int(t): (lo, hi) for t, lo, hi in zip(sub.time.tolist(), sub.low.tolist(), sub.high.tolist())}
+    on_sub = 0
+    for t in res["trades"]:
+        key = int((t["datetime"] - datetime.datetime(1970, 1, 1)).total_seconds())
+        if key in bars:
+            lo, hi = bars[key]
+            assert lo - 1e-9 <= t["price"] <= hi + 1e-9
+            on_sub += 1
+    assert on_sub > 0
+    assert any(t["datetime"].minute % 30 for t in res["trades"])
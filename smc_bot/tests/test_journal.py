@@ -0,0 +1,88 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from fast_backtest import run_files
+from journal import (
+    JOURNAL_MAGIC, RECORD, TradeJournal, export_csv, merge_partitions, partition, read_journal, to_frame,
+)
+
+FILES = [os.path.join(DATA_DIR, name) for name in ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv")]
+TODATE = datetime.datetime(2023, 1, 20)
+T0 = datetime.datetime(2024, 1, 1)
+
+# --- Tests
+def test_fills_stream_in_batches_and_survive_a_torn_tail(tmp_path):
+    path = str(tmp_path / "run.fills")
+    journal = TradeJournal(path, batch=3)
+    for i in range(4):
+        journal.record(T0 + datetime.timedelta(minutes=i), "buy" if i % 2 == 0 else "sell", 100.0 + i, 1)
+    # one full batch is on disk, the fourth fill is still buffered
+    assert os.path.getsize(path) == len(JOURNAL_MAGIC) + 3 * RECORD.itemsize
+    journal.close()
+    assert len(read_journal(path)) == 4
+
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02")            # crash mid-record
+    assert len(read_journal(path)) == 4
+    with TradeJournal(path) as journal:
+        journal.record(T0 + datetime.timedelta(minutes=9), "sell", 99.5, -0.5)
+    records = read_journal(path)
+    assert records["price"].tolist() == [100.0, 101.0, 102.0, 103.0, 99.5]
+    assert records["side"].tolist() == [1, -1, 1, -1, -1]
+    assert to_frame(path)["datetime"].iloc[-1] == T0 + datetime.timedelta(minutes=9)
+
+    with open(str(tmp_path / "bad.fills"), "wb") as f:
+        f.write(b"notafill")
+    with pytest.raises(ValueError):
+        TradeJournal(str(tmp_path / "bad.fills"))
+
+
+def test_partitions_merge_by_time_in_chunks(tmp_path):
+    rng = np.random.default_rng(5)
+    expected = []
+    for k in range(3):
+        times = np.sort(rng.integers(0, 10_000, 50))
+        with partition(str(tmp_path / "parts"), f"run{k}", batch=7, tag=k) as journal:
+            for t in times.tolist():
+                journal.record(t, "buy", float(t), 1)
+                expected.append((t, k))
+    out = str(tmp_path / "all.journal")
+    assert merge_partitions(str(tmp_path / "parts"), out, chunk=4) == 150
+    merged = read_journal(out)
+    assert list(zip(merged["time"].tolist(), merged["tag"].tolist())) == sorted(expected)
+
+
+def test_fast_backtest_journal_matches_the_trade_list(tmp_path):
+    plain = run_files(*FILES, todate=TODATE, atr_thresh=0.3)
+    path = str(tmp_path / "fast.fills")
+    with TradeJournal(path, batch=16) as journal:
+        streamed = run_files(*FILES, todate=TODATE, atr_thresh=0.3, journal=journal)
+    assert streamed["trades"] == [] and streamed["final_value"] == plain["final_value"]
+    records = read_journal(path)
+    assert len(records) == len(plain["trades"]) > 0
+    assert records["price"].tolist() == [t["price"] for t in plain["trades"]]
+    assert records["size"].tolist() == [t["size"] for t in plain["trades"]]
+
+
+def test_compare_exports_the_same_logs_from_journals(tmp_path):
+    pytest.importorskip("backtrader")
+    from compare_performance import compare
+    from test_compare_performance import watchlist
+
+    syms = [s for s in watchlist(tmp_path) if s["name"] != "MISSING"]
+    compare(syms, jobs=1, out=None, todate=TODATE)
+    assert not os.path.exists(syms[0]["log"])     # no EURUSD fills at this atr_thresh
+    logs = [None, open(syms[1]["log"]).read()]
+    os.remove(syms[1]["log"])
+    compare(syms, jobs=2, out=None, todate=TODATE, journal_dir=str(tmp_path / "journals"))
+    assert not os.path.exists(syms[0]["log"])
+    assert open(syms[1]["log"]).read() == logs[1]
+    assert sorted(os.listdir(tmp_path / "journals")) == ["EURUSD.fills", "XAUUSD.fills"]
+    assert set(read_journal(str(tmp_path / "journals" / "XAUUSD.fills"))["tag"].tolist()) == {1}
+
+    export_csv(str(tmp_path / "journals" / "XAUUSD.fills"), str(tmp_path / "again.csv"))
+    assert open(tmp_path / "again.csv").read() == logs[1]
@@ -0,0 +1,73 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from fast_backtest import bt_atr
+from feeds import load_cached
+from smc.labels import label_outcomes, label_signals
+from smc.SMCStrategyCore import SMCStrategyCore
+
+
+def loop_label(high, low, close, i, d, entry, stop, target, max_bars):
+    """One signal, bar by bar."""
+    n = len(high)
+    end = n if max_bars is None else min(n, i + 1 + max_bars)
+    hi, lo = -math.inf, math.inf
+    for j in range(i + 1, end):
+        hi, lo = max(hi, high[j]), min(lo, low[j])
+        stopped = low[j] <= stop if d > 0 else high[j] >= stop
+        reached = high[j] >= target if d > 0 else low[j] <= target
+        if stopped or reached:
+            return (-1 if stopped else 1), j, (stop if stopped else target), hi, lo
+    if end <= i + 1:
+        return 0, i, math.nan, hi, lo
+    return 0, end - 1, close[end - 1], hi, lo
+
+
+def check(high, low, close, index, direction, entry, stop, target, max_bars):
+    labels = label_outcomes(high, low, index, direction, entry, stop, target, max_bars=max_bars, close=close)
+    for k, (i, d) in enumerate(zip(index, direction)):
+        outcome, j, price, hi, lo = loop_label(high, low, close, i, d, entry[k], stop[k], target[k], max_bars)
+        assert labels["outcome"][k] == outcome
+        assert labels["exit_idx"][k] == j and labels["bars"][k] == j - i
+        assert labels["exit_price"][k] == price or (math.isnan(price) and math.isnan(labels["exit_price"][k]))
+        if j > i:
+            assert labels["mfe"][k] == (hi - entry[k] if d > 0 else entry[k] - lo)
+            assert labels["mae"][k] == (entry[k] - lo if d > 0 else hi - entry[k])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                r = (price - entry[k]) * d / abs(entry[k] - stop[k])
+            assert labels["r"][k] == pytest.approx(r, nan_ok=True)
+        else:
+            assert math.isnan(labels["mfe"][k]) and math.isnan(labels["mae"][k])
+
+# --- Tests
+@pytest.mark.parametrize("max_bars", [None, 1, 7, 64])
+def test_random_walk_matches_a_bar_loop(max_bars):
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(size=700)).round(1)
+    high = close + rng.integers(0, 4, 700) * 0.1
+    low = close - rng.integers(0, 4, 700) * 0.1
+    index = np.sort(rng.choice(700, 300))
+    direction = rng.choice([-1, 1], 300)
+    entry = close[index]
+    risk = rng.integers(1, 40, 300) * 0.1
+    stop = entry - direction * risk
+    target = entry + direction * risk * rng.choice([1, 2, 3], 300)
+    index[-1] = 699            # no bars after the signal
+    check(high, low, close, index, direction, entry, stop, target, max_bars)
+
+
+def test_strategy_signals_on_real_bars():
+    ltf = load_cached(os.path.join(DATA_DIR, "XAUUSD_15m_bt.csv")).between(None, "2023-03-01")
+    atr = bt_atr(ltf.high, ltf.low, ltf.close)
+    signals = SMCStrategyCore(look_back=2).signals_batch(ltf.open, ltf.high, ltf.low, ltf.close, atr, atr_thresh=0.3)
+    labels = label_signals(signals, ltf.high, ltf.low, ltf.close, max_bars=96)
+    index = labels["index"]
+    assert len(index) > 100
+    assert set(np.unique(labels["outcome"])) <= {-1, 0, 1}
+    sig = signals["signal"][index]
+    check(ltf.high, ltf.low, ltf.close, index, sig, signals["entry"][index], signals["stop"][index],
+          signals["target"][index], 96)
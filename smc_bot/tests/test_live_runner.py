@@ -0,0 +1,152 @@
+import asyncio
+import datetime
+import os
+
+import pytest
+
+from candle_data import DATA_DIR
+from fake_mt5 import FakeMT5
+from feeds import load_cached
+from live_runner import EPOCH, BarWindow, DailyRiskManager, LiveRunner, timeframe_seconds
+from mt5_replay import FEEDS, ReplayMT5, run_replay, run_watchlist
+from smc.SMCStrategyCore import SMCStrategyCore
+
+HTF = load_cached(os.path.join(DATA_DIR, "EURUSD_H1_bt.csv"))
+LTF = load_cached(os.path.join(DATA_DIR, "EURUSD_M15_bt.csv"))
+START = 300
+
+
+class RecordingCore(SMCStrategyCore):
+    def __init__(self, fake, **kwargs):
+        super().__init__(**kwargs)
+        self.fake = fake
+        self.seen = []
+
+    def on_new_candles(self, candles_htf, candles_mtf, candles_ltf, **kwargs):
+        self.seen.append((self.fake.now, list(candles_htf), list(candles_ltf)))
+        return super().on_new_candles(candles_htf, candles_mtf, candles_ltf, **kwargs)
+
+
+def closed_candles(ohlc, period, now, count):
+    end = sum(1 for t in ohlc.time.tolist() if t + period <= now)
+    return list(zip(ohlc.datetimes()[:end], ohlc.open[:end].tolist(), ohlc.high[:end].tolist(),
+                    ohlc.low[:end].tolist(), ohlc.close[:end].tolist()))[-count:]
+
+
+def make_runner(atr_thresh=100.0, **kwargs):
+    fake = FakeMT5({FakeMT5.TIMEFRAME_H1: HTF, FakeMT5.TIMEFRAME_M15: LTF}, now=int(LTF.time[START]) + 60)
+    core = RecordingCore(fake, look_back=2)
+    runner = LiveRunner(fake, core, DailyRiskManager(), symbol="EURUSD", htf=fake.TIMEFRAME_H1, ltf=fake.TIMEFRAME_M15,
+                        atr_thresh=atr_thresh, settle=0.0, grace=1.0, sleep=fake.sleep, clock=fake.clock,
+                        log=lambda msg: None, **kwargs)
+    return fake, core, runner
+
+
+def replay_specs(*names):
+    """``run_watchlist`` entries for FEEDS symbols, with their files under DATA_DIR."""
+    specs = []
+    for name in names:
+        spec = dict(FEEDS[name])
+        for tf in ("htf", "ltf"):
+            timeframe, path = spec[tf]
+            spec[tf] = (timeframe, os.path.join(DATA_DIR, os.path.basename(path)))
+        specs.append((name, spec))
+    return specs
+
+
+class SeenCore(SMCStrategyCore):
+    def __init__(self, seen):
+        super().__init__(lot_size=0.1, look_back=2, max_retests=8, atr_thresh=0.01)
+        self.seen = seen
+
+    def on_new_candles(self, candles_htf, candles_mtf, candles_ltf, **kwargs):
+        signal = super().on_new_candles(candles_htf, candles_mtf, candles_ltf, **kwargs)
+        self.seen.append((candles_htf[-1], candles_ltf[-1], signal["signal"]))
+        return signal
+
+# --- Tests
+def test_runner_wakes_at_bar_close_with_rolling_windows():
+    fake, core, runner = make_runner()
+    asyncio.run(runner.run(max_bars=40))
+    assert runner.bars == 40 and len(core.seen) == 40
+
+    for k, (now, htf, ltf) in enumerate(core.seen):
+        assert ltf == closed_candles(LTF, 900, now, 100)
+        assert htf == closed_candles(HTF, 3600, now, 100)
+        close = (ltf[-1][0] - EPOCH).total_seconds() + 900
+        if k and (ltf[-1][0] - core.seen[k - 1][2][-1][0]).total_seconds() == 900:
+            assert now == close + 1.0   # woke at the close, plus grace
+
+    # only the first fetch per timeframe pulls the whole window
+    counts = [args[3] for name, args in fake.calls if name == "copy_rates_from_pos" and args[1] == fake.TIMEFRAME_M15]
+    assert counts[0] == 100 and set(counts[1:]) == {2}
+
+
+def test_fetch_catches_up_after_a_gap():
+    fake, _, _ = make_runner()
+    window = BarWindow("EURUSD", fake.TIMEFRAME_M15, 100)
+    window.fetch(fake)
+    fake.now += 12 * 900
+    assert window.fetch(fake) == 12
+    assert list(window.candles) == closed_candles(LTF, 900, fake.now, 100)
+    assert window.fetch(fake) == 0
+
+
+def test_timeframe_lengths():
+    mt5 = ReplayMT5
+    lengths = [timeframe_seconds(tf) for tf in (mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M15, mt5.TIMEFRAME_H1,
+                                                mt5.TIMEFRAME_H4, mt5.TIMEFRAME_D1, mt5.TIMEFRAME_W1)]
+    assert lengths == [60, 900, 3600, 4 * 3600, 86400, 7 * 86400]
+    with pytest.raises(ValueError):
+        timeframe_seconds(mt5.TIMEFRAME_MN1)
+
+
+def test_signals_send_orders_through_the_executor():
+    fake, core, runner = make_runner(atr_thresh=0.0)
+    asyncio.run(runner.run(max_bars=5))
+    assert fake.orders
+    sent_at, request = fake.orders[0]
+    assert request["symbol"] == "EURUSD" and request["volume"] > 0
+    if request["type"] == fake.ORDER_TYPE_BUY:
+        assert request["sl"] < request["tp"]
+    else:
+        assert request["sl"] > request["tp"]
+    assert runner.risk.day_trades == len(fake.orders)
+
+
+def test_resampled_htf_matches_the_fetched_bars():
+    fake, core, runner = make_runner(resample=True)
+    asyncio.run(runner.run(max_bars=40))
+    assert runner.htf is None and len(core.seen) == 40
+    for now, htf, ltf in core.seen:
+        assert ltf == closed_candles(LTF, 900, now, 100)
+        assert htf == closed_candles(HTF, 3600, now, 100)
+    # one timeframe fetched; the first pull covers the HTF window
+    fetched = {args[1] for name, args in fake.calls if name == "copy_rates_from_pos"}
+    counts = [args[3] for name, args in fake.calls if name == "copy_rates_from_pos"]
+    assert fetched == {fake.TIMEFRAME_M15} and counts[0] == 400 and set(counts[1:]) == {2}
+
+
+def test_engine_decides_each_symbol_as_it_would_alone():
+    specs = replay_specs("EURUSD", "XAUUSD")
+    fromdate, todate = datetime.datetime(2023, 1, 4, 6), datetime.datetime(2023, 1, 6, 12)
+    seen = {name: [] for name, _ in specs}
+    cores = iter([SeenCore(seen["EURUSD"]), SeenCore(seen["XAUUSD"])])
+    both = run_watchlist(specs, fromdate, todate, core=lambda: next(cores))
+    for name, _ in specs:
+        alone = []
+        res = run_replay(name, fromdate, todate, feeds=dict(specs), core=SeenCore(alone))
+        assert both["bars"][name] == res["bars"] == len(both["latencies"][name]) > 200
+        assert seen[name] == alone
+    # both M15 feeds close together: one batched fetch serves the pair (plus polls while a bar is late)
+    assert both["wakeups"] < 0.7 * sum(both["bars"].values())
+    # the H1 window is only asked for once an H1 bar is due
+    one = run_watchlist(specs[:1], fromdate, todate)
+    assert one["rate_calls"] < 1.5 * one["bars"]["EURUSD"]
+
+
+def test_engine_shares_one_risk_manager():
+    specs = replay_specs("EURUSD", "XAUUSD")
+    kwargs = dict(fromdate=datetime.datetime(2023, 1, 4, 6), todate=datetime.datetime(2023, 1, 4, 20), atr_thresh=0.0)
+    assert run_watchlist(specs, **kwargs)["orders"] > 2
+    assert run_watchlist(specs, risk={"max_trades": 1}, **kwargs)["orders"] == 1
@@ -0,0 +1,80 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from fast_backtest import run_files
+from journal import TradeJournal
+from montecarlo import _paths, load_fills, run_log, simulate, simulate_chunk, summarize, trade_pnl
+
+FILES = [os.path.join(DATA_DIR, name) for name in ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv")]
+TODATE = datetime.datetime(2023, 1, 20)
+
+
+def path_metrics(pnl, cash):
+    """max_dd, max_dd_pct, min_equity, final of one ordering, trade by trade."""
+    equity = peak = low = cash
+    dd = dd_pct = 0.0
+    for p in pnl:
+        equity += p
+        peak = max(peak, equity)
+        low = min(low, equity)
+        dd = max(dd, peak - equity)
+        dd_pct = max(dd_pct, (peak - equity) / peak)
+    return dd, dd_pct, low, equity
+
+# --- Tests
+def test_round_trips_match_the_engine_pnl(tmp_path):
+    res = run_files(*FILES, todate=TODATE, atr_thresh=0.3)
+    path = str(tmp_path / "fast.fills")
+    with TradeJournal(path) as journal:
+        for t in res["trades"]:
+            journal.record(t["datetime"], t["type"], t["price"], t["size"])
+    pnl = trade_pnl(*load_fills(path))
+    assert len(pnl) == res["analysis"]["total"]["closed"] > 0
+    assert pnl.sum() == pytest.approx(res["analysis"]["pnl"]["net"]["total"])
+    # flips through flat, partial exits, and a position left open
+    assert trade_pnl([10, 12, 20, 15, 15, 16, 30], [2, -2, -1, 0.5, 0.5, 1, -0.5]).tolist() == [4.0, 5.0]
+
+
+@pytest.mark.parametrize("method", ["shuffle", "bootstrap"])
+def test_paths_match_a_trade_loop(method):
+    pnl = np.random.default_rng(1).normal(0.5, 40, 300)
+    out = simulate_chunk(pnl, 40, 9, method, cash=1000.0, batch=40)
+    paths = _paths(pnl, np.random.default_rng(9), method, 40)
+    for k, path in enumerate(paths):
+        expected = path_metrics(path.tolist(), 1000.0)
+        got = [out[name][k] for name in ("max_dd", "max_dd_pct", "min_equity", "final")]
+        assert got == pytest.approx(expected)
+    if method == "shuffle":
+        assert np.allclose(out["final"], 1000.0 + pnl.sum())
+    assert (simulate_chunk(pnl, 40, 9, method, cash=1000.0, batch=7)["max_dd"] > 0).all()
+
+
+def test_results_depend_on_the_seed_not_the_jobs():
+    pnl = np.random.default_rng(2).normal(0.2, 10, 500)
+    one = simulate(pnl, 9000, "bootstrap", jobs=1, seed=4)
+    two = simulate(pnl, 9000, "bootstrap", jobs=2, seed=4)
+    assert len(one["final"]) == 9000
+    for name in one:
+        np.testing.assert_array_equal(one[name], two[name])
+    with pytest.raises(ValueError):
+        simulate(pnl, 10, "jackknife")
+    with pytest.raises(ValueError):
+        simulate(pnl, 0, "bootstrap")
+
+
+def test_summary_reports_ruin_and_loss_odds(tmp_path):
+    results = {"max_dd": np.array([10.0, 600.0]), "max_dd_pct": np.array([0.01, 0.6]),
+               "min_equity": np.array([990.0, 400.0]), "final": np.array([1100.0, 900.0])}
+    summary = summarize(results, cash=1000.0, ruin_levels=(0.25, 0.6, 0.7))
+    assert summary["ruin"] == {"25%": 0.5, "60%": 0.5, "70%": 0.0}
+    assert summary["p_loss"] == 0.5 and summary["max_dd"]["p50"] == 305.0
+
+    log = str(tmp_path / "log.csv")
+    with open(log, "w") as f:
+        f.write("datetime,type,price,size\n2024-01-01 00:00:00,buy,100,1\n2024-01-01 01:00:00,sell,90,-1\n")
+    report = run_log(log, sims=50, cash=10.0, jobs=1, seed=0)
+    assert report["shuffle"]["trades"] == 1 and report["shuffle"]["ruin"]["50%"] == 1.0
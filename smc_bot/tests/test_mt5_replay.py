@@ -0,0 +1,109 @@
+import asyncio
+import datetime
+import os
+import time
+
+import numpy as np
+
+from candle_data import DATA_DIR
+from feeds import load_cached
+from live_runner import EPOCH
+from mt5_replay import FEEDS, ReplayMT5, run_replay
+
+H1 = load_cached(os.path.join(DATA_DIR, "EURUSD_H1_bt.csv"))
+M15 = load_cached(os.path.join(DATA_DIR, "EURUSD_M15_bt.csv"))
+TEST_FEEDS = {"EURUSD": {**FEEDS["EURUSD"],
+                         "htf": ("H1", os.path.join(DATA_DIR, "EURUSD_H1_bt.csv")),
+                         "ltf": ("M15", os.path.join(DATA_DIR, "EURUSD_M15_bt.csv"))}}
+
+
+def replay(bar, **kwargs):
+    mt5 = ReplayMT5(int(M15.time[bar]) + 60, **kwargs)
+    mt5.add_symbol("EURUSD", {mt5.TIMEFRAME_H1: H1, mt5.TIMEFRAME_M15: M15}, digits=5, contract_size=100000.0)
+    return mt5
+
+# --- Tests
+def test_rates_and_ticks_follow_the_clock():
+    mt5 = replay(200)
+    rates = mt5.copy_rates_from_pos("EURUSD", mt5.TIMEFRAME_M15, 1, 3)
+    np.testing.assert_array_equal(rates["time"], M15.time[197:200])
+    np.testing.assert_array_equal(rates["close"], M15.close[197:200])
+    assert mt5.copy_rates_from_pos("EURUSD", mt5.TIMEFRAME_M15, 0, 1)["time"][0] == M15.time[200]
+    assert mt5.symbol_info_tick("EURUSD").bid == M15.open[200]
+    assert mt5.copy_rates_from_pos("GBPUSD", mt5.TIMEFRAME_M15, 1, 3) is None
+
+    asyncio.run(mt5.sleep(900))
+    assert mt5.copy_rates_from_pos("EURUSD", mt5.TIMEFRAME_M15, 1, 1)["time"][0] == M15.time[200]
+
+
+def test_orders_fill_and_stop_out_against_bars():
+    mt5 = replay(200)
+    entry = float(M15.open[200])
+    # stop just under the first bar's low: hit when that bar closes
+    sl = float(M15.low[200]) + 1e-5
+    res = mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": "EURUSD", "volume": 0.1,
+                          "type": mt5.ORDER_TYPE_BUY, "price": entry, "sl": sl, "tp": entry + 1.0})
+    assert res.retcode == mt5.TRADE_RETCODE_DONE and res.price == entry
+    assert len(mt5.positions_get(symbol="EURUSD")) == 1
+
+    asyncio.run(mt5.sleep(900))
+    assert mt5.positions_get(symbol="EURUSD") == ()
+    now = EPOCH + datetime.timedelta(seconds=int(mt5.clock()))
+    deals = mt5.history_deals_get(now - datetime.timedelta(days=1), now, group="EURUSD")
+    assert [d.entry for d in deals] == [mt5.DEAL_ENTRY_IN, mt5.DEAL_ENTRY_OUT]
+    assert deals[1].price == sl
+    assert abs(deals[1].profit - (sl - entry) * 0.1 * 100000.0) < 1e-6
+    assert mt5.account_info().balance == 10000.0 + deals[1].profit
+
+
+def test_discrete_clock_wakes_earliest_sleeper_first():
+    mt5 = replay(200)
+    start = mt5.clock()
+    order = []
+
+    async def sleeper(name, seconds):
+        await mt5.sleep(seconds)
+        order.append((name, mt5.clock() - start))
+
+    async def main():
+        await asyncio.gather(sleeper("late", 900), sleeper("early", 30))
+
+    asyncio.run(main())
+    assert order == [("early", 30), ("late", 900)]
+
+
+def test_replay_runs_the_live_loop_over_every_bar():
+    res = run_replay("EURUSD", todate=datetime.datetime(2023, 1, 10), feeds=TEST_FEEDS, atr_thresh=0.0)
+    start = int(M15.time[100]) + 900
+    expected = int(np.sum((M15.time + 900 > start) & (M15.time + 900 <= 1673308800))) + 1
+    assert res["bars"] == expected == len(res["latencies"])
+    assert res["orders"] >= 1
+    assert res["virtual_s"] > 0
+    assert all(lat > 0 for lat in res["latencies"])
+
+
+def test_clock_holds_while_a_broker_call_runs():
+    mt5 = replay(200)
+    start = mt5.clock()
+    seen = []
+
+    def slow_call():
+        seen.append(mt5.clock())
+        time.sleep(0.05)
+        seen.append(mt5.clock())
+        return mt5.copy_rates_from_pos("EURUSD", mt5.TIMEFRAME_M15, 1, 1)
+
+    async def worker(executor):
+        loop = asyncio.get_running_loop()
+        rates = await loop.run_in_executor(executor, slow_call)
+        seen.append(mt5.clock())
+        return rates
+
+    async def main():
+        with mt5.executor() as executor:
+            rates, _ = await asyncio.gather(worker(executor), mt5.sleep(900))
+        return rates
+
+    rates = asyncio.run(main())
+    assert seen == [start, start, start] and mt5.clock() == start + 900
+    assert rates["time"][0] == M15.time[199]
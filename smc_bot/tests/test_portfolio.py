@@ -0,0 +1,71 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from fast_backtest import run_files
+from journal import read_journal
+from portfolio import run_portfolio
+
+TODATE = datetime.datetime(2023, 3, 1)
+PARAMS = dict(look_back=2, max_retests=8)
+
+
+def sym(name, files, atr_thresh):
+    entry = {"name": name, "params": {"atr_thresh": atr_thresh}}
+    for tf, fname in zip(("htf", "mtf", "ltf"), files):
+        entry[tf] = os.path.join(DATA_DIR, fname)
+    return entry
+
+
+EURUSD = sym("EURUSD", ("EURUSD_H1_bt.csv", "EURUSD_M30_bt.csv", "EURUSD_M15_bt.csv"), 0.0005)
+XAUUSD = sym("XAUUSD", ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv"), 0.3)
+
+
+def alone(s, cash):
+    return run_files(s["htf"], s["mtf"], s["ltf"], todate=TODATE, cash=cash, **PARAMS, **s["params"])
+
+
+def fills_of(res, name):
+    return [{k: v for k, v in t.items() if k != "symbol"} for t in res["trades"] if t["symbol"] == name]
+
+# --- Tests
+def test_one_symbol_matches_the_single_engine():
+    ref = alone(XAUUSD, 10000.0)
+    res = run_portfolio([XAUUSD], PARAMS, cash=10000.0, todate=TODATE)
+    assert fills_of(res, "XAUUSD") == ref["trades"]
+    assert res["final_value"] == pytest.approx(ref["final_value"])
+    assert res["symbols"]["XAUUSD"]["analysis"] == ref["analysis"]
+    assert res["steps"] == ref["steps"]
+
+
+def test_symbols_with_ample_cash_trade_as_they_would_alone():
+    cash = 1e9
+    res = run_portfolio([EURUSD, XAUUSD], PARAMS, cash=cash, todate=TODATE)
+    refs = [alone(s, cash) for s in (EURUSD, XAUUSD)]
+    for s, ref in zip((EURUSD, XAUUSD), refs):
+        assert fills_of(res, s["name"]) == ref["trades"] and ref["trades"]
+    assert res["final_value"] - cash == pytest.approx(sum(r["final_value"] - cash for r in refs))
+
+    times, values = res["equity"]
+    assert (np.diff(times) > 0).all() and values[-1] == res["final_value"]
+    peak = np.maximum(np.maximum.accumulate(values), cash)
+    assert res["max_drawdown"] == (peak - values).max() > 0
+
+
+def test_shared_cash_and_open_cap_bind_across_symbols(tmp_path):
+    res = run_portfolio([EURUSD, XAUUSD], PARAMS, cash=10000.0, max_open=1, todate=TODATE,
+                        journal_dir=str(tmp_path))
+    assert res["skipped"] > 0 and res["trades"] == []
+    fills = {name: read_journal(str(tmp_path / f"{name}.fills")) for name in ("EURUSD", "XAUUSD")}
+    assert set(fills["XAUUSD"]["tag"].tolist()) == {1}
+    # replay both fill streams in time order: at most one symbol is ever in a position
+    events = sorted((t, k, size) for k, f in enumerate(fills.values())
+                    for t, size in zip(f["time"].tolist(), f["size"].tolist()))
+    position = [0.0, 0.0]
+    for t, k, size in events:
+        position[k] += size
+        assert sum(abs(p) > 1e-9 for p in position) <= 1
+    assert len(fills["EURUSD"]) and len(fills["XAUUSD"])
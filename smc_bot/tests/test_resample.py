@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR
+from feeds import load_cached
+from smc.resample import Resampler
+
+M15 = load_cached(os.path.join(DATA_DIR, "EURUSD_M15_bt.csv")).between(None, "2023-03-01")
+H1 = load_cached(os.path.join(DATA_DIR, "EURUSD_H1_bt.csv")).between(None, "2023-03-01")
+M30 = load_cached(os.path.join(DATA_DIR, "EURUSD_M30_bt.csv")).between(None, "2023-03-01")
+
+
+def rows(buf):
+    return list(zip(buf.time.tolist(), buf.open.tolist(), buf.high.tolist(), buf.low.tolist(), buf.close.tolist()))
+
+
+def file_rows(ohlc, end):
+    return list(zip(ohlc.time[:end].tolist(), ohlc.open[:end].tolist(), ohlc.high[:end].tolist(),
+                    ohlc.low[:end].tolist(), ohlc.close[:end].tolist()))
+
+# --- Tests
+def test_m15_resamples_to_the_h1_and_m30_files():
+    r = Resampler(900, [3600, 1800], size=len(M15))
+    assert r.extend_arrays(*M15) == len(r.windows[0]) + len(r.windows[1])
+    for buf, ohlc, period in zip(r.windows, (H1, M30), (3600, 1800)):
+        end = np.searchsorted(ohlc.time, M15.time[-1] + 900 - period, "right")
+        assert rows(buf) == file_rows(ohlc, end)
+
+
+def test_bars_appear_when_their_last_base_bar_closes():
+    r = Resampler(900, [3600], size=5000)
+    for t, bar in enumerate(zip(*(col.tolist() for col in M15))):
+        r.update_bar(*bar)
+        now = bar[0] + 900          # the moment this M15 bar closed
+        closed = np.searchsorted(H1.time, now - 3600, "right")
+        # exactly the H1 bars closed by now, none still forming
+        assert len(r.windows[0]) == closed
+        forming = r.forming()
+        if forming is not None:
+            assert int(H1.time[closed]) == bar[0] - bar[0] % 3600
+            assert forming[2] == max(M15.high[np.searchsorted(M15.time, H1.time[closed]):t + 1])
+        if t > 400:
+            break
+    assert r.update_bar(*(col[0] for col in M15)) == 0     # stale bars are ignored
+
+
+def test_a_missing_last_bar_closes_the_bucket_on_the_next_one():
+    r = Resampler(900, [3600], size=10)
+    r.update_bar(0, 1.0, 2.0, 0.5, 1.5)
+    r.update_bar(900, 1.5, 3.0, 1.0, 2.5)
+    assert not len(r.windows[0])
+    assert r.update_bar(7200, 2.5, 2.6, 2.4, 2.45) == 1    # 0:30, 0:45 and the 1:00 hour missing
+    assert rows(r.windows[0]) == [(0, 1.0, 3.0, 0.5, 2.5)]
+    assert r.forming()[1:] == (2.5, 2.6, 2.4, 2.45)
+    with pytest.raises(ValueError):
+        Resampler(900, [1000])
+
+
+def test_a_feed_starting_mid_bucket_drops_the_partial_first_bar():
+    i = int(np.flatnonzero(M15.time % 3600 == 1800)[0])         # e.g. 10:30, half an hour into its H1
+    r = Resampler(900, [3600, 1800], size=len(M15))
+    r.update_bar(*(col[i] for col in M15))
+    assert r.forming(0) is None and r.forming(1)[1] == M15.open[i]   # the M30 bucket is whole
+    r.extend_arrays(*(col[i + 1:] for col in M15))
+    h1, m30 = rows(r.windows[0]), rows(r.windows[1])
+    assert h1[0][0] == M15.time[i] - 1800 + 3600                # starts at the next full hour
+    j = int(np.searchsorted(H1.time, h1[0][0]))
+    assert h1 == file_rows(H1, j + len(h1))[j:]
+    k = int(np.searchsorted(M30.time, M15.time[i]))
+    assert m30 == file_rows(M30, k + len(m30))[k:]
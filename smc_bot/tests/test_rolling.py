@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from candle_data import fixtures, random_candles
+from smc.detectors import CandleBuffer, liquidity_sweep, premium_discount_zone
+from smc.rolling import RollingMax, RollingMin, rolling_max, rolling_min
+
+
+def window_max(a, k):
+    return np.array([a[max(0, t - k + 1):t + 1].max() for t in range(len(a))])
+
+# --- Tests
+@pytest.mark.parametrize("k", [1, 2, 3, 7, 30, 199, 200, 2000])
+def test_series_and_incremental_extremes_match_a_rescan(k):
+    a = np.round(np.random.default_rng(k).normal(size=200), 1)     # rounding forces ties
+    np.testing.assert_array_equal(rolling_max(a, k), window_max(a, k))
+    np.testing.assert_array_equal(rolling_min(a, k), -window_max(-a, k))
+    hi, lo = RollingMax(k), RollingMin(k)
+    assert hi.value is None
+    assert [hi.push(x) for x in a] == window_max(a, k).tolist()
+    assert [lo.push(x) for x in a] == (-window_max(-a, k)).tolist()
+    assert len(hi._q) <= k
+
+
+def test_ring_buffer_detectors_match_list_windows():
+    for candles in fixtures() + [random_candles(500)]:
+        buf = CandleBuffer(60)
+        seen = []
+        for c in candles:
+            buf.append(c)
+            seen.append(c)
+            kept = seen[-60:]
+            if len(kept) < 2:
+                continue
+            for window in (2, 30, 59, 60, 200):
+                for side in ("bull", "bear"):
+                    assert liquidity_sweep(buf, side, window) == liquidity_sweep(kept, side, window)
+            for window in (None, 1, 50, 500):
+                assert premium_discount_zone(buf, window) == premium_discount_zone(kept, window)
+        assert len(buf._trackers) == 2 * 4 + 2 * 3
+
+
+def test_view_extremes_are_computed_without_trackers():
+    buf = CandleBuffer.from_candles(random_candles(100))
+    view = buf[-40:]
+    assert liquidity_sweep(view, "bull", 30) == liquidity_sweep(list(view), "bull", 30)
+    assert premium_discount_zone(view) == premium_discount_zone(list(view))
+    assert view._trackers is None
+    assert buf.extreme("high", 10, skip=100) is None
@@ -0,0 +1,121 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from candle_data import DATA_DIR, fixtures, windows
+from fast_backtest import run_files
+from feeds import load_cached
+from smc.detectors import CandleBuffer, detect_bos, detect_choch, detect_fvg, detect_orderblock
+from smc.scanner import SignalScanner
+from smc.SMCStrategyCore import SMCStrategyCore
+
+XAUUSD = [os.path.join(DATA_DIR, name) for name in ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv")]
+
+
+def inside_bar(cols):
+    return len(cols.close) > 1 and cols.high[-1] < cols.high[-2] and cols.low[-1] > cols.low[-2]
+
+
+def inside_bar_batch(open_, high, low, close, window):
+    flags = np.zeros(len(close), dtype=bool)
+    if window > 1:
+        flags[1:] = (high[1:] < high[:-1]) & (low[1:] > low[:-1])
+    return flags
+
+
+def up_bar(cols):
+    return cols.close[-1] > cols.open[-1]
+
+
+def last_gap(cols):
+    if len(cols.high) > 2 and cols.low[-1] > cols.high[-3]:
+        return {"side": "bull"}
+    return None
+
+
+def tuned(**kw):
+    return SignalScanner(look_back=3, ob_depth=5, fvg_lookback=4, stop_bars=3, **kw)
+
+
+SCANNERS = {
+    "look_back=1": lambda: SignalScanner(look_back=1),
+    "tuned": tuned,
+    "bos replaced": lambda: SignalScanner(look_back=1).add("bos", up_bar),
+    "fvg replaced": lambda: tuned().add("fvg", last_gap),
+}
+
+
+def outcome(fn, *args):
+    try:
+        return fn(*args)
+    except IndexError:
+        return "IndexError"
+
+# --- Tests
+@pytest.mark.parametrize("wrap", [list, CandleBuffer.from_candles])
+@pytest.mark.parametrize("look_back", [1, 2, 3])
+def test_scan_matches_the_detectors(wrap, look_back):
+    scanner = SignalScanner(look_back=look_back)
+    for candles in fixtures():
+        for _, w in windows(candles, 50):
+            prices = wrap(w)
+            scan = outcome(scanner.scan, prices)
+            if outcome(detect_fvg, w) == "IndexError":
+                assert scan == "IndexError"
+                continue
+            assert scan["orderblock_bull"] == detect_orderblock(w, "bull")
+            assert scan["orderblock_bear"] == detect_orderblock(w, "bear")
+            assert scan["fvg"] == detect_fvg(w)
+            assert scan["bos"] == detect_bos(w, look_back)
+            assert scan["choch"] == detect_choch(w, look_back)
+            assert scan["entry"] == w[-1][3]
+            assert scan["stop_long"] == min(c[2] for c in w[-5:])
+            assert scan["stop_short"] == max(c[1] for c in w[-5:])
+
+
+def test_plugins_join_the_scan_and_can_trigger():
+    w = fixtures()[0][:60]
+    scanner = SignalScanner().add("last_up", lambda cols: cols.close[-1] > cols.open[-1], side="bear")
+    core = SMCStrategyCore(scanner=scanner)
+    scan = scanner.scan(w)
+    assert scan["last_up"] == (w[-1][4] > w[-1][1])
+
+    always = SignalScanner()
+    for name in ("orderblock_bull", "orderblock_bear", "fvg", "bos", "choch"):
+        always.detectors[name] = lambda cols: None
+    always.add("always", lambda cols: True, side="bear")
+    signal = SMCStrategyCore(scanner=always).get_entry(w, None, False, 1.0, atr_thresh=0.0)
+    assert signal["signal"] == "short" and signal["zone_type"] == "always"
+    assert signal["stop"] == max(c[1] for c in w[-5:])
+    assert core.get_entry(w, None, False, 1.0, atr_thresh=0.0)["signal"] in ("long", "short")
+
+
+@pytest.mark.parametrize("batch", [inside_bar_batch, None])
+def test_plugin_triggers_reach_the_batch_signals(batch):
+    def run(scanner, batched):
+        core = SMCStrategyCore(look_back=2, max_retests=8, atr_thresh=0.3, session_only=False, scanner=scanner)
+        return run_files(*XAUUSD, todate=datetime.datetime(2023, 1, 20), core=core, batch=batched, look_back=2,
+                         atr_thresh=0.3)
+
+    plain = run(SignalScanner(look_back=2), True)
+    scanner = SignalScanner(look_back=2).add("inside_bar", inside_bar, side="bear", batch=batch)
+    res = run(scanner, True)
+    assert res == run(scanner, False)
+    assert res["trades"] != plain["trades"]
+
+
+@pytest.mark.parametrize("make", SCANNERS.values(), ids=SCANNERS.keys())
+def test_batch_signals_follow_a_non_default_scanner(make):
+    ltf = load_cached(XAUUSD[1]).between(None, "2023-03-01")
+    o, h, l, c = (col[:300] for col in (ltf.open, ltf.high, ltf.low, ltf.close))
+    candles = list(zip(ltf.time[:300].tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist()))
+    core = SMCStrategyCore(look_back=2, scanner=make())
+    res = core.signals_batch(o, h, l, c, np.ones(300), atr_thresh=0.0)
+    codes = {"long": 1, "short": -1, "flat": 0}
+    for t in range(49, 300):
+        signal = core.get_entry(candles[t - 49:t + 1], None, False, 1.0, atr_thresh=0.0)
+        assert res["signal"][t] == codes[signal["signal"]]
+        if signal["signal"] != "flat":
+            assert res["stop"][t] == signal["stop"] and res["entry"][t] == signal["entry"]
@@ -0,0 +1,92 @@
+import datetime
+
+import pytest
+
+from candle_data import load_candles
+from smc.detectors import CandleBuffer, session_high_low, to_epoch
+from smc.sessions import SessionIndex
+
+
+def dated(candles):
+    return [(datetime.datetime.strptime(c[0], "%Y.%m.%d %H:%M:%S"), *c[1:]) for c in candles]
+
+
+def session_key(name, t):
+    """Reference trading-day key of the default session ``t`` falls in, or None."""
+    if name == "asia":
+        return (t + datetime.timedelta(hours=3)).date() if t.hour >= 21 or t.hour < 7 else None
+    if name == "london":
+        return t.date() if 7 <= t.hour < 12 else None
+    return t.date() if 12 <= t.hour < 20 else None
+
+# --- Tests
+def test_current_and_previous_match_a_per_day_rescan():
+    candles = dated(load_candles("EURUSD_M15_bt.csv", rows=1500))
+    index = SessionIndex(history=3)
+    seen = {name: [] for name in index.sessions}        # name -> [(key, hi, lo)]
+    for t, c in enumerate(candles):
+        index.update(c)
+        for name, ranges in seen.items():
+            key = session_key(name, c[0])
+            if key is not None:
+                if ranges and ranges[-1][0] == key:
+                    _, hi, lo = ranges[-1]
+                    ranges[-1] = (key, max(hi, c[2]), min(lo, c[3]))
+                else:
+                    ranges.append((key, c[2], c[3]))
+            cur, prev = index.current(name), index.previous(name)
+            if not ranges:
+                assert cur is None
+                continue
+            assert (cur.high, cur.low) == ranges[-1][1:]
+            if len(ranges) > 1:
+                assert (prev.high, prev.low) == ranges[-2][1:]
+            else:
+                assert prev is None
+    assert index.previous("asia", back=3) is not None and index.previous("asia", back=4) is None
+
+
+def test_a_day_window_agrees_with_session_high_low():
+    candles = dated(load_candles("EURUSD_M15_bt.csv", rows=1500))
+    index = SessionIndex()
+    for t, c in enumerate(candles):
+        index.update(c)
+        if c[0].hour == 20 and c[0].minute == 0:
+            # 12:00-20:00 today only holds NY bars of this one session
+            day = [k for k in candles[:t + 1] if k[0].date() == c[0].date() and 12 <= k[0].hour < 20]
+            assert index.levels("ny") == session_high_low(day, "ny")
+            buf = CandleBuffer.from_candles(day)
+            assert index.levels("ny") == session_high_low(buf, "ny")
+            assert index.active() == []
+
+
+def test_levels_wait_for_the_session_to_close():
+    index = SessionIndex()
+    start = datetime.datetime(2024, 3, 4, 21)
+    for i in range(10 * 4):     # 21:00 -> 06:45
+        t = start + datetime.timedelta(minutes=15 * i)
+        index.update((t, 1.0, 1.0 + i, 1.0 - i, 1.0))
+    assert index.active() == ["asia"]
+    assert index.levels("asia") == (None, None)
+    assert index.levels("asia", complete=False) == (40.0, -38.0)
+    index.update((datetime.datetime(2024, 3, 5, 7), 1.0, 100.0, -100.0, 1.0))
+    assert index.active() == ["london"]
+    assert index.levels("asia") == (40.0, -38.0)
+    rng = index.current("asia")
+    assert (rng.bars, rng.start, rng.end) == (40, to_epoch(start), to_epoch(datetime.datetime(2024, 3, 5, 7)))
+
+
+def test_bounds_and_timezones_are_configurable():
+    # London 08:00-16:30 local on UTC bar stamps: 07:00-15:30 UTC in summer, 08:00-16:30 in winter
+    index = SessionIndex(sessions={"ldn": ("08:00", "16:30")}, tz="Europe/London", bar_tz="UTC")
+    for day, first_utc in ((datetime.date(2024, 7, 1), 7), (datetime.date(2024, 12, 2), 8)):
+        for i in range(24 * 2):
+            t = datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(minutes=30 * i)
+            index.update((t, 0.0, float(i), float(-i), 0.0))
+        rng = index.current("ldn")
+        assert rng.start == to_epoch(datetime.datetime.combine(day, datetime.time(first_utc)))
+        assert rng.bars == 17
+        assert (rng.high, rng.low) == (first_utc * 2 + 16.0, -(first_utc * 2 + 16.0))
+
+    with pytest.raises(ValueError):
+        SessionIndex(sessions={"x": ("8h", 9)})
@@ -1,14 +1,57 @@
+import datetime
+
+import pytest
+
+from candle_data import load_candles
 from smc.strategy import SMCStrategyCore
-from smc.detectors import Candle
+from smc.detectors import Candle, CandleBuffer
+
+
+def stamp(rows, minutes) -> list[Candle]:
+    t0 = datetime.datetime(2024, 1, 1, 8)
+    return [(t0 + datetime.timedelta(minutes=minutes * i), *row) for i, row in enumerate(rows)]
+
 
-def test_strategy_signal():
+def dated(candles):
+    return [(datetime.datetime.strptime(c[0], "%Y.%m.%d %H:%M:%S"), *c[1:]) for c in candles]
+
+
+@pytest.mark.parametrize("wrap", [list, CandleBuffer.from_candles])
+def test_strategy_signal(wrap):
     # Fake 30m/15m uptrend, bullish 5m OB
-    c_30 = [(1, 1.1, 0.9, 1.05), (1.05, 1.2, 1, 1.18), (1.18, 1.25, 1.15, 1.24)]
-    c_15 = [(1, 1.1, 0.95, 1.06), (1.06, 1.16, 1.02, 1.13), (1.13, 1.22, 1.11, 1.20)]
-    c_5 = [
-        (10,11.5,9.5,11.2),   # green OB
-        (11.2,11.3,8,8.5)
-    ]
+    c_30 = stamp([(1, 1.1, 0.9, 1.05), (1.05, 1.2, 1, 1.18), (1.18, 1.25, 1.15, 1.24)], 30)
+    c_15 = stamp([(1, 1.1, 0.95, 1.06), (1.06, 1.16, 1.02, 1.13), (1.13, 1.22, 1.11, 1.20)], 15)
+    c_5 = stamp([(10, 10.1, 9.9, 10)] * 10 + [
+        (10, 10.05, 9.8, 9.85),   # red OB candle
+        (9.85, 10.3, 9.84, 10.25)  # bullish engulf of its high
+    ], 5)
     strat = SMCStrategyCore()
-    signal = strat.on_new_candles(c_30, c_15, c_5)
+    signal = strat.on_new_candles(wrap(c_30), wrap(c_15), wrap(c_5))
     assert signal["signal"] in ("long", "flat")
+
+
+def test_htf_bias_cache_recomputes_once_per_htf_bar():
+    h1 = dated(load_candles("EURUSD_H1_bt.csv", rows=300))
+    m15 = dated(load_candles("EURUSD_M15_bt.csv", rows=1100))
+    cached, plain = SMCStrategyCore(look_back=2), SMCStrategyCore(look_back=2, cache_htf=False)
+    htf = CandleBuffer(50)
+    j = 0
+    steps, windows_seen = 0, set()
+    for t in range(20, len(m15)):
+        # HTF bars that have closed by the close of this LTF bar
+        while j < len(h1) and h1[j][0] + datetime.timedelta(hours=1) <= m15[t][0] + datetime.timedelta(minutes=15):
+            htf.append(h1[j])
+            j += 1
+        if len(htf) < 10:
+            continue
+        ltf = m15[t - 19:t + 1]
+        kwargs = dict(atr_value=1.0, atr_thresh=0.0, look_back=2)
+        assert cached.on_new_candles(htf, [], ltf, **kwargs) == plain.on_new_candles(htf, [], ltf, **kwargs)
+        assert cached.htf_bias(htf, 2) == plain.get_htf_bias(htf, 2)
+        steps += 1
+        windows_seen.add(j)
+    info = cached.htf_cache_info()
+    assert info["misses"] == len(windows_seen)
+    assert info["hits"] + info["misses"] == 2 * steps
+    assert info["hit_rate"] > 0.8
+    assert plain.htf_cache_info()["hits"] == 0
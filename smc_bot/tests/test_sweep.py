@@ -0,0 +1,54 @@
+import csv
+import datetime
+import os
+
+import pytest
+
+from candle_data import DATA_DIR
+from fast_backtest import run_files
+from sweep import run_sweep, summarize
+
+FILES = [os.path.join(DATA_DIR, name) for name in ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv")]
+TODATE = datetime.datetime(2023, 1, 20)
+GRID = {"look_back": [1, 2], "trailing_atr_mult": [1.0, 2.0]}
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+# --- Tests
+def test_sweep_streams_rows_and_resumes(tmp_path):
+    out = str(tmp_path / "results.csv")
+    assert run_sweep(*FILES, grid=GRID, out=out, jobs=2, todate=TODATE, fixed={"atr_thresh": 0.3}, verbose=False) == 4
+    rows = read_rows(out)
+    assert len(rows) == 4
+    for row in rows:
+        params = {"look_back": int(row["look_back"]), "trailing_atr_mult": float(row["trailing_atr_mult"])}
+        ref = summarize(run_files(*FILES, todate=TODATE, atr_thresh=0.3, **params))
+        assert float(row["final_value"]) == ref["final_value"]
+        assert int(row["total_trades"]) == ref["total_trades"]
+
+    # Nothing left to do, then only the dropped combination is redone
+    assert run_sweep(*FILES, grid=GRID, out=out, jobs=2, todate=TODATE, fixed={"atr_thresh": 0.3}, verbose=False) == 0
+    with open(out, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows[1:])
+    assert run_sweep(*FILES, grid=GRID, out=out, jobs=2, todate=TODATE, fixed={"atr_thresh": 0.3}, verbose=False) == 1
+    assert sorted(map(str, read_rows(out))) == sorted(map(str, rows))
+
+
+def test_sweep_refuses_to_resume_a_different_run(tmp_path):
+    out = str(tmp_path / "results.csv")
+    grid = {"look_back": [2]}
+    assert run_sweep(*FILES, grid=grid, out=out, jobs=1, todate=TODATE, fixed={"atr_thresh": 0.3}, verbose=False) == 1
+    for changed in (dict(todate=TODATE, fixed={"atr_thresh": 0.5}),
+                    dict(todate=datetime.datetime(2023, 1, 19), fixed={"atr_thresh": 0.3})):
+        with pytest.raises(ValueError, match="different sweep"):
+            run_sweep(*FILES, grid=grid, out=out, jobs=1, verbose=False, **changed)
+    other_ltf = os.path.join(DATA_DIR, "EURUSD_M15_bt.csv")
+    with pytest.raises(ValueError):
+        run_sweep(*FILES[:2], other_ltf, grid=grid, out=out, jobs=1, todate=TODATE, fixed={"atr_thresh": 0.3},
+                  verbose=False)
+    assert len(read_rows(out)) == 1
@@ -0,0 +1,37 @@
+from smc.detectors import detect_bos, detect_choch, detect_orderblock, detect_fvg, swing_points
+from smc.tracker import StructureTracker
+from candle_data import fixtures, windows
+
+
+def reference(window, lb):
+    try:
+        fvg = detect_fvg(window)
+    except IndexError:  # too short to scan
+        fvg = None
+    return {
+        "bos": detect_bos(window, lb),
+        "choch": detect_choch(window, lb),
+        "ob_bull": detect_orderblock(window, "bull"),
+        "ob_bear": detect_orderblock(window, "bear"),
+        "fvg": fvg,
+    }
+
+# --- Tests
+def test_tracker_matches_detectors():
+    for candles in fixtures():
+        for lb, size in ((1, 50), (2, 50), (3, 100)):
+            tracker = StructureTracker(look_back=lb, window=size)
+            for t, w in windows(candles, size):
+                state = tracker.update(candles[t]).snapshot()
+                assert {k: state[k] for k in ("bos", "choch", "ob_bull", "ob_bear", "fvg")} == reference(w, lb), (lb, t)
+
+def test_tracker_last_swings():
+    candles = fixtures()[0]
+    tracker = StructureTracker(look_back=2)
+    for c in candles:
+        tracker.update(c)
+    highs, lows = swing_points(candles, 2)
+    last_hi = max(i for i, x in enumerate(highs) if x)
+    last_lo = max(i for i, x in enumerate(lows) if x)
+    assert tracker.swing_high == (last_hi, candles[last_hi][2])
+    assert tracker.swing_low == (last_lo, candles[last_lo][3])
@@ -0,0 +1,70 @@
+import numpy as np
+
+from smc.detectors import (
+    swing_points, detect_bos, detect_choch, detect_orderblock,
+    detect_fvg, liquidity_sweep, premium_discount_zone, session_high_low
+)
+from smc.vectorized import (
+    swing_points_batch, detect_bos_batch, detect_choch_batch, detect_orderblock_batch,
+    detect_fvg_batch, liquidity_sweep_batch, premium_discount_zone_batch,
+    session_high_low_batch, BULL, BEAR
+)
+from candle_data import columns, fixtures, windows
+
+
+# --- Tests
+def test_swing_points_match_full_history():
+    for candles in fixtures():
+        _, h, l, _ = columns(candles)
+        for lb in (1, 2, 3):
+            hi, lo = swing_points_batch(h, l, lb)
+            ref_hi, ref_lo = swing_points(candles, lb)
+            assert hi.tolist() == ref_hi and lo.tolist() == ref_lo
+
+def test_structure_matches_trailing_window():
+    for candles in fixtures():
+        o, h, l, c = columns(candles)
+        for lb in (1, 2, 3):
+            bos = detect_bos_batch(h, l, c, lb, window=50)
+            choch = detect_choch_batch(l, c, lb, window=50)
+            for t, w in windows(candles, 50):
+                assert bos[t] == detect_bos(w, lb), (lb, t)
+                assert choch[t] == detect_choch(w, lb), (lb, t)
+
+def test_zones_match_trailing_window():
+    for candles in fixtures():
+        o, h, l, c = columns(candles)
+        obs = {side: detect_orderblock_batch(o, h, l, c, side) for side in ("bull", "bear")}
+        fvg = detect_fvg_batch(h, l)
+        for t, w in windows(candles, 50):
+            for side, ob in obs.items():
+                ref = detect_orderblock(w, side)
+                got = (int(ob["idx"][t]), ob["open"][t], ob["close"][t]) if ob["idx"][t] >= 0 else None
+                assert got == ref, (side, t)
+            try:
+                ref = detect_fvg(w)
+            except IndexError:  # too short to scan
+                ref = None
+            if ref is None:
+                assert fvg["side"][t] == 0, t
+            else:
+                assert fvg["side"][t] == (BULL if ref["side"] == "bull" else BEAR)
+                assert (fvg["upper"][t], fvg["lower"][t], fvg["idx"][t]) == (ref["upper"], ref["lower"], ref["idx"])
+
+def test_ranges_match_trailing_window():
+    for candles in fixtures():
+        o, h, l, c = columns(candles)
+        hours = np.array([int(x[0][11:13]) for x in candles])
+        bull = liquidity_sweep_batch(h, l, "bull")
+        bear = liquidity_sweep_batch(h, l, "bear")
+        pd_hi, pd_lo, pd_eq = premium_discount_zone_batch(c)
+        asia_hi, asia_lo = session_high_low_batch(hours, h, l, "asia", window=200)
+        for t, w in windows(candles, 50):
+            if t > 0:
+                assert bull[t] == liquidity_sweep(w, "bull")
+                assert bear[t] == liquidity_sweep(w, "bear")
+            assert (pd_hi[t], pd_lo[t], pd_eq[t]) == premium_discount_zone(w)
+        for t, w in windows(candles, 200):
+            ref_hi, ref_lo = session_high_low(w, "asia")
+            assert (None if np.isnan(asia_hi[t]) else asia_hi[t]) == ref_hi
+            assert (None if np.isnan(asia_lo[t]) else asia_lo[t]) == ref_lo
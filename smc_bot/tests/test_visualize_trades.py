@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from candle_data import DATA_DIR
+from feeds import load_cached
+from journal import TradeJournal
+from visualize_trades import chart_data, chart_path, downsample, load_trades, nearest_bars, trade_markers
+
+PRICES = os.path.join(DATA_DIR, "XAUUSD_15m_bt.csv")
+
+
+def pandas_markers(df, trades):
+    """The original per-trade marker loop."""
+    trades = trades[(trades["datetime"] >= df.index.min()) & (trades["datetime"] <= df.index.max())]
+    buy, sell = np.full(len(df), np.nan), np.full(len(df), np.nan)
+    for _, row in trades.iterrows():
+        i = df.index.get_indexer([row["datetime"]], method="nearest")[0]
+        if row["type"] == "buy":
+            buy[i] = df["Low"].iloc[i]
+        else:
+            sell[i] = df["High"].iloc[i]
+    return buy, sell
+
+
+def random_trades(ohlc, n, seed):
+    rng = np.random.default_rng(seed)
+    lo, hi = int(ohlc.time[0]) - 3600, int(ohlc.time[-1]) + 3600
+    times = np.sort(rng.integers(lo, hi, n))
+    times[:10] = ohlc.time[5] + 450       # exactly between two 15m bars
+    return times, rng.random(n) < 0.5
+
+# --- Tests
+def test_markers_match_the_pandas_loop():
+    ohlc = load_cached(PRICES).between("2023-02-01", "2023-02-10")
+    times, is_buy = random_trades(ohlc, 300, 2)
+    df = pd.DataFrame({"Low": ohlc.low, "High": ohlc.high},
+                      index=pd.DatetimeIndex(ohlc.time.astype("datetime64[s]")))
+    trades = pd.DataFrame({"datetime": times.astype("datetime64[s]"), "type": np.where(is_buy, "buy", "sell")})
+    buy, sell = trade_markers(ohlc, times, is_buy)
+    expected_buy, expected_sell = pandas_markers(df, trades)
+    np.testing.assert_array_equal(buy, expected_buy)
+    np.testing.assert_array_equal(sell, expected_sell)
+    assert nearest_bars(ohlc.time, times[:1])[0] == 6
+
+
+def test_downsample_merges_bars_and_markers():
+    ohlc = load_cached(PRICES).between("2023-02-01", "2023-02-10")
+    buy, sell = trade_markers(ohlc, *random_trades(ohlc, 40, 4))
+    merged, mbuy, msell = downsample(ohlc, buy, sell, 7)
+    assert len(merged) == -(-len(ohlc) // 7)
+    for g in range(len(merged)):
+        part = slice(7 * g, 7 * g + 7)
+        assert merged.time[g] == ohlc.time[part][0] and merged.open[g] == ohlc.open[part][0]
+        assert merged.high[g] == ohlc.high[part].max() and merged.low[g] == ohlc.low[part].min()
+        assert merged.close[g] == ohlc.close[part][-1]
+        assert (mbuy[g] == merged.low[g]) == (not np.isnan(buy[part]).all())
+        assert (msell[g] == merged.high[g]) == (not np.isnan(sell[part]).all())
+    assert downsample(ohlc, buy, sell, 1)[0] is ohlc
+
+
+def test_chart_data_reads_csv_logs_and_journals(tmp_path):
+    log = str(tmp_path / "log.csv")
+    fills = str(tmp_path / "log.fills")
+    times = np.array([1675300500, 1675300600, 1676000000, 1690000000])
+    sides = ["buy", "sell", "sell", "buy"]
+    pd.DataFrame({"datetime": times.astype("datetime64[s]"), "type": sides, "price": 1.0, "size": 1}).to_csv(
+        log, index=False)
+    with TradeJournal(fills) as journal:
+        for t, side in zip(times.tolist(), sides):
+            journal.record(t, side, 1.0, 1)
+    for path in (log, fills):
+        np.testing.assert_array_equal(load_trades(path)[0], times)
+
+    df, buy, sell, k = chart_data(PRICES, fills, "2023-02-01", "2023-02-28", max_bars=100)
+    assert k > 1 and len(df) <= 100 and len(df) == len(buy) == len(sell)
+    assert (~np.isnan(buy)).sum() == 1 and (~np.isnan(sell)).sum() == 2
+    assert chart_data(PRICES, log, "2023-02-01", "2023-02-28", max_bars=None)[3] == 1
+
+
+def test_cli_needs_a_trade_log_and_names_one_file_per_chart():
+    script = os.path.join(os.path.dirname(DATA_DIR), "visualize_trades.py")
+    run = subprocess.run([sys.executable, script, PRICES], capture_output=True, text=True)
+    assert run.returncode == 2 and "trade log is required" in run.stderr
+    assert chart_path("charts/out.png", "data/EURUSD_M15_bt.csv") == "charts/out_EURUSD.png"
+    assert chart_path("out.png", "data/XAUUSD_15m_bt.csv") == "out_XAUUSD.png"
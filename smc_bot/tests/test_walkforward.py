@@ -0,0 +1,70 @@
+import datetime
+import os
+
+import numpy as np
+
+from candle_data import DATA_DIR
+from fast_backtest import bt_atr, run_fast_backtest
+from feeds import OHLC, load_cached
+from smc.SMCStrategyCore import SMCStrategyCore
+from sweep import grid_combos, summarize
+from walkforward import DAY, make_folds, walk_forward
+
+FILES = [os.path.join(DATA_DIR, name) for name in ("XAUUSD_30m_bt.csv", "XAUUSD_15m_bt.csv", "XAUUSD_15m_bt.csv")]
+TODATE = datetime.datetime(2023, 3, 10)
+GRID = {"look_back": [1, 2], "trailing_atr_mult": [1.0, 2.0]}
+FIXED = {"atr_thresh": 0.3, "max_retests": 2}
+
+
+def reference(feeds, params, start, end):
+    """A window run on full-history ATR/triggers, built without the pool."""
+    ltf = feeds[2]
+    atr = bt_atr(ltf.high, ltf.low, ltf.close)
+    triggers = SMCStrategyCore(look_back=params["look_back"]).triggers_batch(ltf.open, ltf.high, ltf.low, ltf.close)
+    lo, hi = np.searchsorted(ltf.time, [start, end])
+    sliced = [OHLC(*(col[np.searchsorted(f.time, start):np.searchsorted(f.time, end)] for col in f)) for f in feeds]
+    return summarize(run_fast_backtest(*sliced, atr=atr[lo:hi], triggers={k: v[lo:hi] for k, v in triggers.items()},
+                                       **params))
+
+# --- Tests
+def test_folds_roll_by_the_test_window():
+    time = np.arange(0, 100 * DAY, 3600)
+    folds = make_folds(time, 30, 10)
+    assert folds[0] == (0, 30 * DAY, 40 * DAY)
+    assert folds[1] == (10 * DAY, 40 * DAY, 50 * DAY)
+    assert folds[-1][1] < time[-1] <= folds[-1][2]
+    assert make_folds(time, 200, 10) == []
+
+
+def test_precomputed_inputs_match_the_engine():
+    feeds = [load_cached(p).between(None, TODATE) for p in FILES]
+    ltf = feeds[2]
+    core = SMCStrategyCore(look_back=2)
+    plain = run_fast_backtest(*feeds, look_back=2, atr_thresh=0.3)
+    fed = run_fast_backtest(*feeds, look_back=2, atr_thresh=0.3, atr=bt_atr(ltf.high, ltf.low, ltf.close),
+                            triggers=core.triggers_batch(ltf.open, ltf.high, ltf.low, ltf.close))
+    assert fed["trades"] == plain["trades"] and fed["final_value"] == plain["final_value"]
+
+
+def test_walk_forward_picks_in_sample_best_and_chains_oos(tmp_path):
+    out = str(tmp_path / "wf.csv")
+    rows = walk_forward(*FILES, grid=GRID, train_days=20, test_days=10, todate=TODATE, fixed=FIXED,
+                        jobs=2, out=out, verbose=False)
+    feeds = [load_cached(p).between(None, TODATE) for p in FILES]
+    folds = make_folds(feeds[2].time, 20, 10)
+    assert len(rows) == len(folds) >= 3
+
+    equity = 10000.0
+    for row, (is_start, oos_start, oos_end) in zip(rows, folds):
+        combos = [{**FIXED, **c} for c in grid_combos(GRID)]
+        scores = [reference(feeds, c, is_start, oos_start)["final_value"] for c in combos]
+        best = combos[int(np.argmax(scores))]
+        assert {k: row[k] for k in GRID} == {k: best[k] for k in GRID}
+        assert row["is_final_value"] == max(scores)
+        oos = reference(feeds, best, oos_start, oos_end)
+        assert row["oos_final_value"] == oos["final_value"]
+        assert row["oos_total_trades"] == oos["total_trades"]
+        equity += oos["final_value"] - 10000.0
+        assert row["equity"] == equity
+    with open(out) as f:
+        assert len(f.readlines()) == len(rows) + 1
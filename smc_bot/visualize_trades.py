@@ -1,47 +1,134 @@
+"""
+Candlestick charts of a price file with the bot's fills marked.
+
+Prices come from the binary feed cache (``feeds.load_cached``) and only
+the requested ``start``/``end`` range becomes a DataFrame.  A range longer
+than ``max_bars`` is drawn as an overview: every ``k`` consecutive bars
+merge into one candle (first open, highest high, lowest low, last close)
+and a merged candle carries a buy/sell marker when any of its fills does.
+Fills are matched to bars with one ``searchsorted`` over all trade times
+(nearest bar, ties to the later one as ``get_indexer(method="nearest")``
+does).  Trade logs may be the CSV logs or journal ``.fills`` files.
+
+    cd smc_bot && python visualize_trades.py data/EURUSD_M15_bt.csv trade_log_eurusd.csv \\
+        --start 2024-01-01 --end 2024-02-01
+"""
+
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
-import mplfinance as mpf
-
-def plot_trades(price_csv, trade_csv, title):
-    df = pd.read_csv(price_csv)
-    df['Datetime'] = pd.to_datetime(df['DATE'] + ' ' + df['TIME'])
-    df.set_index('Datetime', inplace=True)
-    df = df[['OPEN', 'HIGH', 'LOW', 'CLOSE']].astype(float)
-    df.columns = ['Open', 'High', 'Low', 'Close']
-
-    trades = pd.read_csv(trade_csv)
-    trades['Datetime'] = pd.to_datetime(trades['datetime'])
-    trades = trades[trades['Datetime'].between(df.index.min(), df.index.max())]
-
-    buy_idx, sell_idx = [], []
-    for _, row in trades.iterrows():
-        idx = df.index.get_indexer([row['Datetime']], method='nearest')[0]
-        if row['type'] == 'buy':
-            buy_idx.append(idx)
-        elif row['type'] == 'sell':
-            sell_idx.append(idx)
 
+from feeds import OHLC, load_cached
+from journal import SUFFIX, read_journal
+
+
+def load_trades(trade_path):
+    """Fill times (int64 epoch seconds) and a buy mask from a CSV log or a journal."""
+    if trade_path.endswith(SUFFIX):
+        records = read_journal(trade_path)
+        return np.asarray(records["time"]), np.asarray(records["side"]) > 0
+    trades = pd.read_csv(trade_path, usecols=["datetime", "type"])
+    times = pd.to_datetime(trades["datetime"]).to_numpy("datetime64[s]").astype(np.int64)
+    return times, (trades["type"] == "buy").to_numpy()
+
+
+def nearest_bars(bar_time, times):
+    """Index of the bar nearest each time; equidistant times go to the later bar."""
+    right = np.clip(np.searchsorted(bar_time, times, "left"), 0, len(bar_time) - 1)
+    left = np.maximum(right - 1, 0)
+    closer_left = (times - bar_time[left]) < (bar_time[right] - times)
+    return np.where(closer_left, left, right)
+
+
+def trade_markers(ohlc, trade_time, is_buy):
+    """Per-bar marker prices: buys at the bar's low, sells at its high, NaN elsewhere."""
+    n = len(ohlc)
+    buy, sell = np.full(n, np.nan), np.full(n, np.nan)
+    if not n:
+        return buy, sell
+    inside = (trade_time >= ohlc.time[0]) & (trade_time <= ohlc.time[-1])
+    idx = nearest_bars(ohlc.time, trade_time[inside])
+    is_buy = is_buy[inside]
+    buy[idx[is_buy]] = ohlc.low[idx[is_buy]]
+    sell[idx[~is_buy]] = ohlc.high[idx[~is_buy]]
+    return buy, sell
+
+
+def downsample(ohlc, buy, sell, k):
+    """Merge every ``k`` bars (and their markers) into one; the merged bar keeps the first time."""
+    if k <= 1:
+        return ohlc, buy, sell
+    starts = np.arange(0, len(ohlc), k)
+    last = np.minimum(starts + k, len(ohlc)) - 1
+    merged = OHLC(ohlc.time[starts], ohlc.open[starts], np.maximum.reduceat(ohlc.high, starts),
+                  np.minimum.reduceat(ohlc.low, starts), ohlc.close[last])
+    has_buy = np.logical_or.reduceat(~np.isnan(buy), starts)
+    has_sell = np.logical_or.reduceat(~np.isnan(sell), starts)
+    return (merged, np.where(has_buy, merged.low, np.nan), np.where(has_sell, merged.high, np.nan))
+
+
+def chart_data(price_csv, trade_path, start=None, end=None, max_bars=1500):
+    """The candles (DataFrame), buy/sell marker arrays and bars-per-candle for one chart."""
+    ohlc = load_cached(price_csv).between(start, end)
+    buy, sell = trade_markers(ohlc, *load_trades(trade_path))
+    k = max(1, -(-len(ohlc) // max_bars)) if max_bars else 1
+    ohlc, buy, sell = downsample(ohlc, buy, sell, k)
+    df = pd.DataFrame({"Open": ohlc.open, "High": ohlc.high, "Low": ohlc.low, "Close": ohlc.close},
+                      index=pd.DatetimeIndex(ohlc.time.astype("datetime64[s]"), name="Datetime"))
+    return df, buy, sell, k
+
+
+def chart_path(out, price_csv):
+    """``out`` suffixed with the chart's symbol (the price file's first ``_`` field)."""
+    root, ext = os.path.splitext(out)
+    return f"{root}_{os.path.basename(price_csv).split('_')[0]}{ext}"
+
+
+def plot_trades(price_csv, trade_path, title, start=None, end=None, max_bars=1500, savefig=None):
+    import mplfinance as mpf
+
+    df, buy, sell, k = chart_data(price_csv, trade_path, start, end, max_bars)
     apds = []
-    if buy_idx:
-        apds.append(mpf.make_addplot([row if i in buy_idx else None for i, row in enumerate(df['Low'])],
-                                     type='scatter', markersize=80, marker='^', color='g'))
-    if sell_idx:
-        apds.append(mpf.make_addplot([row if i in sell_idx else None for i, row in enumerate(df['High'])],
-                                     type='scatter', markersize=80, marker='v', color='r'))
+    if not np.isnan(buy).all():
+        apds.append(mpf.make_addplot(buy, type='scatter', markersize=80, marker='^', color='g'))
+    if not np.isnan(sell).all():
+        apds.append(mpf.make_addplot(sell, type='scatter', markersize=80, marker='v', color='r'))
 
+    kwargs = {"savefig": savefig} if savefig else {}
     mpf.plot(
         df,
         type='candle',
         addplot=apds,
         style='yahoo',
-        title=title,
+        title=title if k == 1 else f"{title} ({k} bars per candle)",
         ylabel='Price',
         figsize=(18, 8),
         volume=False,
-        show_nontrading=False
+        show_nontrading=False,
+        **kwargs
     )
 
-# --------- Plot EURUSD -----------
-plot_trades('data/EURUSD_M15_bt.csv', 'trade_log_eurusd.csv', 'EURUSD M15 SMC Bot')
 
-# --------- Plot XAUUSD -----------
-plot_trades('data/XAUUSD_M15_bt.csv', 'trade_log_xauusd.csv', 'XAUUSD M15 SMC Bot')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("prices", nargs="?", help="price CSV (default: the EURUSD and XAUUSD charts)")
+    parser.add_argument("trades", nargs="?", help="trade log CSV or journal .fills")
+    parser.add_argument("--title", default=None)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--max-bars", type=int, default=1500, help="merge bars beyond this many candles")
+    parser.add_argument("--out", default=None,
+                        help="save to this image instead of showing (one file per chart, suffixed by symbol)")
+    args = parser.parse_args()
+    if args.prices and not args.trades:
+        parser.error("a trade log is required with a price CSV")
+
+    charts = [(args.prices, args.trades, args.title or args.prices)] if args.prices else [
+        ('data/EURUSD_M15_bt.csv', 'trade_log_eurusd.csv', 'EURUSD M15 SMC Bot'),
+        ('data/XAUUSD_15m_bt.csv', 'trade_log_xauusd.csv', 'XAUUSD M15 SMC Bot'),
+    ]
+    for prices, trades, title in charts:
+        out = chart_path(args.out, prices) if args.out and len(charts) > 1 else args.out
+        plot_trades(prices, trades, title, args.start, args.end, args.max_bars, out)
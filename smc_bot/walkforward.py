@@ -0,0 +1,166 @@
+"""
+Walk-forward optimization over the native engine (fast_backtest).
+
+The history is cut into rolling folds: the grid is optimized on
+``train_days`` of in-sample bars, the best combination then trades the
+following ``test_days`` out of sample, and the folds roll forward by
+``test_days``.  Out-of-sample results are chained into one equity figure.
+
+Every (fold, combination) in-sample run is its own task in one process
+pool over the sweep's shared-memory feeds, so the whole grid for all folds
+runs in parallel, followed by the out-of-sample runs as a second batch.
+Workers compute the LTF detector triggers (``triggers_batch``, once per
+look_back) and the ATR over the full history and slice them per window,
+so overlapping folds reuse them; each window therefore starts with its
+detectors and ATR warmed up on the bars before it.
+
+    cd smc_bot && python walkforward.py --train-days 90 --test-days 30 --jobs 8
+"""
+
+import argparse
+import csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from fast_backtest import bt_atr, run_fast_backtest
+from feeds import OHLC, load_cached
+from smc.SMCStrategyCore import SMCStrategyCore
+from sweep import SharedFeeds, attach_feeds, grid_combos, summarize, worker_feeds
+
+DEFAULT_GRID = {
+    "look_back": [1, 2, 3],
+    "atr_thresh": [0.0003, 0.0005, 0.001],     # EURUSD scale, like the default files; XAUUSD wants ~0.3-1.5
+    "trailing_atr_mult": [1.0, 1.5, 2.0],
+    "max_retests": [2, 999],
+}
+DAY = 86400
+
+_cache = {}                 # per worker: "atr" / (look_back, window) -> full-history arrays
+
+
+def make_folds(time, train_days, test_days):
+    """``(is_start, oos_start, oos_end)`` epoch seconds of each fold; windows are half-open."""
+    if not len(time):
+        return []
+    first, last = int(time[0]), int(time[-1])
+    folds = []
+    start = first
+    while start + train_days * DAY <= last:
+        oos_start = start + train_days * DAY
+        folds.append((start, oos_start, oos_start + test_days * DAY))
+        start += test_days * DAY
+    return folds
+
+
+def _span(time, start, end):
+    return int(np.searchsorted(time, start, "left")), int(np.searchsorted(time, end, "left"))
+
+
+def _attach(spec):
+    attach_feeds(spec)
+    _cache.clear()
+
+
+def precomputed(look_back, window):
+    """Full-history ATR and triggers for ``look_back``, computed once per worker."""
+    _, _, ltf = worker_feeds()
+    if "atr" not in _cache:
+        _cache["atr"] = bt_atr(ltf.high, ltf.low, ltf.close)
+    key = (look_back, window)
+    if key not in _cache:
+        core = SMCStrategyCore(look_back=look_back)
+        _cache[key] = core.triggers_batch(ltf.open, ltf.high, ltf.low, ltf.close, window)
+    return _cache["atr"], _cache[key]
+
+
+def run_window(params, start, end, window=50):
+    """Backtest ``params`` on bars in ``[start, end)``; returns ``(params, start, metrics)``."""
+    feeds = []
+    for feed in worker_feeds():
+        lo, hi = _span(feed.time, start, end)
+        feeds.append(OHLC(*(col[lo:hi] for col in feed)))
+    lo, hi = _span(worker_feeds()[2].time, start, end)
+    atr, triggers = precomputed(params["look_back"], window)
+    res = run_fast_backtest(*feeds, window=window, atr=atr[lo:hi],
+                            triggers={k: v[lo:hi] for k, v in triggers.items()}, **params)
+    return params, start, summarize(res)
+
+
+def walk_forward(htf_path, mtf_path, ltf_path, grid=None, train_days=90, test_days=30, score="final_value",
+                 jobs=None, fromdate=None, todate=None, fixed=None, window=50, cash=10000.0, out=None,
+                 verbose=True):
+    """
+    Optimize ``grid`` on each fold's in-sample window by ``score`` (a
+    ``sweep.summarize`` metric, higher is better; ties go to the earlier
+    grid combination) and run the winner out of sample.  Returns one row
+    per fold with the chosen parameters, the in-sample score, the
+    out-of-sample metrics and the chained ``equity`` after that fold;
+    ``out`` also writes the rows as CSV.
+    """
+    grid = grid or DEFAULT_GRID
+    combos = [{**(fixed or {}), **c} for c in grid_combos(grid)]
+    feeds = [load_cached(p).between(fromdate, todate) for p in (htf_path, mtf_path, ltf_path)]
+    folds = make_folds(feeds[2].time, train_days, test_days)
+    if not folds:
+        return []
+
+    best = {}
+    with SharedFeeds(feeds) as shared, \
+            ProcessPoolExecutor(jobs, initializer=_attach, initargs=(shared.spec,)) as pool:
+        futures = {pool.submit(run_window, combo, is_start, oos_start, window): (k, i)
+                   for k, (is_start, oos_start, _) in enumerate(folds) for i, combo in enumerate(combos)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            k, i = futures[fut]
+            value = fut.result()[2][score]
+            if k not in best or (value, -i) > (best[k][0], -best[k][1]):
+                best[k] = (value, i)
+            if verbose and done % max(1, len(futures) // 20) == 0:
+                print(f"in-sample [{done}/{len(futures)}]")
+
+        oos = {pool.submit(run_window, combos[best[k][1]], oos_start, oos_end, window): k
+               for k, (_, oos_start, oos_end) in enumerate(folds)}
+        results = {oos[fut]: fut.result()[2] for fut in as_completed(oos)}
+
+    rows = []
+    equity = cash
+    for k, (is_start, oos_start, oos_end) in enumerate(folds):
+        metrics = results[k]
+        equity += metrics["final_value"] - cash
+        rows.append({
+            "fold": k,
+            "is_from": _date(is_start), "oos_from": _date(oos_start), "oos_to": _date(oos_end),
+            **{name: combos[best[k][1]][name] for name in grid},
+            f"is_{score}": best[k][0],
+            **{f"oos_{m}": v for m, v in metrics.items()},
+            "equity": equity,
+        })
+        if verbose:
+            print(f"fold {k}: {rows[-1]}")
+    if out:
+        with open(out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def _date(epoch):
+    return str(np.datetime64(int(epoch), "s"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--htf", default="data/EURUSD_H1_bt.csv")
+    parser.add_argument("--mtf", default="data/EURUSD_M30_bt.csv")
+    parser.add_argument("--ltf", default="data/EURUSD_M15_bt.csv")
+    parser.add_argument("--train-days", type=int, default=90)
+    parser.add_argument("--test-days", type=int, default=30)
+    parser.add_argument("--score", default="final_value")
+    parser.add_argument("--out", default="walkforward_results.csv")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    rows = walk_forward(args.htf, args.mtf, args.ltf, train_days=args.train_days, test_days=args.test_days,
+                        score=args.score, jobs=args.jobs, out=args.out)
+    if rows:
+        print(f"{len(rows)} folds, out-of-sample equity {rows[-1]['equity']:.2f} -> {args.out}")